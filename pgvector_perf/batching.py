@@ -0,0 +1,38 @@
+from typing import List, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+
+def token_budget_batches(
+    lengths: npt.ArrayLike,
+    *,
+    max_tokens: int,
+    max_batch_size: Optional[int] = None,
+) -> List[npt.NDArray[np.int64]]:
+    """Group row indices into batches of similar length under a token budget.
+
+    Rows are sorted by length and cut greedily so that every batch, padded
+    to its longest row, holds at most `max_tokens` tokens (a row longer than
+    the budget gets a batch of its own). Batches are returned longest first,
+    which keeps a worker pool busy until the end when they are submitted in
+    order.
+    """
+
+    lengths = np.asarray(lengths, dtype=np.int64)
+    if max_tokens < 1:
+        raise ValueError("The token budget must be positive")
+    order = np.argsort(lengths, kind="stable")
+    batches: List[npt.NDArray[np.int64]] = []
+    start = 0
+    for stop in range(1, len(order) + 1):
+        size = stop - start
+        if stop < len(order) and (
+            (size + 1) * lengths[order[stop]] <= max_tokens
+            and (max_batch_size is None or size < max_batch_size)
+        ):
+            continue
+        batches.append(order[start:stop])
+        start = stop
+    batches.sort(key=lambda batch: len(batch) * int(lengths[batch[-1]]), reverse=True)
+    return batches
@@ -0,0 +1,657 @@
+import contextlib
+import hashlib
+import os
+import time
+from datetime import datetime
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Text,
+    Tuple,
+)
+
+import numpy as np
+import numpy.typing as npt
+import pytz
+from pydantic import BaseModel, ConfigDict, Field
+from rich.console import Group
+from rich.table import Table
+from sqlalchemy import func, literal_column, select
+
+from pgvector_perf.config import logger
+from pgvector_perf.datasets import FeatureDataset, read_feature_dataset
+from pgvector_perf.ground_truth import (
+    compute_ground_truth,
+    default_cache_dir,
+    save_corpus,
+)
+from pgvector_perf.metrics import MetricsCollector, OperationMetrics, operations_table
+from pgvector_perf.plans import QueryPlan
+from pgvector_perf.schemas import (
+    BulkInsertResult,
+    IndexBuildCallback,
+    IndexBuildOptions,
+    IndexBuildResult,
+    IndexConfig,
+    SearchParams,
+)
+
+if TYPE_CHECKING:
+    from pgvector_perf.client import PgvectorPerf
+
+
+class LatencySummary(BaseModel):
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    p999_ms: float
+    max_ms: float
+
+    @classmethod
+    def from_seconds(cls, latencies: npt.ArrayLike) -> "LatencySummary":
+        latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000
+        p50, p95, p99, p999 = np.percentile(latencies_ms, [50, 95, 99, 99.9])
+        return cls(
+            mean_ms=float(latencies_ms.mean()),
+            p50_ms=float(p50),
+            p95_ms=float(p95),
+            p99_ms=float(p99),
+            p999_ms=float(p999),
+            max_ms=float(latencies_ms.max()),
+        )
+
+
+Projection = Literal["points", "columns", "no_embedding", "ids"]
+
+PROJECTIONS: Tuple[Projection, ...] = ("points", "columns", "no_embedding", "ids")
+
+
+class ProjectionResult(BaseModel):
+    """Latency of one result shape of the same top-k query.
+
+    `points` is `Points.query`; the others are `Points.query_columns` with
+    all columns, without the embedding, and with ids and distances only.
+    `bytes_per_query` is the text size of the result rows on the server, an
+    estimate of what the text protocol transfers.
+    """
+
+    projection: Projection
+    bytes_per_query: float
+    qps: float
+    latency: LatencySummary
+
+
+class FilteredResult(BaseModel):
+    """Recall and latency of queries filtered on one `model`.
+
+    Recall is against the exact neighbors among that model's rows;
+    `selectivity` is their share of the corpus and `fill_rate` the share of
+    the `k` result slots that were filled, which drops when the index scan
+    runs out of matching candidates.
+    """
+
+    model: Text
+    selectivity: float
+    partial_index_bytes: Optional[int] = None
+    recall: float
+    fill_rate: float
+    qps: float
+    latency: LatencySummary
+
+
+class BenchmarkResult(BaseModel):
+    dataset: Text
+    corpus_size: int
+    num_queries: int
+    dimensions: int
+    k: int
+    index: Optional[IndexConfig] = None
+    index_build_options: Optional[IndexBuildOptions] = None
+    search_params: Optional[SearchParams] = None
+    load_seconds: Optional[float] = None
+    load_rows_per_second: Optional[float] = None
+    index_build_seconds: Optional[float] = None
+    index_bytes: Optional[int] = None
+    recall: float
+    qps: float
+    latency: LatencySummary
+    projections: Optional[List[ProjectionResult]] = None
+    filtered: Optional[List[FilteredResult]] = None
+    operations: Optional[List[OperationMetrics]] = None
+    query_plan: Optional[QueryPlan] = None
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(tz=pytz.utc).replace(microsecond=0)
+    )
+
+    def __rich__(self):
+        table = Table(title=f"pgvector-perf bench: {self.dataset}")
+        table.add_column("metric", style="yellow")
+        table.add_column("value", style="cyan", justify="right")
+        table.add_row("corpus size", f"{self.corpus_size:,}")
+        table.add_row("queries", f"{self.num_queries:,}")
+        table.add_row("dimensions", f"{self.dimensions}")
+        if self.load_rows_per_second is not None:
+            table.add_row("load rows/s", f"{self.load_rows_per_second:,.0f}")
+        if self.index is not None:
+            table.add_row("index", f"{self.index}")
+        if self.search_params is not None and self.search_params.model_dump(
+            exclude_none=True
+        ):
+            table.add_row("search", f"{self.search_params}")
+        if self.index_build_options is not None and (
+            self.index_build_options != IndexBuildOptions()
+        ):
+            table.add_row("index build", f"{self.index_build_options}")
+        if self.index_build_seconds is not None:
+            table.add_row("index build s", f"{self.index_build_seconds:.2f}")
+        if self.index_bytes is not None:
+            table.add_row("index MiB", f"{self.index_bytes / 2**20:,.1f}")
+        if self.query_plan is not None:
+            table.add_row(
+                "query plan",
+                (
+                    f"index scan of '{self.query_plan.vector_index}'"
+                    if self.query_plan.index_scan
+                    else "[red]" + " > ".join(self.query_plan.node_types)
+                ),
+            )
+        table.add_row(f"recall@{self.k}", f"{self.recall:.4f}")
+        table.add_row("QPS", f"{self.qps:,.1f}")
+        table.add_row("p50 ms", f"{self.latency.p50_ms:.3f}")
+        table.add_row("p95 ms", f"{self.latency.p95_ms:.3f}")
+        table.add_row("p99 ms", f"{self.latency.p99_ms:.3f}")
+        table.add_row("p99.9 ms", f"{self.latency.p999_ms:.3f}")
+        tables = [table]
+        if self.projections:
+            tables.append(self._projections_table())
+        if self.filtered:
+            tables.append(self._filtered_table())
+        if self.operations:
+            tables.append(operations_table(self.operations))
+        return tables[0] if len(tables) == 1 else Group(*tables)
+
+    def _projections_table(self) -> Table:
+        projections = Table(title=f"result projections, k={self.k}")
+        projections.add_column("projection", style="yellow")
+        projections.add_column("KiB/query", style="cyan", justify="right")
+        projections.add_column("QPS", style="cyan", justify="right")
+        projections.add_column("p50 ms", style="cyan", justify="right")
+        projections.add_column("p99 ms", style="cyan", justify="right")
+        for projection in self.projections:
+            projections.add_row(
+                projection.projection,
+                f"{projection.bytes_per_query / 1024:,.1f}",
+                f"{projection.qps:,.1f}",
+                f"{projection.latency.p50_ms:.3f}",
+                f"{projection.latency.p99_ms:.3f}",
+            )
+        return projections
+
+    def _filtered_table(self) -> Table:
+        filtered = Table(title=f"filtered by model, k={self.k}")
+        filtered.add_column("model", style="yellow")
+        for column in ("selectivity", "partial MiB", "recall", "fill", "QPS"):
+            filtered.add_column(column, style="cyan", justify="right")
+        filtered.add_column("p50 ms", style="cyan", justify="right")
+        filtered.add_column("p99 ms", style="cyan", justify="right")
+        for result in self.filtered or []:
+            filtered.add_row(
+                result.model,
+                f"{result.selectivity:.2%}",
+                (
+                    ""
+                    if result.partial_index_bytes is None
+                    else f"{result.partial_index_bytes / 2**20:,.1f}"
+                ),
+                f"{result.recall:.4f}",
+                f"{result.fill_rate:.2%}",
+                f"{result.qps:,.1f}",
+                f"{result.latency.p50_ms:.3f}",
+                f"{result.latency.p99_ms:.3f}",
+            )
+        return filtered
+
+
+def split_queries(
+    dataset: FeatureDataset, num_queries: int, *, seed: int = 0
+) -> Tuple[FeatureDataset, FeatureDataset]:
+    """Hold out `num_queries` random rows; the rest is the corpus."""
+
+    if not 0 < num_queries < len(dataset):
+        raise ValueError(f"Number of queries must be between 1 and {len(dataset) - 1}")
+    permutation = np.random.default_rng(seed).permutation(len(dataset))
+    query_indices = np.sort(permutation[:num_queries])
+    corpus_indices = np.sort(permutation[num_queries:])
+    return dataset.take(corpus_indices), dataset.take(query_indices)
+
+
+def corpus_path(
+    dataset_path: Text,
+    cache_dir: Text,
+    *,
+    num_queries: int,
+    limit: Optional[int],
+    seed: int,
+) -> Text:
+    """Stable `.npy` path for the corpus split of a dataset and settings."""
+
+    stat = os.stat(dataset_path)
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(f"{os.path.abspath(dataset_path)}:{stat.st_size}".encode())
+    digest.update(f"{stat.st_mtime_ns}:{num_queries}:{limit}:{seed}".encode())
+    return os.path.join(cache_dir, f"corpus-{digest.hexdigest()}.npy")
+
+
+def recall_at_k(
+    retrieved: npt.NDArray[np.int64], truth: npt.NDArray[np.int64], k: int
+) -> float:
+    hits = (retrieved[:, :k, None] == truth[:, None, :k]).any(axis=2).sum(axis=1)
+    return float(hits.mean() / k)
+
+
+def measure_queries(
+    client: "PgvectorPerf",
+    queries: npt.NDArray[np.float32],
+    k: int,
+    *,
+    warmup: int = 10,
+    model: Optional[Text] = None,
+) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.float64], float]:
+    """Run every query through `Points.query` one at a time.
+
+    Returns the retrieved ids `(Q, k)`, `-1` where fewer than `k` points
+    were found, the per-query latencies in seconds and the wall time of the
+    measured loop. `model` filters the results.
+    """
+
+    embeddings = queries.tolist()
+    for embedding in embeddings[:warmup]:
+        client.points.query(embedding, limit=k, model=model)
+
+    retrieved = np.full((len(queries), k), -1, dtype=np.int64)
+    latencies = np.empty(len(queries), dtype=np.float64)
+    wall_start = time.perf_counter()
+    for i, embedding in enumerate(embeddings):
+        start = time.perf_counter()
+        points_with_distance = client.points.query(embedding, limit=k, model=model)
+        latencies[i] = time.perf_counter() - start
+        ids = [point.id for point, _ in points_with_distance]
+        retrieved[i, : len(ids)] = ids
+    return retrieved, latencies, time.perf_counter() - wall_start
+
+
+def measure_projections(
+    client: "PgvectorPerf",
+    queries: npt.NDArray[np.float32],
+    k: int,
+    *,
+    projections: Tuple[Projection, ...] = PROJECTIONS,
+    warmup: int = 10,
+    byte_samples: int = 20,
+) -> List[ProjectionResult]:
+    """Time the same queries for each result projection, one at a time."""
+
+    points = client.points
+    run: Dict[Projection, Callable[[npt.NDArray[np.float32]], object]] = {
+        "points": lambda q: points.query(q.tolist(), limit=k),
+        "columns": lambda q: points.query_columns(q, limit=k),
+        "no_embedding": lambda q: points.query_columns(
+            q, limit=k, with_embedding=False
+        ),
+        "ids": lambda q: points.query_columns(
+            q, limit=k, columns=(), with_embedding=False
+        ),
+    }
+    results: List[ProjectionResult] = []
+    for projection in projections:
+        for query in queries[:warmup]:
+            run[projection](query)
+        latencies = np.empty(len(queries), dtype=np.float64)
+        wall_start = time.perf_counter()
+        for i, query in enumerate(queries):
+            start = time.perf_counter()
+            run[projection](query)
+            latencies[i] = time.perf_counter() - start
+        wall_seconds = time.perf_counter() - wall_start
+        results.append(
+            ProjectionResult(
+                projection=projection,
+                bytes_per_query=_result_bytes(
+                    client, projection, queries[:byte_samples], k
+                ),
+                qps=len(queries) / wall_seconds,
+                latency=LatencySummary.from_seconds(latencies),
+            )
+        )
+        logger.info(
+            f"Projection '{projection}': {results[-1].bytes_per_query:,.0f} "
+            + f"bytes/query, p50={results[-1].latency.p50_ms:.3f}ms."
+        )
+    return results
+
+
+def _result_bytes(
+    client: "PgvectorPerf",
+    projection: Projection,
+    queries: npt.NDArray[np.float32],
+    k: int,
+) -> float:
+    points = client.points
+    columns = {
+        "points": None,
+        "columns": points._batch_columns(("text", "model", "created_at"), True),
+        "no_embedding": points._batch_columns(("text", "model", "created_at"), False),
+        "ids": points._batch_columns((), False),
+    }[projection]
+    total = 0
+    with client.engine.connect() as connection:
+        for query in queries:
+            stmt = points._query_stmt(
+                query, limit=k, within_distance=None, columns=columns
+            ).subquery("result")
+            total += connection.execute(
+                select(
+                    func.coalesce(
+                        func.sum(func.octet_length(literal_column("result::text"))), 0
+                    )
+                ).select_from(stmt)
+            ).scalar_one()
+    return total / max(1, len(queries))
+
+
+class BenchmarkData(BaseModel):
+    """Corpus, held-out queries and their exact neighbors as dataset ids."""
+
+    model_config: ConfigDict = ConfigDict(arbitrary_types_allowed=True)
+
+    dataset: Text
+    corpus: FeatureDataset
+    queries: FeatureDataset
+    truth: npt.NDArray[np.int64]
+    corpus_path: Optional[Text] = None
+
+    @property
+    def k(self) -> int:
+        return self.truth.shape[1]
+
+
+def prepare_benchmark(
+    client: "PgvectorPerf",
+    dataset_path: Text,
+    *,
+    k: int = 10,
+    num_queries: int = 1000,
+    limit: Optional[int] = None,
+    seed: int = 0,
+    ground_truth_dir: Text = default_cache_dir,
+    processes: Optional[int] = None,
+) -> BenchmarkData:
+    """Split a feature dataset into corpus and queries with exact neighbors.
+
+    Exact neighbors are computed over a memory-mapped copy of the corpus in
+    `ground_truth_dir` and cached there.
+    """
+
+    dataset = read_feature_dataset(dataset_path, limit=limit)
+    if dataset.dimensions != client.vector_dimensions:
+        raise ValueError(
+            f"Dataset has {dataset.dimensions} dimensions but the client "
+            + f"expects {client.vector_dimensions}, set VECTOR_DIMENSIONS "
+            + f"to {dataset.dimensions}"
+        )
+    corpus, queries = split_queries(dataset, num_queries, seed=seed)
+    logger.info(f"Corpus has {len(corpus):,} points, {len(queries):,} queries.")
+
+    _corpus_path = corpus_path(
+        dataset_path, ground_truth_dir, num_queries=num_queries, limit=limit, seed=seed
+    )
+    if not os.path.exists(_corpus_path):
+        save_corpus(_corpus_path, corpus.embeddings)
+    ground_truth = compute_ground_truth(
+        _corpus_path,
+        queries.embeddings,
+        k,
+        processes=processes,
+        cache_dir=ground_truth_dir,
+    )
+    return BenchmarkData(
+        dataset=dataset_path,
+        corpus=corpus,
+        queries=queries,
+        truth=corpus.ids[ground_truth.neighbors],
+        corpus_path=_corpus_path,
+    )
+
+
+def filtered_ground_truth(
+    data: BenchmarkData,
+    model: Text,
+    *,
+    ground_truth_dir: Text = default_cache_dir,
+    processes: Optional[int] = None,
+) -> npt.NDArray[np.int64]:
+    """Exact neighbors of the queries among the corpus rows of `model`.
+
+    The subset is saved next to the corpus `.npy` so its neighbors are
+    cached like the unfiltered ones.
+    """
+
+    rows = np.flatnonzero(np.asarray(data.corpus.models) == model)
+    if len(rows) < data.k:
+        raise ValueError(
+            f"Model '{model}' has {len(rows)} corpus rows, fewer than k={data.k}"
+        )
+    digest = hashlib.blake2b(model.encode(), digest_size=8).hexdigest()
+    base = data.corpus_path or os.path.join(ground_truth_dir, "corpus.npy")
+    subset_path = f"{os.path.splitext(base)[0]}-{digest}.npy"
+    if not os.path.exists(subset_path):
+        save_corpus(subset_path, data.corpus.embeddings[rows])
+    ground_truth = compute_ground_truth(
+        subset_path,
+        data.queries.embeddings,
+        data.k,
+        processes=processes,
+        cache_dir=ground_truth_dir,
+    )
+    return data.corpus.ids[rows[ground_truth.neighbors]]
+
+
+def measure_filtered(
+    client: "PgvectorPerf",
+    data: BenchmarkData,
+    models: Sequence[Text],
+    *,
+    warmup: int = 10,
+    partial_indexes: bool = False,
+    ground_truth_dir: Text = default_cache_dir,
+    processes: Optional[int] = None,
+) -> List[FilteredResult]:
+    """Recall and latency of the queries filtered on each of `models`.
+
+    With `partial_indexes`, a partial index over each model's rows is built
+    first and used by its queries.
+    """
+
+    corpus_models = np.asarray(data.corpus.models)
+    results: List[FilteredResult] = []
+    for model in models:
+        truth = filtered_ground_truth(
+            data, model, ground_truth_dir=ground_truth_dir, processes=processes
+        )
+        partial_index_bytes = None
+        if partial_indexes:
+            client.index.create(model=model)
+            partial_index_bytes = client.index.size(model=model)
+        retrieved, latencies, wall_seconds = measure_queries(
+            client, data.queries.embeddings, data.k, warmup=warmup, model=model
+        )
+        results.append(
+            FilteredResult(
+                model=model,
+                selectivity=float(np.mean(corpus_models == model)),
+                partial_index_bytes=partial_index_bytes,
+                recall=recall_at_k(retrieved, truth, data.k),
+                fill_rate=float(np.mean(retrieved >= 0)),
+                qps=len(data.queries) / wall_seconds,
+                latency=LatencySummary.from_seconds(latencies),
+            )
+        )
+        logger.info(
+            f"Filter model='{model}': recall={results[-1].recall:.4f}, "
+            + f"p50={results[-1].latency.p50_ms:.3f}ms."
+        )
+    return results
+
+
+def load_corpus(client: "PgvectorPerf", corpus: FeatureDataset) -> BulkInsertResult:
+    """Replace the table contents with `corpus`, leaving it without an index."""
+
+    client.databases.touch()
+    return client.bulk_load(
+        ids=corpus.ids,
+        texts=corpus.texts,
+        models=corpus.models,
+        embeddings=corpus.embeddings,
+        truncate=True,
+        build_index=False,
+    ).load
+
+
+def build_index(
+    client: "PgvectorPerf",
+    config: Optional[IndexConfig] = None,
+    *,
+    progress: Optional[IndexBuildCallback] = None,
+) -> IndexBuildResult:
+    """Build the vector index with the client's `index_build_options`."""
+
+    result = client.index.create(config=config, progress=progress)
+    logger.info(f"{result}.")
+    return result
+
+
+@contextlib.contextmanager
+def collect_metrics(client: "PgvectorPerf") -> Iterator[Optional[MetricsCollector]]:
+    """The client's `MetricsCollector`, or a new one installed for the block.
+
+    Yields `None` if the client already has another `Instrumentation`.
+    """
+
+    if isinstance(client.instrumentation, MetricsCollector):
+        yield client.instrumentation
+    elif client.instrumentation is not None:
+        yield None
+    else:
+        client.instrumentation = MetricsCollector()
+        try:
+            yield client.instrumentation
+        finally:
+            client.instrumentation = None
+
+
+def run_benchmark(
+    client: "PgvectorPerf",
+    dataset_path: Text,
+    *,
+    k: int = 10,
+    num_queries: int = 1000,
+    limit: Optional[int] = None,
+    load: bool = True,
+    warmup: int = 10,
+    prewarm: bool = False,
+    projections: bool = False,
+    filter_models: Sequence[Text] = (),
+    partial_indexes: bool = False,
+    progress: Optional[IndexBuildCallback] = None,
+    seed: int = 0,
+    ground_truth_dir: Text = default_cache_dir,
+    processes: Optional[int] = None,
+) -> BenchmarkResult:
+    """Load a feature dataset, build the index and measure recall and latency.
+
+    With `load=False` the table is expected to already hold the corpus of an
+    earlier run with the same `num_queries`, `limit` and `seed`. `prewarm`
+    runs `client.warmup()` before measuring; `projections` also times the
+    queries for every result projection. `filter_models` also measures the
+    queries filtered on each model, see `measure_filtered`. `progress`
+    receives samples of the index build, see `Index.create`. Calls of the
+    client's resources are recorded in `operations`, see `collect_metrics`.
+    """
+
+    with collect_metrics(client) as collector:
+        data = prepare_benchmark(
+            client,
+            dataset_path,
+            k=k,
+            num_queries=num_queries,
+            limit=limit,
+            seed=seed,
+            ground_truth_dir=ground_truth_dir,
+            processes=processes,
+        )
+
+        load_seconds = load_rows_per_second = index_build_seconds = index_bytes = None
+        if load:
+            copy_result = load_corpus(client, data.corpus)
+            load_seconds = copy_result.elapsed
+            load_rows_per_second = copy_result.rows_per_second
+            build = build_index(client, progress=progress)
+            index_build_seconds, index_bytes = build.seconds, build.bytes
+
+        if prewarm:
+            client.warmup(num_queries=0)
+        retrieved, latencies, wall_seconds = measure_queries(
+            client, data.queries.embeddings, k, warmup=warmup
+        )
+        query_plan = client.points.explain_query(
+            data.queries.embeddings[0].tolist(), limit=k
+        )
+        if not query_plan.index_scan:
+            logger.warning(f"Queries do not use the vector index: {query_plan}.")
+
+        result = BenchmarkResult(
+            dataset=dataset_path,
+            corpus_size=len(data.corpus),
+            num_queries=len(data.queries),
+            dimensions=data.corpus.dimensions,
+            k=k,
+            index=client.index_config,
+            index_build_options=client.index_build_options,
+            search_params=client.search_params,
+            load_seconds=load_seconds,
+            load_rows_per_second=load_rows_per_second,
+            index_build_seconds=index_build_seconds,
+            index_bytes=index_bytes if load else client.index.size(),
+            recall=recall_at_k(retrieved, data.truth, k),
+            qps=len(data.queries) / wall_seconds,
+            latency=LatencySummary.from_seconds(latencies),
+            query_plan=query_plan,
+            projections=(
+                measure_projections(client, data.queries.embeddings, k, warmup=warmup)
+                if projections
+                else None
+            ),
+            filtered=(
+                measure_filtered(
+                    client,
+                    data,
+                    filter_models,
+                    warmup=warmup,
+                    partial_indexes=partial_indexes,
+                    ground_truth_dir=ground_truth_dir,
+                    processes=processes,
+                )
+                if filter_models
+                else None
+            ),
+        )
+        if collector is not None:
+            result.operations = collector.snapshot()
+        return result
@@ -0,0 +1,149 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def merge(self, other: "CacheStats") -> "CacheStats":
+        """Totals of this and another cache's stats, e.g. another process's."""
+
+        return CacheStats(
+            **{
+                field: getattr(self, field) + getattr(other, field)
+                for field in CacheStats.model_fields
+            }
+        )
+
+
+class QueryCache(Generic[T]):
+    """Thread-safe LRU cache of query results with a TTL and a memory bound.
+
+    Entries are keyed by `key()`, a hash of the float32 embedding bytes and
+    the query parameters. Writes call `invalidate()`, which drops every entry
+    and bumps `version`; a result computed under an older version is not
+    stored, so a query racing with a write cannot cache stale rows.
+    `max_bytes` bounds the estimated size of the cached results.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10000,
+        max_bytes: int = 256 * 2**20,
+        ttl: Optional[float] = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[T, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Settings only: a copy sent to a worker process starts empty.
+        return {
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "clock": self._clock,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @staticmethod
+    def key(embedding: npt.ArrayLike, **params: Any) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(embedding, dtype=np.float32).tobytes())
+        digest.update(repr(sorted(params.items())).encode())
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[T]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            value, nbytes, expires_at = entry
+            if expires_at < self._clock():
+                self._remove(key)
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def put(self, key: bytes, value: T, nbytes: int, *, version: int) -> bool:
+        """Store `value` unless the cache was invalidated since `version`."""
+
+        with self._lock:
+            if version != self._version or nbytes > self.max_bytes:
+                return False
+            if key in self._entries:
+                self._remove(key)
+            expires_at = float("inf") if self.ttl is None else self._clock() + self.ttl
+            self._entries[key] = (value, nbytes, expires_at)
+            self._stats.bytes += nbytes
+            while (
+                len(self._entries) > self.max_entries
+                or self._stats.bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self._stats.evictions += 1
+            self._stats.entries = len(self._entries)
+            return True
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._stats.bytes = 0
+            self._stats.entries = 0
+            self._stats.invalidations += 1
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return self._stats.model_copy()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = CacheStats(
+                entries=len(self._entries), bytes=self._stats.bytes
+            )
+
+    def _remove(self, key: bytes) -> None:
+        _, nbytes, _ = self._entries.pop(key)
+        self._stats.bytes -= nbytes
+        self._stats.entries = len(self._entries)
@@ -0,0 +1,530 @@
+import argparse
+import contextlib
+import logging
+from typing import Any, Dict, List, Optional, Text
+
+from pydantic import BaseModel
+
+from pgvector_perf.config import console, logger
+from pgvector_perf.ground_truth import default_cache_dir
+from pgvector_perf.version import __version__
+
+
+def bench(args: argparse.Namespace):
+    from pgvector_perf.benchmark import run_benchmark
+    from pgvector_perf.client import PgvectorPerf
+    from pgvector_perf.metrics import MetricsCollector
+    from pgvector_perf.schemas import SearchParams
+
+    collector = MetricsCollector()
+    client = PgvectorPerf(
+        url=args.url,
+        index_config=_index_config(args),
+        search_params=SearchParams(
+            ef_search=args.ef_search,
+            probes=args.probes,
+            oversample=args.oversample,
+            iterative_scan=args.iterative_scan,
+            max_scan_tuples=args.max_scan_tuples,
+            filter_oversample=args.filter_oversample,
+        ),
+        index_build_options=_build_options(args),
+        partition_by_model=args.partition_by_model,
+        instrumentation=collector,
+        echo=args.echo,
+        **_pool_options(args),
+    )
+    with _build_progress(args) as progress:
+        result = run_benchmark(
+            client,
+            args.dataset,
+            k=args.k,
+            num_queries=args.queries,
+            limit=args.limit,
+            load=not args.no_load,
+            warmup=args.warmup,
+            prewarm=args.prewarm,
+            projections=args.projections,
+            filter_models=args.filter_models,
+            partial_indexes=args.partial_indexes,
+            progress=progress,
+            seed=args.seed,
+            ground_truth_dir=args.ground_truth_dir,
+            processes=args.processes,
+        )
+    _print_and_save(result, args.output)
+    if args.metrics_output:
+        with open(args.metrics_output, "w") as f:
+            f.write(collector.to_prometheus())
+
+
+def sweep(args: argparse.Namespace):
+    from pgvector_perf.client import PgvectorPerf
+    from pgvector_perf.schemas import SearchParams
+    from pgvector_perf.sweep import index_grid, run_sweep
+
+    client = PgvectorPerf(
+        url=args.url,
+        search_params=SearchParams(
+            ef_search=args.ef_search, oversample=args.oversample
+        ),
+        index_build_options=_build_options(args),
+        echo=args.echo,
+    )
+    configs = index_grid(
+        hnsw_m=args.hnsw_m,
+        hnsw_ef_construction=args.hnsw_ef_construction,
+        ivfflat_lists=args.ivfflat_lists,
+        opclass=args.opclass,
+        quantizations=args.quantizations,
+    )
+    with _build_progress(args) as progress:
+        report = run_sweep(
+            client,
+            args.dataset,
+            configs,
+            k=args.k,
+            num_queries=args.queries,
+            limit=args.limit,
+            load=not args.no_load,
+            warmup=args.warmup,
+            progress=progress,
+            seed=args.seed,
+            ground_truth_dir=args.ground_truth_dir,
+            processes=args.processes,
+        )
+    _print_and_save(report, args.output)
+
+
+def tune(args: argparse.Namespace):
+    from pgvector_perf.benchmark import build_index, load_corpus, prepare_benchmark
+    from pgvector_perf.client import PgvectorPerf
+    from pgvector_perf.tuning import tune_search_params
+
+    client = PgvectorPerf(
+        url=args.url,
+        index_config=_index_config(args),
+        index_build_options=_build_options(args),
+        echo=args.echo,
+    )
+    data = prepare_benchmark(
+        client,
+        args.dataset,
+        k=args.k,
+        num_queries=args.queries,
+        limit=args.limit,
+        seed=args.seed,
+        ground_truth_dir=args.ground_truth_dir,
+        processes=args.processes,
+    )
+    if not args.no_load:
+        load_corpus(client, data.corpus)
+        with _build_progress(args) as progress:
+            build_index(client, progress=progress)
+    result = tune_search_params(
+        client,
+        data.queries.embeddings,
+        data.truth,
+        k=args.k,
+        target_recall=args.target_recall,
+        low=args.low,
+        high=args.high,
+    )
+    _print_and_save(result, args.output)
+
+
+def load(args: argparse.Namespace):
+    import numpy as np
+
+    from pgvector_perf.cache import QueryCache
+    from pgvector_perf.client import PgvectorPerf
+    from pgvector_perf.datasets import read_feature_dataset
+    from pgvector_perf.load import LoadConfig, run_load
+    from pgvector_perf.plans import PlanSampler
+    from pgvector_perf.schemas import SearchParams
+
+    pool_options = _pool_options(args)
+    if args.executor == "thread":
+        # Every thread holds a connection for the whole run.
+        pool_options["pool_size"] = max(pool_options["pool_size"], args.concurrency)
+    client = PgvectorPerf(
+        url=args.url,
+        search_params=SearchParams(ef_search=args.ef_search, probes=args.probes),
+        query_cache=(
+            QueryCache(max_entries=args.cache_entries, ttl=args.cache_ttl)
+            if args.cache_entries > 0
+            else None
+        ),
+        plan_sampler=PlanSampler(args.explain_every) if args.explain_every else None,
+        echo=args.echo,
+        **pool_options,
+    )
+    dataset = read_feature_dataset(args.dataset, limit=args.limit)
+    rng = np.random.default_rng(args.seed)
+    queries = dataset.embeddings[
+        rng.choice(len(dataset), min(args.queries, len(dataset)), replace=False)
+    ]
+    config = LoadConfig(
+        mode=args.mode,
+        executor=args.executor,
+        concurrency=args.concurrency,
+        qps=args.qps,
+        duration=args.duration,
+        warmup=args.warmup,
+        k=args.k,
+        write_ratio=args.write_ratio,
+        seed=args.seed,
+    )
+    if args.prewarm:
+        client.warmup(queries)
+    _print_and_save(run_load(client, queries, config), args.output)
+    if client.plan_sampler is not None:
+        client.plan_sampler.wait()
+        stats = client.plan_sampler.stats()
+        console.print(
+            f"Explained {stats.sampled:,} of {stats.queries:,} queries, "
+            + f"{stats.flagged:,} without a vector index scan"
+        )
+
+
+def convert(args: argparse.Namespace):
+    from pgvector_perf.datasets import convert_feature_dataset
+
+    rows = convert_feature_dataset(
+        args.dataset, args.output, batch_size=args.batch_size
+    )
+    console.print(f"Converted {rows:,} rows to '{args.output}'")
+
+
+def int_list(value: Text) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def text_list(value: Text) -> List[Text]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def quantization_list(value: Text) -> List[Text]:
+    quantizations = [v.strip() for v in value.split(",") if v.strip()]
+    unknown = set(quantizations) - {"none", "halfvec", "bit"}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown quantizations: {sorted(unknown)}")
+    return quantizations
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pgvector-perf",
+        description="Performance testing and benchmarking of pgvector",
+    )
+    parser.add_argument("--version", action="version", version=__version__)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    bench_parser = subparsers.add_parser(
+        "bench", help="Measure recall@k, QPS and latency on a feature dataset"
+    )
+    _add_dataset_arguments(bench_parser)
+    _add_index_arguments(bench_parser)
+    bench_parser.add_argument(
+        "--ef-search", type=int, default=None, help="HNSW hnsw.ef_search"
+    )
+    bench_parser.add_argument(
+        "--probes", type=int, default=None, help="IVFFlat ivfflat.probes"
+    )
+    _add_oversample_argument(bench_parser)
+    bench_parser.add_argument(
+        "--projections",
+        action="store_true",
+        help="Also compare latency and bytes of result projections",
+    )
+    bench_parser.add_argument(
+        "--filter-models",
+        type=text_list,
+        default=[],
+        help="Comma-separated models to also measure filtered queries for",
+    )
+    bench_parser.add_argument(
+        "--partial-indexes",
+        action="store_true",
+        help="Build a partial index per filtered model",
+    )
+    bench_parser.add_argument(
+        "--partition-by-model",
+        action="store_true",
+        help="Partition the table by model, with one index per partition",
+    )
+    bench_parser.add_argument(
+        "--metrics-output",
+        default=None,
+        help="Write per-operation metrics in the Prometheus text format",
+    )
+    bench_parser.add_argument(
+        "--iterative-scan",
+        choices=["off", "relaxed_order", "strict_order"],
+        default=None,
+        help="hnsw.iterative_scan for filtered queries (pgvector 0.8+)",
+    )
+    bench_parser.add_argument(
+        "--max-scan-tuples", type=int, default=None, help="hnsw.max_scan_tuples"
+    )
+    bench_parser.add_argument(
+        "--filter-oversample",
+        type=int,
+        default=None,
+        help="Unfiltered neighbors per result fetched, then filtered",
+    )
+    _add_pool_arguments(bench_parser)
+    bench_parser.set_defaults(func=bench)
+
+    sweep_parser = subparsers.add_parser(
+        "sweep", help="Build and benchmark a grid of index configurations"
+    )
+    _add_dataset_arguments(sweep_parser)
+    sweep_parser.add_argument("--hnsw-m", type=int_list, default=[8, 16, 32])
+    sweep_parser.add_argument(
+        "--hnsw-ef-construction", type=int_list, default=[64, 128]
+    )
+    sweep_parser.add_argument("--ivfflat-lists", type=int_list, default=[])
+    sweep_parser.add_argument(
+        "--quantizations",
+        type=quantization_list,
+        default=["none"],
+        help="Comma-separated index representations: none, halfvec, bit",
+    )
+    sweep_parser.add_argument(
+        "--ef-search", type=int, default=None, help="HNSW hnsw.ef_search"
+    )
+    _add_oversample_argument(sweep_parser)
+    sweep_parser.set_defaults(func=sweep)
+
+    tune_parser = subparsers.add_parser(
+        "tune",
+        help="Find the smallest ef_search or probes meeting a target recall",
+    )
+    _add_dataset_arguments(tune_parser)
+    _add_index_arguments(tune_parser)
+    tune_parser.add_argument("--target-recall", type=float, default=0.95)
+    tune_parser.add_argument(
+        "--low", type=int, default=None, help="Lower bound of the search"
+    )
+    tune_parser.add_argument(
+        "--high", type=int, default=None, help="Upper bound of the search"
+    )
+    tune_parser.set_defaults(func=tune)
+
+    load_parser = subparsers.add_parser(
+        "load", help="Measure latency under concurrent closed- or open-loop load"
+    )
+    load_parser.add_argument("dataset", help="Feature Parquet file with queries")
+    load_parser.add_argument(
+        "--url", default=None, help="PostgreSQL URL, defaults to $POSTGRES_URL"
+    )
+    load_parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    load_parser.add_argument(
+        "--executor", choices=["thread", "process"], default="thread"
+    )
+    load_parser.add_argument("-c", "--concurrency", type=int, default=8)
+    load_parser.add_argument(
+        "--qps", type=float, default=None, help="Open-loop target rate"
+    )
+    load_parser.add_argument(
+        "--duration", type=float, default=30.0, help="Measured seconds"
+    )
+    load_parser.add_argument(
+        "--warmup", type=float, default=0.0, help="Unrecorded seconds first"
+    )
+    load_parser.add_argument("-k", "--k", type=int, default=10)
+    load_parser.add_argument(
+        "--write-ratio", type=float, default=0.0, help="Share of creates"
+    )
+    load_parser.add_argument(
+        "--queries", type=int, default=1000, help="Distinct query vectors"
+    )
+    load_parser.add_argument(
+        "--limit", type=int, default=None, help="Read at most this many rows"
+    )
+    load_parser.add_argument("--ef-search", type=int, default=None)
+    load_parser.add_argument("--probes", type=int, default=None)
+    load_parser.add_argument("--seed", type=int, default=0)
+    load_parser.add_argument("-o", "--output", default=None, help="JSON results")
+    load_parser.add_argument("--echo", action="store_true")
+    load_parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=0,
+        help="Client query cache size, 0 disables it; with process workers, "
+        + "each keeps its own and --write-ratio must be 0",
+    )
+    load_parser.add_argument("--cache-ttl", type=float, default=60.0)
+    load_parser.add_argument(
+        "--explain-every",
+        type=int,
+        default=None,
+        help="EXPLAIN ANALYZE 1 in N queries and flag plans without an index " + "scan",
+    )
+    _add_pool_arguments(load_parser)
+    load_parser.set_defaults(func=load)
+
+    convert_parser = subparsers.add_parser(
+        "convert",
+        help="Rewrite a base64 feature Parquet with a FixedSizeList embedding column",
+    )
+    convert_parser.add_argument("dataset", help="Legacy feature Parquet file")
+    convert_parser.add_argument("output", help="Converted feature Parquet file")
+    convert_parser.add_argument("--batch-size", type=int, default=10000)
+    convert_parser.set_defaults(func=convert)
+
+    return parser
+
+
+def main(argv: Optional[List[Text]] = None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s")
+    logger.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+    args.func(args)
+
+
+def _add_dataset_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("dataset", help="Feature Parquet file")
+    parser.add_argument(
+        "--url", default=None, help="PostgreSQL URL, defaults to $POSTGRES_URL"
+    )
+    parser.add_argument("-k", "--k", type=int, default=10)
+    parser.add_argument(
+        "--queries", type=int, default=1000, help="Number of held-out queries"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="Read at most this many rows"
+    )
+    parser.add_argument(
+        "--no-load",
+        action="store_true",
+        help="Reuse the corpus loaded by an earlier run",
+    )
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--ground-truth-dir",
+        default=default_cache_dir,
+        help="Where the corpus .npy and exact neighbors are cached",
+    )
+    parser.add_argument(
+        "--processes", type=int, default=None, help="Ground truth worker processes"
+    )
+    parser.add_argument(
+        "--opclass", default="vector_l2_ops", help="Index operator class"
+    )
+    parser.add_argument("-o", "--output", default=None, help="JSON results")
+    parser.add_argument("--echo", action="store_true")
+    parser.add_argument(
+        "--maintenance-work-mem",
+        default=None,
+        help="maintenance_work_mem of index builds, e.g. 4GB",
+    )
+    parser.add_argument(
+        "--parallel-workers",
+        type=int,
+        default=None,
+        help="max_parallel_maintenance_workers of index builds",
+    )
+    parser.add_argument(
+        "--concurrently",
+        action="store_true",
+        help="Build indexes with CREATE INDEX CONCURRENTLY",
+    )
+    parser.add_argument(
+        "--progress", action="store_true", help="Show index build progress"
+    )
+
+
+def _add_index_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--method", choices=["hnsw", "ivfflat"], default="hnsw", help="Index type"
+    )
+    parser.add_argument("--m", type=int, default=16, help="HNSW m")
+    parser.add_argument(
+        "--ef-construction", type=int, default=64, help="HNSW ef_construction"
+    )
+    parser.add_argument("--lists", type=int, default=100, help="IVFFlat lists")
+    parser.add_argument(
+        "--quantization",
+        choices=["none", "halfvec", "bit"],
+        default="none",
+        help="Index a half-precision or binary-quantized copy of the embedding",
+    )
+
+
+def _add_oversample_argument(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--oversample",
+        type=int,
+        default=None,
+        help="Candidates per result re-ranked from a quantized index",
+    )
+
+
+def _add_pool_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=10)
+    parser.add_argument("--pool-pre-ping", action="store_true")
+    parser.add_argument(
+        "--pool-recycle", type=int, default=-1, help="Connection max age in seconds"
+    )
+    parser.add_argument(
+        "--prewarm",
+        action="store_true",
+        help="Open the pool, pg_prewarm the tables and indexes, run warm-up queries",
+    )
+
+
+def _pool_options(args: argparse.Namespace) -> Dict[Text, Any]:
+    return {
+        "pool_size": args.pool_size,
+        "max_overflow": args.max_overflow,
+        "pool_pre_ping": args.pool_pre_ping,
+        "pool_recycle": args.pool_recycle,
+    }
+
+
+def _index_config(args: argparse.Namespace):
+    from pgvector_perf.schemas import IndexConfig
+
+    return IndexConfig(
+        method=args.method,
+        m=args.m,
+        ef_construction=args.ef_construction,
+        lists=args.lists,
+        opclass=args.opclass,
+        quantization=args.quantization,
+    )
+
+
+def _build_options(args: argparse.Namespace):
+    from pgvector_perf.schemas import IndexBuildOptions
+
+    return IndexBuildOptions(
+        maintenance_work_mem=args.maintenance_work_mem,
+        max_parallel_maintenance_workers=args.parallel_workers,
+        concurrently=args.concurrently,
+    )
+
+
+def _build_progress(args: argparse.Namespace):
+    from pgvector_perf.progress import index_build_progress
+
+    if not args.progress:
+        return contextlib.nullcontext()
+    return index_build_progress()
+
+
+def _print_and_save(result: BaseModel, output: Optional[Text]):
+    console.print(result)
+    if output:
+        with open(output, "w") as f:
+            f.write(result.model_dump_json(indent=2))
+        console.print(f"Results saved as '{output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,45 @@
+import contextlib
 import os
-from typing import Generic, Optional, Text
+import time
+from typing import Any, Dict, Generic, List, Optional, Sequence, Set, Text
 
+import numpy as np
+import numpy.typing as npt
 from sqlalchemy import Engine, create_engine
-from sqlalchemy.engine import URL
+from sqlalchemy import text as sql_text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, sessionmaker
 
 from pgvector_perf import resources
-from pgvector_perf.config import settings
+from pgvector_perf.cache import QueryCache
+from pgvector_perf.config import logger, settings
+from pgvector_perf.metrics import Instrumentation
+from pgvector_perf.plans import PlanSampler
 from pgvector_perf.schemas import (
     NOT_GIVEN,
+    BulkLoadResult,
+    IndexBuildCallback,
+    IndexBuildOptions,
+    IndexConfig,
     NotGiven,
+    PointBatch,
     PointType,
     PointWithEmbeddingSchema,
+    SearchParams,
     Type,
+    VectorIndex,
+    WarmupResult,
 )
 
 
-class PgvectorPerf(Generic[PointType]):
-
-    databases: resources.Databases[PointType]
-    tables: resources.Tables[PointType]
-    index: resources.Index[PointType]
-    points: resources.Points[PointType]
+class BasePgvectorPerf(Generic[PointType]):
 
     def __init__(
         self,
@@ -31,8 +49,19 @@ class PgvectorPerf(Generic[PointType]):
         vector_dimensions: Optional[int] = None,
         vector_table: Optional[Text] = None,
         vector_index: Optional[Text] = None,
+        index_config: Optional[IndexConfig] = None,
+        search_params: Optional[SearchParams] = None,
+        index_build_options: Optional[IndexBuildOptions] = None,
+        partition_by_model: bool = False,
         admin_database: Optional[Text] = None,
         echo: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_pre_ping: bool = False,
+        pool_recycle: int = -1,
+        query_cache: Optional[QueryCache] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        plan_sampler: Optional[PlanSampler] = None,
         **kwargs,
     ):
         # Validate url
@@ -49,14 +78,168 @@ class PgvectorPerf(Generic[PointType]):
             raise ValueError("No model provided")
 
         self._url = url
-        self._engine: Optional["Engine"] = None
-        self._session_factory: Optional["sessionmaker[Session]"] = None
         self._model: Type[PointType] = model
         self._vector_dimensions = vector_dimensions or settings.vector_dimensions
         self._vector_table = vector_table or settings.vector_table
         self._vector_index = vector_index or settings.vector_index
+        self._index_config = index_config or IndexConfig()
+        self.search_params = search_params or SearchParams()
+        self.index_build_options = index_build_options or IndexBuildOptions()
+        self._partition_by_model = partition_by_model
+        # Models whose partition this client has created or seen.
+        self._partitions: Set[Text] = set()
         self._admin_database = admin_database or settings.admin_database
         self.echo = echo
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_pre_ping = pool_pre_ping
+        self.pool_recycle = pool_recycle
+        self.query_cache = query_cache
+        self._instrumentation = instrumentation
+        self.plan_sampler = plan_sampler
+
+    @property
+    def database_name(self) -> Text:
+        database = make_url(self._url).database
+        if database is None:
+            raise ValueError("No database name provided in the URL.")
+        return database
+
+    @property
+    def model(self):
+        return self._model
+
+    @property
+    def vector_dimensions(self) -> int:
+        return self._vector_dimensions
+
+    @property
+    def vector_table(self) -> Text:
+        return self._vector_table
+
+    @property
+    def vector_index(self) -> Text:
+        return self._vector_index
+
+    @property
+    def partition_by_model(self) -> bool:
+        return self._partition_by_model
+
+    @property
+    def index_config(self) -> IndexConfig:
+        return self._index_config
+
+    @index_config.setter
+    def index_config(self, index_config: IndexConfig) -> None:
+        """Point queries at another index; cached results are dropped."""
+
+        self._index_config = index_config
+        if self.query_cache is not None:
+            self.query_cache.invalidate()
+
+    @property
+    def instrumentation(self) -> Optional[Instrumentation]:
+        return self._instrumentation
+
+    @instrumentation.setter
+    def instrumentation(self, instrumentation: Optional[Instrumentation]) -> None:
+        """Record resource calls with `instrumentation`, `None` to stop."""
+
+        self._instrumentation = instrumentation
+        if self._engine is not None:
+            self._instrument(self._engine)
+
+    def _instrument(self, engine: Engine | AsyncEngine) -> Engine | AsyncEngine:
+        if self._instrumentation is not None:
+            self._instrumentation.attach(getattr(engine, "sync_engine", engine))
+        return engine
+
+    def _engine_kwargs(self) -> Dict[Text, Any]:
+        return {
+            "echo": self.echo,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_pre_ping": self.pool_pre_ping,
+            "pool_recycle": self.pool_recycle,
+        }
+
+    def _warmup_queries(
+        self, queries: Optional[npt.ArrayLike], num_queries: int
+    ) -> npt.NDArray[np.float32]:
+        if queries is None:
+            return np.random.rand(num_queries, self.vector_dimensions).astype(
+                np.float32
+            )
+        return np.asarray(queries, dtype=np.float32)[:num_queries]
+
+    def _prewarm_stmt(self):
+        """`pg_prewarm` every relation a query may read, with its block count.
+
+        That is the table or each of its partitions, their TOAST tables,
+        which hold the large embeddings, and all of their indexes.
+        """
+
+        return sql_text(
+            "WITH tables AS ("
+            + "SELECT c.oid, c.reltoastrelid FROM pg_class c "
+            + "WHERE c.oid = to_regclass(:table) UNION ALL "
+            + "SELECT c.oid, c.reltoastrelid FROM pg_inherits i "
+            + "JOIN pg_class c ON c.oid = i.inhrelid "
+            + "WHERE i.inhparent = to_regclass(:table)"
+            + "), relations AS ("
+            + "SELECT oid FROM tables UNION ALL "
+            + "SELECT reltoastrelid FROM tables WHERE reltoastrelid <> 0 UNION ALL "
+            + "SELECT x.indexrelid FROM pg_index x "
+            + "WHERE x.indrelid IN (SELECT oid FROM tables)"
+            + ") SELECT c.relname, pg_prewarm(c.oid) FROM relations r "
+            + "JOIN pg_class c ON c.oid = r.oid "
+            # A partitioned table or index has no storage of its own.
+            + "WHERE c.relkind IN ('r', 't', 'i') ORDER BY c.relkind = 'i', c.relname"
+        ).bindparams(table=self.model._sql_model.__table__.name)
+
+    def _analyze_stmt(self):
+        # Also samples every partition of a partitioned table.
+        return sql_text(f"ANALYZE {self.model._sql_model.__table__.name}")
+
+    @staticmethod
+    def _batch_models(
+        points: Optional[Sequence[PointType] | PointBatch],
+        models: Optional[Sequence[Text] | Text],
+    ) -> Sequence[Text]:
+        """Models of a batch taken like `Points.copy_batch`."""
+
+        if isinstance(points, PointBatch):
+            return points.models or []
+        if points is not None:
+            return [point.model for point in points]
+        if isinstance(models, Text):
+            return [models]
+        return models or []
+
+    @staticmethod
+    def _unbuilt(
+        dropped: Sequence[VectorIndex], existing: Sequence[VectorIndex]
+    ) -> List[VectorIndex]:
+        names = {index.name for index in existing}
+        return [index for index in dropped if index.name not in names]
+
+    @staticmethod
+    def _rebuild_index(index_existed: bool, build_index: Optional[bool]) -> bool:
+        return index_existed if build_index is None else build_index
+
+
+class PgvectorPerf(BasePgvectorPerf[PointType]):
+
+    databases: resources.Databases[PointType]
+    tables: resources.Tables[PointType]
+    index: resources.Index[PointType]
+    points: resources.Points[PointType]
+
+    def __init__(self, url: Optional[Text | URL] = None, *args, **kwargs):
+        super().__init__(url, *args, **kwargs)
+
+        self._engine: Optional["Engine"] = None
+        self._session_factory: Optional["sessionmaker[Session]"] = None
 
         # Initialize resources
         self.databases = resources.Databases(self)
@@ -67,33 +250,332 @@ class PgvectorPerf(Generic[PointType]):
     @property
     def engine(self):
         if self._engine is None:
-            self._engine = create_engine(self._url, echo=self.echo)
+            self._engine = self._instrument(
+                create_engine(self._url, **self._engine_kwargs())
+            )
         return self._engine
 
-    @property
-    def database_name(self) -> Text:
-        if self.engine.url.database is None:
-            raise ValueError("No database name provided in the URL.")
-        return self.engine.url.database
-
     @property
     def session_factory(self):
         if self._session_factory is None:
             self._session_factory = sessionmaker(bind=self.engine)
         return self._session_factory
 
-    @property
-    def model(self):
-        return self._model
+    def warmup(
+        self,
+        queries: Optional[npt.ArrayLike] = None,
+        *args,
+        num_queries: int = 10,
+        limit: int = 10,
+        prewarm: bool = True,
+        **kwargs,
+    ) -> WarmupResult:
+        """Open `pool_size` connections, prewarm the table and indexes, and query.
 
-    @property
-    def vector_dimensions(self) -> int:
-        return self._vector_dimensions
+        `pg_prewarm` loads the table (or each of its partitions), its TOAST
+        data and every index, per-model ones included, into shared buffers;
+        if the extension cannot be created it is skipped with a warning.
+        Then up to `num_queries` rows of `queries` (random vectors by
+        default) are sent through `Points.query`.
+        """
+
+        start = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            for _ in range(self.pool_size):
+                connection = stack.enter_context(self.engine.connect())
+                connection.execute(sql_text("SELECT 1"))
+
+        prewarmed_blocks: Dict[Text, int] = {}
+        if prewarm:
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(
+                        sql_text("CREATE EXTENSION IF NOT EXISTS pg_prewarm")
+                    )
+                    for relation, blocks in connection.execute(self._prewarm_stmt()):
+                        prewarmed_blocks[relation] = blocks
+            except DBAPIError as e:
+                logger.warning(f"Skipping pg_prewarm: {str(e.orig).strip()}")
+
+        warmup_queries = self._warmup_queries(queries, num_queries)
+        for embedding in warmup_queries.tolist():
+            self.points.query(embedding, limit=limit)
+
+        result = WarmupResult(
+            connections=self.pool_size,
+            prewarmed_blocks=prewarmed_blocks,
+            queries=len(warmup_queries),
+            elapsed=time.perf_counter() - start,
+        )
+        logger.info(f"Warmed up in {result.elapsed:.2f}s: {result}.")
+        return result
+
+    def bulk_load(
+        self,
+        points: Optional[Sequence[PointType] | PointBatch] = None,
+        *args,
+        ids: Optional[npt.ArrayLike] = None,
+        texts: Optional[Sequence[Text]] = None,
+        models: Optional[Sequence[Text] | Text] = None,
+        embeddings: Optional[npt.ArrayLike] = None,
+        truncate: bool = False,
+        build_index: Optional[bool] = None,
+        config: Optional[IndexConfig] = None,
+        build_options: Optional[IndexBuildOptions] = None,
+        progress: Optional[IndexBuildCallback] = None,
+        chunk_size: int = 1000,
+        **kwargs,
+    ) -> BulkLoadResult:
+        """Load points with the vector indexes out of the way, then index them.
+
+        Inserting into an HNSW index is much slower than building it once
+        over the loaded rows, so every vector index of the table and its
+        partitions (`Index.list`), per-model partial indexes included, is
+        dropped first. Points, taken like `Points.copy_batch`, are written
+        with binary `COPY` and the table is `ANALYZE`d. Then the vector index
+        is rebuilt by `Index.create` and the other dropped indexes by
+        `Index.restore`, with `build_options` (the client's
+        `index_build_options` by default) and `progress`.
+
+        The vector index is rebuilt, from `config` or the client's
+        `index_config`, only if it existed unless `build_index` says
+        otherwise; `False` leaves the table unindexed for a later build.
+        With `truncate`, the table is emptied first. Returns the seconds
+        spent in each phase.
+        """
+
+        build_options = build_options or self.index_build_options
+        phases: Dict[Text, float] = {}
+        start = time.perf_counter()
+        self.tables.touch()
+        # New partitions get the index, dropped with the others below.
+        self.tables.ensure_partitions(self._batch_models(points, models))
+        phases["touch"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index_existed = self.index.size() is not None
+        dropped = self.index.list()
+        if dropped:
+            self.index.drop(indexes=dropped)
+        phases["drop index"] = time.perf_counter() - start
+        if truncate:
+            start = time.perf_counter()
+            self.tables.truncate()
+            phases["truncate"] = time.perf_counter() - start
+
+        load = self.points.copy_batch(
+            points,
+            ids=ids,
+            texts=texts,
+            models=models,
+            embeddings=embeddings,
+            chunk_size=chunk_size,
+        )
+        phases["copy"] = load.elapsed
+
+        start = time.perf_counter()
+        with self.engine.begin() as connection:
+            connection.execute(self._analyze_stmt())
+        phases["analyze"] = time.perf_counter() - start
+
+        build = None
+        start = time.perf_counter()
+        if self._rebuild_index(index_existed, build_index):
+            build = self.index.create(
+                config=config, options=build_options, progress=progress
+            )
+        # Partial indexes and any other index `create` does not build.
+        restore = (
+            [] if build_index is False else self._unbuilt(dropped, self.index.list())
+        )
+        if restore:
+            self.index.restore(restore, options=build_options, progress=progress)
+        if build is not None or restore:
+            phases["build index"] = time.perf_counter() - start
+
+        result = BulkLoadResult(
+            load=load,
+            index_existed=index_existed,
+            build=build,
+            dropped=dropped,
+            phases=phases,
+        )
+        logger.info(f"{result}.")
+        return result
+
+
+class AsyncPgvectorPerf(BasePgvectorPerf[PointType]):
+    """Asyncio client on SQLAlchemy's async engine with psycopg 3.
+
+    Synchronous driver names in the URL (`postgresql://`,
+    `postgresql+psycopg2://`) are switched to `postgresql+psycopg://`, so the
+    same URL and settings work for both clients.
+    """
+
+    databases: resources.AsyncDatabases[PointType]
+    tables: resources.AsyncTables[PointType]
+    index: resources.AsyncIndex[PointType]
+    points: resources.AsyncPoints[PointType]
+
+    async_drivername: Text = "postgresql+psycopg"
+
+    def __init__(self, url: Optional[Text | URL] = None, *args, **kwargs):
+        super().__init__(url, *args, **kwargs)
+
+        self._url = self._to_async_url(self._url)
+        self._engine: Optional["AsyncEngine"] = None
+        self._session_factory: Optional["async_sessionmaker[AsyncSession]"] = None
+
+        # Initialize resources
+        self.databases = resources.AsyncDatabases(self)
+        self.tables = resources.AsyncTables(self)
+        self.index = resources.AsyncIndex(self)
+        self.points = resources.AsyncPoints(self)
 
     @property
-    def vector_table(self) -> Text:
-        return self._vector_table
+    def engine(self):
+        if self._engine is None:
+            self._engine = self._instrument(
+                create_async_engine(self._url, **self._engine_kwargs())
+            )
+        return self._engine
 
     @property
-    def vector_index(self) -> Text:
-        return self._vector_index
+    def session_factory(self):
+        if self._session_factory is None:
+            self._session_factory = async_sessionmaker(
+                bind=self.engine, expire_on_commit=False
+            )
+        return self._session_factory
+
+    async def warmup(
+        self,
+        queries: Optional[npt.ArrayLike] = None,
+        *args,
+        num_queries: int = 10,
+        limit: int = 10,
+        prewarm: bool = True,
+        **kwargs,
+    ) -> WarmupResult:
+        start = time.perf_counter()
+        async with contextlib.AsyncExitStack() as stack:
+            for _ in range(self.pool_size):
+                connection = await stack.enter_async_context(self.engine.connect())
+                await connection.execute(sql_text("SELECT 1"))
+
+        prewarmed_blocks: Dict[Text, int] = {}
+        if prewarm:
+            try:
+                async with self.engine.begin() as connection:
+                    await connection.execute(
+                        sql_text("CREATE EXTENSION IF NOT EXISTS pg_prewarm")
+                    )
+                    for relation, blocks in await connection.execute(
+                        self._prewarm_stmt()
+                    ):
+                        prewarmed_blocks[relation] = blocks
+            except DBAPIError as e:
+                logger.warning(f"Skipping pg_prewarm: {str(e.orig).strip()}")
+
+        warmup_queries = self._warmup_queries(queries, num_queries)
+        for embedding in warmup_queries.tolist():
+            await self.points.query(embedding, limit=limit)
+
+        result = WarmupResult(
+            connections=self.pool_size,
+            prewarmed_blocks=prewarmed_blocks,
+            queries=len(warmup_queries),
+            elapsed=time.perf_counter() - start,
+        )
+        logger.info(f"Warmed up in {result.elapsed:.2f}s: {result}.")
+        return result
+
+    async def bulk_load(
+        self,
+        points: Optional[Sequence[PointType] | PointBatch] = None,
+        *args,
+        ids: Optional[npt.ArrayLike] = None,
+        texts: Optional[Sequence[Text]] = None,
+        models: Optional[Sequence[Text] | Text] = None,
+        embeddings: Optional[npt.ArrayLike] = None,
+        truncate: bool = False,
+        build_index: Optional[bool] = None,
+        config: Optional[IndexConfig] = None,
+        build_options: Optional[IndexBuildOptions] = None,
+        progress: Optional[IndexBuildCallback] = None,
+        chunk_size: int = 1000,
+        **kwargs,
+    ) -> BulkLoadResult:
+        build_options = build_options or self.index_build_options
+        phases: Dict[Text, float] = {}
+        start = time.perf_counter()
+        await self.tables.touch()
+        # New partitions get the index, dropped with the others below.
+        await self.tables.ensure_partitions(self._batch_models(points, models))
+        phases["touch"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index_existed = await self.index.size() is not None
+        dropped = await self.index.list()
+        if dropped:
+            await self.index.drop(indexes=dropped)
+        phases["drop index"] = time.perf_counter() - start
+        if truncate:
+            start = time.perf_counter()
+            await self.tables.truncate()
+            phases["truncate"] = time.perf_counter() - start
+
+        load = await self.points.copy_batch(
+            points,
+            ids=ids,
+            texts=texts,
+            models=models,
+            embeddings=embeddings,
+            chunk_size=chunk_size,
+        )
+        phases["copy"] = load.elapsed
+
+        start = time.perf_counter()
+        async with self.engine.begin() as connection:
+            await connection.execute(self._analyze_stmt())
+        phases["analyze"] = time.perf_counter() - start
+
+        build = None
+        start = time.perf_counter()
+        if self._rebuild_index(index_existed, build_index):
+            build = await self.index.create(
+                config=config, options=build_options, progress=progress
+            )
+        # Partial indexes and any other index `create` does not build.
+        restore = (
+            []
+            if build_index is False
+            else self._unbuilt(dropped, await self.index.list())
+        )
+        if restore:
+            await self.index.restore(restore, options=build_options, progress=progress)
+        if build is not None or restore:
+            phases["build index"] = time.perf_counter() - start
+
+        result = BulkLoadResult(
+            load=load,
+            index_existed=index_existed,
+            build=build,
+            dropped=dropped,
+            phases=phases,
+        )
+        logger.info(f"{result}.")
+        return result
+
+    async def close(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            self._session_factory = None
+
+    @classmethod
+    def _to_async_url(cls, url: Text | URL) -> URL:
+        url = make_url(url)
+        if url.drivername in ("postgresql", "postgresql+psycopg2", "postgres"):
+            url = url.set(drivername=cls.async_drivername)
+        return url
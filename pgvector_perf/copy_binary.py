@@ -0,0 +1,226 @@
+import io
+import struct
+from datetime import datetime, timezone
+from typing import Any, Dict, Generator, Iterable, Iterator, Optional, Sequence, Text
+
+import numpy as np
+import numpy.typing as npt
+
+# https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+
+POSTGRES_EPOCH = datetime(2000, 1, 1)
+
+# Fixed-size columns are written first so every row starts with a prefix that
+# can be encoded for the whole batch at once with a structured NumPy array.
+COPY_COLUMNS = ("id", "embedding", "created_at", "text", "model")
+
+
+def row_prefix_dtype(dimensions: int) -> np.dtype:
+    return np.dtype(
+        [
+            ("field_count", ">i2"),
+            ("id_size", ">i4"),
+            ("id", ">i4"),
+            ("embedding_size", ">i4"),
+            ("embedding_dim", ">u2"),
+            ("embedding_unused", ">u2"),
+            ("embedding", ">f4", (dimensions,)),
+            ("created_at_size", ">i4"),
+            ("created_at", ">i8"),
+        ]
+    )
+
+
+def vector_dtype(dimensions: int) -> np.dtype:
+    """Binary format of a pgvector `vector`, as sent by `vector_send`."""
+
+    return np.dtype(
+        [("dim", ">u2"), ("unused", ">u2"), ("values", ">f4", (dimensions,))]
+    )
+
+
+def decode_vectors(
+    buffers: Sequence[bytes | memoryview], dimensions: int
+) -> npt.NDArray[np.float32]:
+    """Decode binary `vector` values into one `(N, D)` float32 array."""
+
+    dtype = vector_dtype(dimensions)
+    data = np.frombuffer(b"".join(buffers), dtype=dtype)
+    if len(data) != len(buffers) or (data["dim"] != dimensions).any():
+        raise ValueError(f"Vectors must have {dimensions} dimensions")
+    return data["values"].astype(np.float32)
+
+
+def to_postgres_timestamp(dt: datetime) -> int:
+    """Microseconds since the PostgreSQL epoch, as stored by `timestamp`."""
+
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = dt - POSTGRES_EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def encode_rows(
+    ids: npt.ArrayLike,
+    embeddings: npt.NDArray,
+    created_at: npt.ArrayLike,
+    texts: Sequence[Text],
+    models: Sequence[Text],
+) -> bytes:
+    """Encode rows in the binary COPY format, without header or trailer.
+
+    The fixed-size part of every row (id, pgvector `vector` and timestamp) is
+    built in a single vectorized pass; only the variable-length text columns
+    are appended row by row.
+    """
+
+    if embeddings.ndim != 2:
+        raise ValueError("Embeddings must be a 2-dimensional array")
+    rows, dimensions = embeddings.shape
+    if not (len(texts) == len(models) == rows):
+        raise ValueError("Texts, models and embeddings must have the same length")
+
+    prefix = np.empty(rows, dtype=row_prefix_dtype(dimensions))
+    prefix["field_count"] = len(COPY_COLUMNS)
+    prefix["id_size"] = 4
+    prefix["id"] = ids
+    prefix["embedding_size"] = 4 + 4 * dimensions
+    prefix["embedding_dim"] = dimensions
+    prefix["embedding_unused"] = 0
+    prefix["embedding"] = embeddings
+    prefix["created_at_size"] = 8
+    prefix["created_at"] = created_at
+
+    prefix_bytes = memoryview(prefix.tobytes())
+    itemsize = prefix.dtype.itemsize
+    encoded_models: Dict[Text, bytes] = {}
+    parts = []
+    for i, (text, model) in enumerate(zip(texts, models)):
+        text_bytes = text.encode("utf-8")
+        model_bytes = encoded_models.get(model)
+        if model_bytes is None:
+            model_bytes = encoded_models[model] = _encode_text(model)
+        parts.append(prefix_bytes[i * itemsize : (i + 1) * itemsize])
+        parts.append(struct.pack(">i", len(text_bytes)))
+        parts.append(text_bytes)
+        parts.append(model_bytes)
+    return b"".join(parts)
+
+
+def iter_copy_binary(
+    ids: npt.NDArray,
+    embeddings: npt.NDArray,
+    created_at: npt.NDArray,
+    texts: Sequence[Text],
+    models: Sequence[Text],
+    *,
+    chunk_size: int = 1000,
+) -> Generator[bytes, None, None]:
+    """Yield a complete binary COPY stream in chunks of `chunk_size` rows."""
+
+    yield PGCOPY_HEADER
+    for start in range(0, len(texts), chunk_size):
+        end = start + chunk_size
+        yield encode_rows(
+            ids[start:end],
+            embeddings[start:end],
+            created_at[start:end],
+            texts[start:end],
+            models[start:end],
+        )
+    yield PGCOPY_TRAILER
+
+
+def query_row_dtype(dimensions: int) -> np.dtype:
+    return np.dtype(
+        [
+            ("field_count", ">i2"),
+            ("ord_size", ">i4"),
+            ("ord", ">i4"),
+            ("embedding_size", ">i4"),
+            ("embedding", vector_dtype(dimensions)),
+        ]
+    )
+
+
+def iter_copy_vectors(
+    embeddings: npt.NDArray, *, chunk_size: int = 1000
+) -> Generator[bytes, None, None]:
+    """Yield a binary COPY stream of `(ord, embedding)` rows, `ord` from 1.
+
+    Every row has a fixed size, so each chunk is encoded in one vectorized
+    pass.
+    """
+
+    if embeddings.ndim != 2:
+        raise ValueError("Embeddings must be a 2-dimensional array")
+    rows, dimensions = embeddings.shape
+    dtype = query_row_dtype(dimensions)
+    yield PGCOPY_HEADER
+    for start in range(0, rows, chunk_size):
+        chunk = embeddings[start : start + chunk_size]
+        data = np.empty(len(chunk), dtype=dtype)
+        data["field_count"] = 2
+        data["ord_size"] = 4
+        data["ord"] = np.arange(start + 1, start + len(chunk) + 1)
+        data["embedding_size"] = dtype["embedding"].itemsize
+        data["embedding"]["dim"] = dimensions
+        data["embedding"]["unused"] = 0
+        data["embedding"]["values"] = chunk
+        yield data.tobytes()
+    yield PGCOPY_TRAILER
+
+
+class IterableIO(io.RawIOBase):
+    """Read-only file object over an iterable of bytes, for `copy_expert`."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._buffer: Optional[memoryview] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk)
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def copy_from(dbapi_connection: Any, sql: Text, chunks: Iterable[bytes]) -> None:
+    """Stream `chunks` into a `COPY ... FROM STDIN` with psycopg2 or psycopg 3."""
+
+    cursor = dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            cursor.copy_expert(sql, IterableIO(chunks))
+        else:
+            with cursor.copy(sql) as copy:
+                for chunk in chunks:
+                    copy.write(chunk)
+    finally:
+        cursor.close()
+
+
+async def acopy_from(
+    driver_connection: Any, sql: Text, chunks: Iterable[bytes]
+) -> None:
+    """Stream `chunks` into a `COPY ... FROM STDIN` with psycopg 3 async."""
+
+    async with driver_connection.cursor() as cursor:
+        async with cursor.copy(sql) as copy:
+            for chunk in chunks:
+                await copy.write(chunk)
+
+
+def _encode_text(value: Text) -> bytes:
+    value_bytes = value.encode("utf-8")
+    return struct.pack(">i", len(value_bytes)) + value_bytes
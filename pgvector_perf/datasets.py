@@ -0,0 +1,179 @@
+import base64
+from typing import List, Optional, Text, Union
+
+import numpy as np
+import numpy.typing as npt
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pydantic import BaseModel, ConfigDict
+
+from pgvector_perf.config import logger
+
+EMBEDDING_COLUMN = "embedding"
+# Base64 float32 bytes per row, written before `embedding` was introduced.
+LEGACY_EMBEDDING_COLUMN = "embedding_base64"
+FEATURE_COLUMNS = ["id", "text", "model"]
+
+
+class FeatureDataset(BaseModel):
+    """Columnar view of a feature Parquet written by `prepare_dataset.py`."""
+
+    model_config: ConfigDict = ConfigDict(arbitrary_types_allowed=True)
+
+    ids: npt.NDArray[np.int64]
+    texts: List[Text]
+    models: List[Text]
+    embeddings: npt.NDArray[np.float32]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimensions(self) -> int:
+        return self.embeddings.shape[1]
+
+    def take(self, indices: npt.ArrayLike) -> "FeatureDataset":
+        indices = np.asarray(indices, dtype=np.int64)
+        return FeatureDataset.model_construct(
+            ids=self.ids[indices],
+            texts=[self.texts[i] for i in indices.tolist()],
+            models=[self.models[i] for i in indices.tolist()],
+            embeddings=self.embeddings[indices],
+        )
+
+
+def embedding_array(embeddings: npt.ArrayLike) -> pa.FixedSizeListArray:
+    """An `(N, D)` array as a `FixedSizeList<float32>[D]` Arrow column."""
+
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2:
+        raise ValueError("Embeddings must be an (N, D) array")
+    return pa.FixedSizeListArray.from_arrays(
+        pa.array(embeddings.reshape(-1)), embeddings.shape[1]
+    )
+
+
+def embedding_ndarray(
+    column: Union[pa.Array, pa.ChunkedArray],
+) -> npt.NDArray[np.float32]:
+    """The `(N, D)` float32 array behind a `FixedSizeList<float32>` column.
+
+    Zero-copy for a single chunk without nulls.
+    """
+
+    if isinstance(column, pa.ChunkedArray):
+        column = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+    if not pa.types.is_fixed_size_list(column.type):
+        raise ValueError(
+            f"Expected a FixedSizeList embedding column, got {column.type}"
+        )
+    if column.null_count > 0:
+        raise ValueError("Embedding column has null rows")
+    values = column.flatten().to_numpy(zero_copy_only=False)
+    return values.astype(np.float32, copy=False).reshape(len(column), -1)
+
+
+def decode_base64_embeddings(
+    column: Union[pa.Array, pa.ChunkedArray],
+) -> npt.NDArray[np.float32]:
+    """Decode a legacy `embedding_base64` column into an `(N, D)` array."""
+
+    rows = column.to_pylist()
+    if not rows:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.frombuffer(
+        b"".join(map(base64.b64decode, rows)), dtype=np.float32
+    ).reshape(len(rows), -1)
+
+
+def read_feature_dataset(
+    path: Text, *, limit: Optional[int] = None, batch_size: int = 10000
+) -> FeatureDataset:
+    """Read a feature Parquet, with embeddings as one `(N, D)` float32 array.
+
+    Files with the legacy `embedding_base64` column are still read, by
+    decoding every row; `convert_feature_dataset` rewrites them.
+    """
+
+    parquet_file = pq.ParquetFile(path)
+    names = parquet_file.schema_arrow.names
+    legacy = EMBEDDING_COLUMN not in names and LEGACY_EMBEDDING_COLUMN in names
+    columns = FEATURE_COLUMNS + [
+        LEGACY_EMBEDDING_COLUMN if legacy else EMBEDDING_COLUMN
+    ]
+    if legacy:
+        logger.warning(
+            f"'{path}' stores base64 embeddings, "
+            + "convert it with `pgvector-perf convert` for faster reads"
+        )
+
+    if limit is None:
+        table = parquet_file.read(columns=columns)
+    else:
+        record_batches: List[pa.RecordBatch] = []
+        rows = 0
+        for record_batch in parquet_file.iter_batches(
+            batch_size=batch_size, columns=columns
+        ):
+            record_batches.append(record_batch)
+            rows += record_batch.num_rows
+            if rows >= limit:
+                break
+        table = pa.Table.from_batches(
+            record_batches,
+            schema=pa.schema([parquet_file.schema_arrow.field(c) for c in columns]),
+        ).slice(0, limit)
+
+    if table.num_rows == 0:
+        raise ValueError(f"No rows found in feature dataset '{path}'")
+    return FeatureDataset.model_construct(
+        ids=table.column("id").to_numpy().astype(np.int64, copy=False),
+        texts=table.column("text").to_pylist(),
+        models=table.column("model").to_pylist(),
+        embeddings=(
+            decode_base64_embeddings(table.column(LEGACY_EMBEDDING_COLUMN))
+            if legacy
+            else embedding_ndarray(table.column(EMBEDDING_COLUMN))
+        ),
+    )
+
+
+def convert_feature_dataset(
+    path: Text,
+    output_path: Text,
+    *,
+    batch_size: int = 10000,
+    compression: Text = "snappy",
+) -> int:
+    """Rewrite a legacy feature Parquet with a `FixedSizeList` embedding column.
+
+    Every other column is kept as is. Returns the number of rows written.
+    """
+
+    parquet_file = pq.ParquetFile(path)
+    if LEGACY_EMBEDDING_COLUMN not in parquet_file.schema_arrow.names:
+        raise ValueError(f"'{path}' has no '{LEGACY_EMBEDDING_COLUMN}' column")
+
+    writer = None
+    rows = 0
+    try:
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+            table = pa.Table.from_batches([record_batch])
+            index = table.schema.get_field_index(LEGACY_EMBEDDING_COLUMN)
+            table = table.set_column(
+                index,
+                EMBEDDING_COLUMN,
+                embedding_array(
+                    decode_base64_embeddings(table.column(LEGACY_EMBEDDING_COLUMN))
+                ),
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    output_path, table.schema, compression=compression
+                )
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
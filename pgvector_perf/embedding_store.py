@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Sequence, Text, Tuple, Union
+
+import numpy as np
+import numpy.typing as npt
+
+
+class EmbeddingStore:
+    """Append-only on-disk store of text embeddings.
+
+    Embeddings live in a memory-mapped `(capacity, dimensions)` float32 file
+    that grows by doubling. Texts are keyed by a 128-bit blake2b hash mapped
+    to their row through sorted key and row arrays, so batch lookups are one
+    `np.searchsorted`. Texts themselves are not stored, so two texts with the
+    same hash would share an embedding; at 128 bits that is negligible. Rows
+    are appended in insertion order, so a batch that was inserted together
+    comes back as a single slice of the matrix.
+
+    New keys go to a small sorted delta index that is merged into the main
+    index once it grows past `merge_threshold`. Call `flush()` (or use the
+    store as a context manager) to persist the index and row count.
+    """
+
+    embeddings_file = "embeddings.f32"
+    keys_file = "keys.npy"
+    rows_file = "rows.npy"
+    meta_file = "meta.json"
+    key_dtype = np.dtype("S16")
+
+    def __init__(
+        self,
+        path: Union[Text, Path],
+        dimensions: int,
+        *,
+        initial_capacity: int = 65536,
+        merge_threshold: int = 65536,
+    ):
+        self.path = Path(path)
+        self.dimensions = dimensions
+        self.merge_threshold = merge_threshold
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        meta_path = self.path / self.meta_file
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if meta["dimensions"] != dimensions:
+                raise ValueError(
+                    f"Store at '{self.path}' holds {meta['dimensions']}-dimensional "
+                    + f"embeddings, not {dimensions}"
+                )
+            self._count = int(meta["count"])
+            self._keys = np.load(self.path / self.keys_file)
+            self._rows = np.load(self.path / self.rows_file)
+            if self._keys.dtype != self.key_dtype:
+                raise ValueError(
+                    f"Store at '{self.path}' is keyed by 64-bit text hashes; "
+                    + "rebuild it"
+                )
+        else:
+            self._count = 0
+            self._keys = np.empty(0, dtype=self.key_dtype)
+            self._rows = np.empty(0, dtype=np.int64)
+        self._delta_keys = np.empty(0, dtype=self.key_dtype)
+        self._delta_rows = np.empty(0, dtype=np.int64)
+
+        embeddings_path = self.path / self.embeddings_file
+        if not embeddings_path.exists():
+            self._resize(embeddings_path, max(initial_capacity, 1))
+        self._embeddings = self._open(embeddings_path)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, text: Text) -> bool:
+        return bool(self.lookup([text])[0] >= 0)
+
+    def __enter__(self) -> "EmbeddingStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def capacity(self) -> int:
+        return len(self._embeddings)
+
+    @classmethod
+    def hash_texts(cls, texts: Sequence[Text]) -> npt.NDArray[np.bytes_]:
+        """128-bit blake2b digest of each text, as `S16` keys."""
+
+        digests = b"".join(
+            hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+            for text in texts
+        )
+        return np.frombuffer(digests, dtype=cls.key_dtype).copy()
+
+    def lookup(self, texts: Sequence[Text]) -> npt.NDArray[np.int64]:
+        """Row of each text in the embedding matrix, `-1` if not stored."""
+
+        return self._lookup_keys(self.hash_texts(texts))
+
+    def get(
+        self, texts: Sequence[Text]
+    ) -> Tuple[npt.NDArray[np.float32], npt.NDArray[np.bool_]]:
+        """Embeddings of `texts` and a mask of which ones were stored.
+
+        Rows of missing texts are zero. When every text is stored in
+        consecutive rows the embeddings are a read-only view of the
+        memory-mapped matrix rather than a copy.
+        """
+
+        rows = self.lookup(texts)
+        found = rows >= 0
+        if (
+            len(rows) > 0
+            and found.all()
+            and rows[-1] - rows[0] == len(rows) - 1
+            and (len(rows) == 1 or bool((np.diff(rows) == 1).all()))
+        ):
+            embeddings = self._embeddings[rows[0] : rows[-1] + 1].view(np.ndarray)
+            embeddings.flags.writeable = False
+            return embeddings, found
+        embeddings = np.zeros((len(rows), self.dimensions), dtype=np.float32)
+        embeddings[found] = self._embeddings[rows[found]]
+        return embeddings, found
+
+    def put(
+        self, texts: Sequence[Text], embeddings: npt.ArrayLike
+    ) -> npt.NDArray[np.int64]:
+        """Append the embeddings of texts not yet stored and return all rows.
+
+        Texts already in the store, and repeats within the batch after their
+        first occurrence, keep their existing embedding.
+        """
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.shape != (len(texts), self.dimensions):
+            raise ValueError(
+                f"Expected embeddings of shape ({len(texts)}, {self.dimensions}), "
+                + f"got {embeddings.shape}"
+            )
+        keys = self.hash_texts(texts)
+        _, first = np.unique(keys, return_index=True)
+        first = np.sort(first)
+        new = first[self._lookup_keys(keys[first]) < 0]
+
+        if len(new) > 0:
+            start, stop = self._count, self._count + len(new)
+            if stop > self.capacity:
+                self._embeddings.flush()
+                capacity = self.capacity
+                while capacity < stop:
+                    capacity *= 2
+                del self._embeddings
+                self._resize(self.path / self.embeddings_file, capacity)
+                self._embeddings = self._open(self.path / self.embeddings_file)
+            self._embeddings[start:stop] = embeddings[new]
+            self._count = stop
+
+            delta_keys = np.concatenate([self._delta_keys, keys[new]])
+            delta_rows = np.concatenate(
+                [self._delta_rows, np.arange(start, stop, dtype=np.int64)]
+            )
+            order = np.argsort(delta_keys, kind="stable")
+            self._delta_keys, self._delta_rows = delta_keys[order], delta_rows[order]
+            if len(self._delta_keys) > self.merge_threshold:
+                self._merge()
+
+        return self._lookup_keys(keys)
+
+    def flush(self) -> None:
+        self._merge()
+        self._embeddings.flush()
+        self._save(self.keys_file, self._keys)
+        self._save(self.rows_file, self._rows)
+        meta = {"dimensions": self.dimensions, "count": self._count}
+        tmp_path = self.path / f"{self.meta_file}.tmp"
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, self.path / self.meta_file)
+
+    def close(self) -> None:
+        self.flush()
+        del self._embeddings
+
+    def _lookup_keys(self, keys: npt.NDArray[np.bytes_]) -> npt.NDArray[np.int64]:
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        for index_keys, index_rows in (
+            (self._keys, self._rows),
+            (self._delta_keys, self._delta_rows),
+        ):
+            if len(index_keys) == 0:
+                continue
+            positions = np.searchsorted(index_keys, keys)
+            positions[positions == len(index_keys)] = 0
+            hit = index_keys[positions] == keys
+            rows[hit] = index_rows[positions[hit]]
+        return rows
+
+    def _merge(self) -> None:
+        if len(self._delta_keys) == 0:
+            return
+        keys = np.concatenate([self._keys, self._delta_keys])
+        rows = np.concatenate([self._rows, self._delta_rows])
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._rows = keys[order], rows[order]
+        self._delta_keys = np.empty(0, dtype=self.key_dtype)
+        self._delta_rows = np.empty(0, dtype=np.int64)
+
+    def _open(self, embeddings_path: Path) -> np.memmap:
+        row_bytes = self.dimensions * np.dtype(np.float32).itemsize
+        capacity = os.path.getsize(embeddings_path) // row_bytes
+        return np.memmap(
+            embeddings_path,
+            dtype=np.float32,
+            mode="r+",
+            shape=(capacity, self.dimensions),
+        )
+
+    def _resize(self, embeddings_path: Path, capacity: int) -> None:
+        with open(embeddings_path, "ab") as f:
+            f.truncate(capacity * self.dimensions * np.dtype(np.float32).itemsize)
+
+    def _save(self, name: Text, array: npt.NDArray) -> None:
+        tmp_path = self.path / f"{name}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, self.path / name)
@@ -0,0 +1,234 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal, Optional, Text, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel, ConfigDict
+
+from pgvector_perf.config import logger
+
+# Only `l2` is supported, the metric of `embedding <-> q` in `Points.query`.
+Metric = Literal["l2"]
+
+default_cache_dir = "data/ground_truth"
+
+_worker_corpus: Optional[np.ndarray] = None
+_worker_queries: Optional[np.ndarray] = None
+
+
+class GroundTruth(BaseModel):
+    """Exact neighbors as row indices into the corpus, sorted by distance."""
+
+    model_config: ConfigDict = ConfigDict(arbitrary_types_allowed=True)
+
+    neighbors: npt.NDArray[np.int64]
+    distances: npt.NDArray[np.float32]
+
+    @property
+    def k(self) -> int:
+        return self.neighbors.shape[1]
+
+
+def save_corpus(path: Text, embeddings: npt.ArrayLike) -> Text:
+    """Write corpus embeddings as a float32 `.npy` file for memory mapping."""
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.save(path, np.asarray(embeddings, dtype=np.float32))
+    return path
+
+
+def dataset_hash(corpus_path: Text, *, samples: int = 16, sample_size: int = 65536):
+    """Fingerprint a corpus file without reading all of it.
+
+    Hashes the array header, file size, modification time and `samples`
+    evenly spaced chunks of the data.
+    """
+
+    corpus = np.load(corpus_path, mmap_mode="r")
+    stat = os.stat(corpus_path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{corpus.shape}:{corpus.dtype}:{stat.st_size}".encode())
+    digest.update(f"{stat.st_mtime_ns}".encode())
+    with open(corpus_path, "rb") as f:
+        for offset in np.linspace(0, max(0, stat.st_size - sample_size), samples):
+            f.seek(int(offset))
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+
+def cache_key(
+    corpus_path: Text,
+    queries: npt.NDArray[np.float32],
+    k: int,
+    metric: Metric,
+    candidates: Optional[int] = None,
+) -> Text:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(dataset_hash(corpus_path).encode())
+    digest.update(f"{metric}:{k}:{candidates or k}:{queries.shape}".encode())
+    digest.update(np.ascontiguousarray(queries).tobytes())
+    return digest.hexdigest()
+
+
+def compute_ground_truth(
+    corpus_path: Text,
+    queries: npt.ArrayLike,
+    k: int,
+    *,
+    metric: Metric = "l2",
+    candidates: Optional[int] = None,
+    corpus_block_size: int = 65536,
+    query_block_size: int = 1024,
+    processes: Optional[int] = None,
+    cache_dir: Optional[Text] = default_cache_dir,
+) -> GroundTruth:
+    """Exact top-k of `queries` over the memory-mapped corpus at `corpus_path`.
+
+    The corpus is split into blocks of `corpus_block_size` rows searched by a
+    pool of `processes` workers (`1` runs in-process); each worker keeps a
+    partial top-k per query that is merged here. Results are cached under
+    `cache_dir` by corpus fingerprint, queries, `k` and `metric`.
+
+    Blocks are searched in float32, whose rounding can swap neighbors with
+    (nearly) equal distances. So `candidates` per query (`2 * k` by default)
+    are kept and re-ranked by exact float64 distance, ties going to the
+    lower row, before the top `k` are taken.
+    """
+
+    if metric != "l2":
+        raise ValueError(f"Unsupported metric: {metric}")
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    corpus = np.load(corpus_path, mmap_mode="r")
+    if corpus.ndim != 2 or queries.ndim != 2 or corpus.shape[1] != queries.shape[1]:
+        raise ValueError("Corpus and queries must be 2D arrays of equal width")
+    if not 0 < k <= len(corpus):
+        raise ValueError(f"k must be between 1 and {len(corpus)}")
+    candidates = min(len(corpus), max(k, candidates or 2 * k))
+
+    neighbors_path = distances_path = None
+    if cache_dir is not None:
+        key = cache_key(corpus_path, queries, k, metric, candidates)
+        neighbors_path = os.path.join(cache_dir, f"{key}.neighbors.npy")
+        distances_path = os.path.join(cache_dir, f"{key}.distances.npy")
+        if os.path.exists(neighbors_path) and os.path.exists(distances_path):
+            logger.debug(f"Ground truth cache hit: '{neighbors_path}'.")
+            return GroundTruth(
+                neighbors=np.load(neighbors_path), distances=np.load(distances_path)
+            )
+
+    blocks = [
+        (start, min(start + corpus_block_size, len(corpus)))
+        for start in range(0, len(corpus), corpus_block_size)
+    ]
+    best_ids = np.full((len(queries), 0), -1, dtype=np.int64)
+    best_distances = np.empty((len(queries), 0), dtype=np.float32)
+
+    def _merge(block_result: Tuple[npt.NDArray, npt.NDArray]):
+        nonlocal best_ids, best_distances
+        best_ids, best_distances = _top_k(
+            np.concatenate([best_ids, block_result[0]], axis=1),
+            np.concatenate([best_distances, block_result[1]], axis=1),
+            candidates,
+        )
+
+    if processes == 1:
+        _init_worker(corpus_path, queries)
+        for block in blocks:
+            _merge(_search_block(block, candidates, query_block_size))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(corpus_path, queries),
+        ) as executor:
+            futures = [
+                executor.submit(_search_block, block, candidates, query_block_size)
+                for block in blocks
+            ]
+            for future in futures:
+                _merge(future.result())
+
+    ground_truth = _exact_rerank(corpus, queries, best_ids, k=k)
+    if neighbors_path is not None and distances_path is not None:
+        os.makedirs(os.path.dirname(neighbors_path), exist_ok=True)
+        np.save(neighbors_path, ground_truth.neighbors)
+        np.save(distances_path, ground_truth.distances)
+        logger.debug(f"Ground truth cached as '{neighbors_path}'.")
+    return ground_truth
+
+
+def _init_worker(corpus_path: Text, queries: np.ndarray):
+    global _worker_corpus, _worker_queries
+    _worker_corpus = np.load(corpus_path, mmap_mode="r")
+    _worker_queries = queries
+
+
+def _search_block(
+    block: Tuple[int, int], k: int, query_block_size: int
+) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.float32]]:
+    assert _worker_corpus is not None and _worker_queries is not None
+    start, stop = block
+    corpus = np.asarray(_worker_corpus[start:stop], dtype=np.float32)
+    corpus_norms = np.einsum("ij,ij->i", corpus, corpus)
+    block_k = min(k, stop - start)
+
+    ids = np.empty((len(_worker_queries), block_k), dtype=np.int64)
+    distances = np.empty((len(_worker_queries), block_k), dtype=np.float32)
+    for q_start in range(0, len(_worker_queries), query_block_size):
+        q_stop = q_start + query_block_size
+        # The query norm is constant per row and does not change the ranking.
+        block_distances = corpus_norms[None, :] - 2 * (
+            _worker_queries[q_start:q_stop] @ corpus.T
+        )
+        top = np.argpartition(block_distances, block_k - 1, axis=1)[:, :block_k]
+        ids[q_start:q_stop] = top + start
+        distances[q_start:q_stop] = np.take_along_axis(block_distances, top, axis=1)
+    return ids, distances
+
+
+def _top_k(
+    ids: npt.NDArray[np.int64], distances: npt.NDArray[np.float32], k: int
+) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.float32]]:
+    if ids.shape[1] <= k:
+        return ids, distances
+    top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    return (
+        np.take_along_axis(ids, top, axis=1),
+        np.take_along_axis(distances, top, axis=1),
+    )
+
+
+def _exact_rerank(
+    corpus: np.ndarray,
+    queries: npt.NDArray[np.float32],
+    ids: npt.NDArray[np.int64],
+    *,
+    k: int,
+    max_elements: int = 1 << 24,
+) -> GroundTruth:
+    """Recompute the candidates' l2 distances exactly, keep the nearest `k`.
+
+    Equal distances are ordered by row, so the result does not depend on
+    how the candidates were found.
+    """
+
+    distances = np.empty(ids.shape, dtype=np.float64)
+    step = max(1, max_elements // (ids.shape[1] * corpus.shape[1]))
+    for start in range(0, len(ids), step):
+        block_ids = ids[start : start + step]
+        flat_ids = block_ids.ravel()
+        # Read the memory map in ascending row order.
+        order = np.argsort(flat_ids, kind="stable")
+        candidates = np.empty((len(flat_ids), corpus.shape[1]), dtype=np.float64)
+        candidates[order] = corpus[flat_ids[order]]
+        candidates = candidates.reshape(block_ids.shape + (corpus.shape[1],))
+        distances[start : start + step] = np.linalg.norm(
+            candidates - queries[start : start + step, None, :], axis=2
+        )
+    order = np.lexsort((ids, distances), axis=1)[:, :k]
+    return GroundTruth(
+        neighbors=np.take_along_axis(ids, order, axis=1),
+        distances=np.take_along_axis(distances, order, axis=1).astype(np.float32),
+    )
@@ -0,0 +1,330 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Text,
+)
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+from rich.table import Table
+
+from pgvector_perf.config import logger
+from pgvector_perf.embedding_store import EmbeddingStore
+from pgvector_perf.schemas import PointBatch
+
+if TYPE_CHECKING:
+    from pgvector_perf.client import PgvectorPerf
+
+STAGES = ("read", "dedupe", "embed", "load")
+
+# Marks the end of the stream on every queue.
+_END = None
+
+
+class IngestCheckpoint(BaseModel):
+    """Last source batch loaded, and the id of the first unique text."""
+
+    batch: int = -1
+    first_id: int = 1
+    rows: int = 0
+
+    @classmethod
+    def load(cls, path: Text) -> Optional["IngestCheckpoint"]:
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return cls.model_validate(json.load(f))
+
+    def save(self, path: Text) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.model_dump_json())
+        os.replace(tmp_path, path)
+
+
+class StageStats(BaseModel):
+    """Work done by one stage; `queue_*` describe the queue feeding it."""
+
+    stage: Text
+    batches: int = 0
+    items: int = 0
+    busy_seconds: float = 0.0
+    items_per_second: float = 0.0
+    queue_capacity: Optional[int] = None
+    queue_mean: Optional[float] = None
+    queue_max: Optional[int] = None
+
+
+class IngestResult(BaseModel):
+    rows: int
+    duplicates: int
+    resumed_from: Optional[int] = None
+    elapsed: float
+    stages: List[StageStats]
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __rich__(self):
+        table = Table(title="pgvector-perf ingest")
+        table.add_column("stage", style="yellow")
+        for column in ("batches", "items", "busy s", "items/s", "queue mean/max"):
+            table.add_column(column, style="cyan", justify="right")
+        for stats in self.stages:
+            table.add_row(
+                stats.stage,
+                f"{stats.batches:,}",
+                f"{stats.items:,}",
+                f"{stats.busy_seconds:.1f}",
+                f"{stats.items_per_second:,.0f}",
+                (
+                    ""
+                    if stats.queue_max is None
+                    else f"{stats.queue_mean:.1f}/{stats.queue_max}"
+                    + f" of {stats.queue_capacity}"
+                ),
+            )
+        table.caption = (
+            f"{self.rows:,} rows in {self.elapsed:.1f}s "
+            + f"({self.rows_per_second:,.0f} rows/s), "
+            + f"{self.duplicates:,} duplicates skipped"
+        )
+        if self.resumed_from is not None:
+            table.caption += f", resumed after batch {self.resumed_from}"
+        return table
+
+
+def run_ingest(
+    client: "PgvectorPerf",
+    source: Iterable[Sequence[Text]],
+    embed: Callable[[List[Text]], npt.ArrayLike],
+    *,
+    model: Text = "default",
+    first_id: int = 1,
+    queue_size: int = 4,
+    embed_workers: int = 1,
+    checkpoint_path: Optional[Text] = None,
+    sample_interval: float = 0.1,
+) -> IngestResult:
+    """Stream batches of texts from `source` into the points table.
+
+    Reading, dedupe, embedding (`embed_workers` threads calling `embed`)
+    and `Points.copy_batch` run concurrently, connected by queues holding at
+    most `queue_size` batches, so a slow stage holds back the ones before it
+    instead of buffering the whole dataset.
+
+    Texts are deduped by their 128-bit hash (`EmbeddingStore.hash_texts`).
+    Unique texts get consecutive ids from `first_id` in source order. With
+    `checkpoint_path`, the last loaded batch is recorded after each commit;
+    a rerun over the same source replays reading and dedupe, skips batches
+    already loaded and continues with the same ids.
+    """
+
+    checkpoint = (
+        IngestCheckpoint.load(checkpoint_path) if checkpoint_path else None
+    ) or IngestCheckpoint(first_id=first_id)
+    loaded_batch = checkpoint.batch
+    resumed_from = loaded_batch if loaded_batch >= 0 else None
+    if resumed_from is not None:
+        logger.info(
+            f"Resuming ingest after batch {checkpoint.batch} "
+            + f"({checkpoint.rows:,} rows loaded)."
+        )
+
+    queues: Dict[Text, "queue.Queue[Any]"] = {
+        stage: queue.Queue(maxsize=queue_size) for stage in STAGES[1:]
+    }
+    stats = {stage: StageStats(stage=stage) for stage in STAGES}
+    for stage, q in queues.items():
+        stats[stage].queue_capacity = q.maxsize
+    depths: Dict[Text, List[int]] = {stage: [] for stage in queues}
+    stop = threading.Event()
+    stats_lock = threading.Lock()
+    errors: List[BaseException] = []
+    duplicates = 0
+    rows = 0
+
+    def _put(stage: Text, item: Any) -> None:
+        while not stop.is_set():
+            try:
+                queues[stage].put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _get(stage: Text) -> Any:
+        while not stop.is_set():
+            try:
+                return queues[stage].get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _END
+
+    def _record(stage: Text, items: int, start: float) -> None:
+        seconds = time.perf_counter() - start
+        with stats_lock:
+            stats[stage].batches += 1
+            stats[stage].items += items
+            stats[stage].busy_seconds += seconds
+
+    def _read():
+        iterator = iter(source)
+        batch = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            texts = next(iterator, _END)
+            if texts is _END:
+                break
+            texts = list(texts)
+            _record("read", len(texts), start)
+            _put("dedupe", (batch, texts))
+            batch += 1
+        _put("dedupe", _END)
+
+    def _dedupe():
+        nonlocal duplicates
+        seen: Set[bytes] = set()
+        next_id = checkpoint.first_id
+        while (item := _get("dedupe")) is not _END:
+            batch, texts = item
+            start = time.perf_counter()
+            keep = []
+            for i, key in enumerate(EmbeddingStore.hash_texts(texts).tolist()):
+                if key not in seen:
+                    seen.add(key)
+                    keep.append(i)
+            ids = np.arange(next_id, next_id + len(keep), dtype=np.int64)
+            next_id += len(keep)
+            _record("dedupe", len(texts), start)
+            if batch <= loaded_batch:
+                continue
+            duplicates += len(texts) - len(keep)
+            _put(
+                "embed",
+                (
+                    batch,
+                    PointBatch.model_construct(ids=ids, texts=[texts[i] for i in keep]),
+                ),
+            )
+        for _ in range(embed_workers):
+            _put("embed", _END)
+
+    def _embed():
+        while (item := _get("embed")) is not _END:
+            batch, points = item
+            start = time.perf_counter()
+            if len(points) > 0:
+                points.embeddings = np.asarray(embed(points.texts), dtype=np.float32)
+            _record("embed", len(points), start)
+            _put("load", (batch, points))
+        _put("load", _END)
+
+    def _load():
+        nonlocal rows
+        pending: Dict[int, PointBatch] = {}
+        finished = 0
+        first = True
+        while finished < embed_workers:
+            item = _get("load")
+            if item is _END:
+                finished += 1
+                if stop.is_set():
+                    return
+                continue
+            pending[item[0]] = item[1]
+            # Commit in source order so the checkpoint covers a prefix.
+            while checkpoint.batch + 1 in pending:
+                batch = checkpoint.batch + 1
+                points = pending.pop(batch)
+                start = time.perf_counter()
+                if len(points) > 0 and not (
+                    # The last run may have committed it without checkpointing.
+                    first
+                    and resumed_from is not None
+                    and client.points.retrieve(int(points.ids[0]), not_found_ok=True)
+                ):
+                    client.points.copy_batch(
+                        ids=points.ids,
+                        texts=points.texts,
+                        models=model,
+                        embeddings=points.embeddings,
+                    )
+                    rows += len(points)
+                first = False
+                checkpoint.batch = batch
+                checkpoint.rows += len(points)
+                if checkpoint_path:
+                    checkpoint.save(checkpoint_path)
+                _record("load", len(points), start)
+
+    def _run(target: Callable[[], None]) -> Callable[[], None]:
+        def _target():
+            try:
+                target()
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        return _target
+
+    def _sample():
+        while not stop.wait(sample_interval):
+            for stage, q in queues.items():
+                depths[stage].append(q.qsize())
+
+    threads = [
+        threading.Thread(target=_run(_read), name="ingest-read"),
+        threading.Thread(target=_run(_dedupe), name="ingest-dedupe"),
+        *(
+            threading.Thread(target=_run(_embed), name=f"ingest-embed-{i}")
+            for i in range(embed_workers)
+        ),
+        threading.Thread(target=_run(_load), name="ingest-load"),
+    ]
+    sampler = threading.Thread(target=_sample, name="ingest-sample", daemon=True)
+    start = time.perf_counter()
+    sampler.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+    if errors:
+        raise errors[0]
+
+    for stage, samples in depths.items():
+        if samples:
+            stats[stage].queue_mean = float(np.mean(samples))
+            stats[stage].queue_max = int(np.max(samples))
+    for stage_stats in stats.values():
+        stage_stats.items_per_second = (
+            stage_stats.items / elapsed if elapsed > 0 else 0.0
+        )
+    result = IngestResult(
+        rows=rows,
+        duplicates=duplicates,
+        resumed_from=resumed_from,
+        elapsed=elapsed,
+        stages=list(stats.values()),
+    )
+    logger.info(
+        f"Ingested {result.rows:,} rows in {elapsed:.1f}s "
+        + f"({result.rows_per_second:,.0f} rows/s)."
+    )
+    return result
@@ -0,0 +1,415 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Text, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel, Field
+from rich.console import Group
+from rich.table import Table
+
+from pgvector_perf.benchmark import LatencySummary
+from pgvector_perf.cache import CacheStats
+from pgvector_perf.config import logger
+from pgvector_perf.plans import PlanSamplerStats, QueryPlan
+
+if TYPE_CHECKING:
+    from pgvector_perf.client import PgvectorPerf
+
+Operation = Literal["query", "create"]
+
+# Per worker: (operation, second) -> histogram and error count.
+WorkerStats = Dict[Tuple[Text, int], Tuple["LatencyHistogram", int]]
+
+# Query cache and plan sampler stats of a worker process's client.
+WorkerClientStats = Tuple[
+    Optional[CacheStats], Optional[Tuple[PlanSamplerStats, List[QueryPlan]]]
+]
+
+
+class LatencyHistogram:
+    """Latency histogram with log-spaced buckets, in the spirit of HdrHistogram.
+
+    Every bucket spans `relative_error` of its lower bound, so percentiles
+    keep that relative precision from `min_seconds` up to `max_seconds` in a
+    fixed amount of memory. Histograms with the same bounds merge by adding
+    counts.
+    """
+
+    def __init__(
+        self,
+        *,
+        relative_error: float = 0.01,
+        min_seconds: float = 1e-6,
+        max_seconds: float = 3600.0,
+    ):
+        self.relative_error = relative_error
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self._log_base = math.log1p(relative_error)
+        self.counts = np.zeros(self._bucket(max_seconds) + 1, dtype=np.int64)
+        self.total_seconds = 0.0
+        self.max_recorded = 0.0
+
+    def __len__(self) -> int:
+        return int(self.counts.sum())
+
+    def record(self, seconds: float) -> None:
+        self.counts[self._bucket(seconds)] += 1
+        self.total_seconds += seconds
+        self.max_recorded = max(self.max_recorded, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        if len(other.counts) != len(self.counts):
+            raise ValueError("Cannot merge histograms with different bounds")
+        self.counts += other.counts
+        self.total_seconds += other.total_seconds
+        self.max_recorded = max(self.max_recorded, other.max_recorded)
+        return self
+
+    def percentile(self, q: float) -> float:
+        """Upper bound in seconds of the bucket holding the `q`th percentile."""
+
+        count = len(self)
+        if count == 0:
+            raise ValueError("Histogram is empty")
+        rank = max(1, math.ceil(q / 100 * count))
+        bucket = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self._upper_bound(bucket), self.max_recorded)
+
+    def summary(self) -> LatencySummary:
+        return LatencySummary(
+            mean_ms=self.total_seconds / len(self) * 1000,
+            p50_ms=self.percentile(50) * 1000,
+            p95_ms=self.percentile(95) * 1000,
+            p99_ms=self.percentile(99) * 1000,
+            p999_ms=self.percentile(99.9) * 1000,
+            max_ms=self.max_recorded * 1000,
+        )
+
+    def _bucket(self, seconds: float) -> int:
+        seconds = min(max(seconds, self.min_seconds), self.max_seconds)
+        return int(math.log(seconds / self.min_seconds) / self._log_base)
+
+    def _upper_bound(self, bucket: int) -> float:
+        return self.min_seconds * math.exp((bucket + 1) * self._log_base)
+
+
+class LoadConfig(BaseModel):
+    """Load generation settings.
+
+    `closed` mode runs `concurrency` workers that each issue the next request
+    as soon as the previous one returns. `open` mode issues requests at
+    `qps` with Poisson arrivals, split evenly over the workers, and measures
+    latency from each request's scheduled start, so time spent waiting for a
+    busy worker counts (no coordinated omission). `write_ratio` is the share
+    of requests that are `Points.create` instead of `Points.query`.
+    """
+
+    mode: Literal["closed", "open"] = "closed"
+    executor: Literal["thread", "process"] = "thread"
+    concurrency: int = Field(default=8, ge=1)
+    qps: Optional[float] = Field(default=None, gt=0)
+    duration: float = Field(default=30.0, gt=0)
+    warmup: float = Field(default=0.0, ge=0)
+    k: int = Field(default=10, ge=1)
+    write_ratio: float = Field(default=0.0, ge=0, le=1)
+    seed: int = 0
+
+
+class LoadStats(BaseModel):
+    operation: Text
+    second: Optional[int] = None
+    count: int
+    errors: int
+    latency: Optional[LatencySummary] = None
+
+
+class LoadResult(BaseModel):
+    config: LoadConfig
+    elapsed: float
+    throughput: float
+    totals: List[LoadStats]
+    intervals: List[LoadStats]
+    cache: Optional[CacheStats] = None
+
+    def __rich__(self):
+        totals = Table(
+            title=f"pgvector-perf load: {self.config.mode} loop, "
+            + f"{self.config.concurrency} {self.config.executor} workers"
+        )
+        totals.add_column("operation", style="yellow")
+        for column in ("ops", "errors", "mean ms", "p50 ms", "p99 ms", "max ms"):
+            totals.add_column(column, style="cyan", justify="right")
+        for stats in self.totals:
+            totals.add_row(stats.operation, *self._stats_cells(stats))
+        totals.caption = f"{self.throughput:,.1f} ops/s over {self.elapsed:.1f}s"
+        if self.cache is not None:
+            totals.caption += (
+                f", cache hit rate {self.cache.hit_rate:.1%} "
+                + f"({self.cache.hits:,} hits, {self.cache.misses:,} misses)"
+            )
+
+        intervals = Table(title="per second")
+        intervals.add_column("second", style="yellow", justify="right")
+        intervals.add_column("operation", style="yellow")
+        for column in ("ops", "errors", "mean ms", "p50 ms", "p99 ms", "max ms"):
+            intervals.add_column(column, style="cyan", justify="right")
+        for stats in self.intervals:
+            intervals.add_row(
+                f"{stats.second}", stats.operation, *self._stats_cells(stats)
+            )
+        return Group(totals, intervals)
+
+    @staticmethod
+    def _stats_cells(stats: LoadStats) -> List[Text]:
+        if stats.latency is None:
+            return [f"{stats.count:,}", f"{stats.errors:,}", "", "", "", ""]
+        return [
+            f"{stats.count:,}",
+            f"{stats.errors:,}",
+            f"{stats.latency.mean_ms:.3f}",
+            f"{stats.latency.p50_ms:.3f}",
+            f"{stats.latency.p99_ms:.3f}",
+            f"{stats.latency.max_ms:.3f}",
+        ]
+
+
+def run_load(
+    client: "PgvectorPerf",
+    queries: npt.ArrayLike,
+    config: Optional[LoadConfig] = None,
+    *,
+    model: Text = "load",
+) -> LoadResult:
+    """Drive `Points.query` (and `Points.create`) under concurrent load.
+
+    `queries` is an `(N, D)` array cycled through by the workers; created
+    points reuse these embeddings under `model`. Thread workers share the
+    client's engine, whose pool should hold at least `concurrency`
+    connections; process workers each open a client with the same options,
+    whose query cache and plan sampler start empty. The stats of the query
+    cache, and of the plan sampler in process workers, are added up into the
+    result and the client's `plan_sampler`; the metrics of an
+    `instrumentation` stay in the worker processes. A process worker's cache
+    is only invalidated by its own writes, so it cannot be combined with a
+    `write_ratio`.
+    """
+
+    config = config or LoadConfig()
+    if config.mode == "open" and config.qps is None:
+        raise ValueError("Open-loop load needs a target qps")
+    if (
+        config.executor == "process"
+        and config.write_ratio > 0
+        and client.query_cache is not None
+    ):
+        raise ValueError(
+            "Process workers cannot share a query cache with a write_ratio"
+        )
+    queries = np.asarray(queries, dtype=np.float32)
+    if queries.ndim != 2 or len(queries) == 0:
+        raise ValueError("Queries must be a non-empty (N, D) array")
+
+    start_at = time.time() + 0.5
+    worker_args = [
+        (worker, config, queries, model, start_at)
+        for worker in range(config.concurrency)
+    ]
+    logger.info(
+        f"Running {config.mode}-loop load with {config.concurrency} "
+        + f"{config.executor} workers for {config.duration:.0f}s."
+    )
+    if config.executor == "thread":
+        with ThreadPoolExecutor(max_workers=config.concurrency) as executor:
+            futures = [
+                executor.submit(_run_worker, client, *args) for args in worker_args
+            ]
+            worker_stats = [future.result() for future in futures]
+    else:
+        with ProcessPoolExecutor(max_workers=config.concurrency) as executor:
+            futures = [
+                executor.submit(_run_process_worker, _client_kwargs(client), *args)
+                for args in worker_args
+            ]
+            results = [future.result() for future in futures]
+        worker_stats = [stats for stats, _ in results]
+    result = _load_result(config, worker_stats)
+    if config.executor == "thread":
+        if client.query_cache is not None:
+            result.cache = client.query_cache.stats()
+        return result
+    for _, (cache_stats, plans) in results:
+        if cache_stats is not None:
+            result.cache = (
+                cache_stats if result.cache is None else result.cache.merge(cache_stats)
+            )
+        if plans is not None and client.plan_sampler is not None:
+            client.plan_sampler.merge(*plans)
+    return result
+
+
+def _client_kwargs(client: "PgvectorPerf") -> Dict[Text, Any]:
+    """Every constructor option of `client`, to open the same in a worker."""
+
+    return {
+        "url": client._url,
+        "model": client.model,
+        "vector_dimensions": client.vector_dimensions,
+        "vector_table": client.vector_table,
+        "vector_index": client.vector_index,
+        "index_config": client.index_config,
+        "search_params": client.search_params,
+        "index_build_options": client.index_build_options,
+        "partition_by_model": client.partition_by_model,
+        "admin_database": client._admin_database,
+        "echo": client.echo,
+        "pool_size": client.pool_size,
+        "max_overflow": client.max_overflow,
+        "pool_pre_ping": client.pool_pre_ping,
+        "pool_recycle": client.pool_recycle,
+        "query_cache": client.query_cache,
+        "instrumentation": client.instrumentation,
+        "plan_sampler": client.plan_sampler,
+    }
+
+
+def _run_process_worker(
+    client_kwargs: Dict[Text, Any], *args
+) -> Tuple[WorkerStats, WorkerClientStats]:
+    from pgvector_perf.client import PgvectorPerf
+
+    client = PgvectorPerf(**client_kwargs)
+    sampler = client.plan_sampler
+    try:
+        stats = _run_worker(client, *args)
+        if sampler is not None:
+            sampler.wait()
+    finally:
+        client.engine.dispose()
+    return stats, (
+        None if client.query_cache is None else client.query_cache.stats(),
+        None if sampler is None else (sampler.stats(), list(sampler.flagged)),
+    )
+
+
+def _run_worker(
+    client: "PgvectorPerf",
+    worker: int,
+    config: LoadConfig,
+    queries: npt.NDArray[np.float32],
+    model: Text,
+    start_at: float,
+) -> WorkerStats:
+    rng = np.random.default_rng([config.seed, worker])
+    embeddings = queries.tolist()
+    stats: WorkerStats = {}
+    # Wall clock to line up workers in other processes, then a monotonic clock.
+    time.sleep(max(0.0, start_at - time.time()))
+    run_start = time.perf_counter()
+    run_end = run_start + config.warmup + config.duration
+    rate = (config.qps or 0.0) / config.concurrency
+    scheduled = run_start
+    index = worker
+
+    while True:
+        if config.mode == "open":
+            scheduled += rng.exponential(1 / rate)
+            if scheduled >= run_end:
+                break
+            time.sleep(max(0.0, scheduled - time.perf_counter()))
+            start = scheduled
+        else:
+            start = time.perf_counter()
+            if start >= run_end:
+                break
+
+        embedding = embeddings[index % len(embeddings)]
+        index += config.concurrency
+        operation: Operation = (
+            "create" if rng.random() < config.write_ratio else "query"
+        )
+        failed = False
+        try:
+            if operation == "create":
+                client.points.create(
+                    client.model.model_validate(
+                        {
+                            "text": f"load {worker}-{index}",
+                            "model": model,
+                            "embedding": embedding,
+                        }
+                    )
+                )
+            else:
+                client.points.query(embedding, limit=config.k)
+        except Exception as e:
+            failed = True
+            logger.debug(f"Worker {worker} {operation} failed: {e}")
+        latency = time.perf_counter() - start
+
+        second = math.floor(start - run_start - config.warmup)
+        if second < 0:
+            continue
+        histogram, errors = stats.get((operation, second), (LatencyHistogram(), 0))
+        if failed:
+            errors += 1
+        else:
+            histogram.record(latency)
+        stats[(operation, second)] = (histogram, errors)
+    return stats
+
+
+def _load_result(config: LoadConfig, worker_stats: List[WorkerStats]) -> LoadResult:
+    merged: WorkerStats = {}
+    for stats in worker_stats:
+        for key, (histogram, errors) in stats.items():
+            if key in merged:
+                merged_histogram, merged_errors = merged[key]
+                merged[key] = (
+                    merged_histogram.merge(histogram),
+                    merged_errors + errors,
+                )
+            else:
+                merged[key] = (histogram, errors)
+
+    intervals = [
+        _load_stats(operation, histogram, errors, second=second)
+        for (operation, second), (histogram, errors) in sorted(
+            merged.items(), key=lambda item: (item[0][1], item[0][0])
+        )
+    ]
+    totals: List[LoadStats] = []
+    for operation in sorted({operation for operation, _ in merged}):
+        histogram, errors = LatencyHistogram(), 0
+        for (_operation, _), (_histogram, _errors) in merged.items():
+            if _operation == operation:
+                histogram.merge(_histogram)
+                errors += _errors
+        totals.append(_load_stats(operation, histogram, errors))
+
+    count = sum(stats.count + stats.errors for stats in totals)
+    return LoadResult(
+        config=config,
+        elapsed=config.duration,
+        throughput=count / config.duration,
+        totals=totals,
+        intervals=intervals,
+    )
+
+
+def _load_stats(
+    operation: Text,
+    histogram: LatencyHistogram,
+    errors: int,
+    *,
+    second: Optional[int] = None,
+) -> LoadStats:
+    return LoadStats(
+        operation=operation,
+        second=second,
+        count=len(histogram),
+        errors=errors,
+        latency=histogram.summary() if len(histogram) > 0 else None,
+    )
@@ -0,0 +1,443 @@
+import bisect
+import contextlib
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Text,
+    Tuple,
+)
+
+import numpy as np
+from pydantic import BaseModel
+from rich.table import Table
+from sqlalchemy import Engine, event
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def payload_bytes(value: Any) -> int:
+    """Approximate size of decoded values: array bytes plus UTF-8 text.
+
+    Used for the parameters sent with a statement and for the results an
+    operation returns, since the drivers do not count wire bytes.
+    """
+
+    if value is None or isinstance(value, bool):
+        return 0
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return sum(payload_bytes(v) for v in value.tolist())
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, dict):
+        return sum(payload_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_bytes(v) for v in value)
+    if isinstance(value, BaseModel):
+        return sum(payload_bytes(getattr(value, name)) for name in value.model_fields)
+    return 8
+
+
+def result_rows(value: Any) -> int:
+    """Rows in an operation's result: points, query results or batches."""
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return 0
+    rows = getattr(value, "rows", None)
+    if isinstance(rows, int):
+        return rows
+    if isinstance(value, tuple) and value and isinstance(value[0], np.ndarray):
+        # Ids and distances of `query_batch`, one row per neighbor
+        return int(value[0].size)
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(v, list) for v in value):
+            return sum(len(v) for v in value)
+        return len(value)
+    if hasattr(value, "__len__"):
+        return len(value)
+    # A single point
+    return 1 if "id" in getattr(value, "model_fields", {}) else 0
+
+
+class OperationRecord:
+    """Measurements of one call of an instrumented method."""
+
+    __slots__ = (
+        "operation",
+        "seconds",
+        "database_seconds",
+        "statements",
+        "rows",
+        "bytes_sent",
+        "bytes_received",
+        "error",
+    )
+
+    def __init__(self, operation: Text):
+        self.operation = operation
+        self.seconds = 0.0
+        self.database_seconds = 0.0
+        self.statements = 0
+        self.rows = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.error = False
+
+    @property
+    def client_seconds(self) -> float:
+        return max(0.0, self.seconds - self.database_seconds)
+
+    def add_statement(self, seconds: float, bytes_sent: int = 0) -> None:
+        self.statements += 1
+        self.database_seconds += seconds
+        self.bytes_sent += bytes_sent
+
+
+_current: contextvars.ContextVar[Optional[OperationRecord]] = contextvars.ContextVar(
+    "pgvector_perf_operation", default=None
+)
+
+
+def record_statement(seconds: float, bytes_sent: int = 0) -> None:
+    """Add a statement run outside SQLAlchemy (e.g. `COPY`) to the operation."""
+
+    record = _current.get()
+    if record is not None:
+        record.add_statement(seconds, bytes_sent)
+
+
+def detach() -> None:
+    """Stop counting statements of this context towards the operation.
+
+    For background tasks, which inherit the context of the call that
+    created them.
+    """
+
+    _current.set(None)
+
+
+def count_sent(data: Iterable[bytes]) -> Iterator[bytes]:
+    """Pass `data` through, adding its size to the operation's bytes sent."""
+
+    record = _current.get()
+    for chunk in data:
+        if record is not None:
+            record.bytes_sent += len(chunk)
+        yield chunk
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if _current.get() is not None:
+        conn.info.setdefault("pgvector_perf_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    record = _current.get()
+    starts = conn.info.get("pgvector_perf_start")
+    if record is None or not starts:
+        return
+    record.add_statement(
+        time.perf_counter() - starts.pop(),
+        len(statement.encode()) + payload_bytes(parameters),
+    )
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection and exception_context.connection.info.get(
+        "pgvector_perf_start"
+    )
+    record = _current.get()
+    if record is not None and starts:
+        record.add_statement(time.perf_counter() - starts.pop())
+
+
+class Instrumentation:
+    """Receives an `OperationRecord` for every call of a resource method.
+
+    Set as the client's `instrumentation`, which also times each statement
+    through SQLAlchemy engine events: `database_seconds` is the time spent
+    executing statements and fetching their rows, and the rest of the call
+    is client overhead (statement building, conversion, pool checkout).
+    Subclass and override `record` to send metrics elsewhere.
+    """
+
+    def record(self, record: OperationRecord) -> None:
+        pass
+
+    @staticmethod
+    def attach(engine: Engine) -> None:
+        """Time the statements of `engine`; a no-op if already attached."""
+
+        if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            return
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+    @contextlib.contextmanager
+    def operation(self, operation: Text) -> Iterator[OperationRecord]:
+        """Measure the enclosed block as one call of `operation`.
+
+        Statements of operations called within it also count towards it,
+        so an outer operation's client time excludes theirs.
+        """
+
+        record = OperationRecord(operation)
+        parent = _current.get()
+        token = _current.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record.error = True
+            raise
+        finally:
+            record.seconds = time.perf_counter() - start
+            _current.reset(token)
+            if parent is not None:
+                parent.statements += record.statements
+                parent.database_seconds += record.database_seconds
+                parent.bytes_sent += record.bytes_sent
+            self.record(record)
+
+
+def instrumented(operation: Text) -> Callable:
+    """Record calls of a resource method with the client's `instrumentation`."""
+
+    def decorator(method: Callable) -> Callable:
+        if inspect.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                instrumentation = self._client.instrumentation
+                if instrumentation is None:
+                    return await method(self, *args, **kwargs)
+                with instrumentation.operation(operation) as record:
+                    result = await method(self, *args, **kwargs)
+                    record.rows = result_rows(result)
+                    record.bytes_received = payload_bytes(result)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            instrumentation = self._client.instrumentation
+            if instrumentation is None:
+                return method(self, *args, **kwargs)
+            with instrumentation.operation(operation) as record:
+                result = method(self, *args, **kwargs)
+                record.rows = result_rows(result)
+                record.bytes_received = payload_bytes(result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class OperationMetrics(BaseModel):
+    """Totals of one operation, with a latency histogram over `buckets`.
+
+    `histogram[i]` counts calls of at most `buckets[i]` seconds that do not
+    fit an earlier bucket; the last count is for slower calls.
+    """
+
+    operation: Text
+    calls: int = 0
+    errors: int = 0
+    statements: int = 0
+    rows: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    seconds: float = 0.0
+    database_seconds: float = 0.0
+    buckets: List[float] = list(LATENCY_BUCKETS)
+    histogram: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    @property
+    def client_seconds(self) -> float:
+        return max(0.0, self.seconds - self.database_seconds)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.seconds / self.calls * 1000 if self.calls > 0 else 0.0
+
+    def quantile_ms(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile of latency."""
+
+        if self.calls == 0:
+            return 0.0
+        rank = q * self.calls
+        seen = 0
+        for bound, count in zip(self.buckets, self.histogram):
+            seen += count
+            if seen >= rank:
+                return bound * 1000
+        return float("inf")
+
+    def add(self, record: OperationRecord) -> None:
+        self.calls += 1
+        self.errors += int(record.error)
+        self.statements += record.statements
+        self.rows += record.rows
+        self.bytes_sent += record.bytes_sent
+        self.bytes_received += record.bytes_received
+        self.seconds += record.seconds
+        self.database_seconds += record.database_seconds
+        self.histogram[bisect.bisect_left(self.buckets, record.seconds)] += 1
+
+
+class MetricsCollector(Instrumentation):
+    """In-memory, thread-safe totals per operation.
+
+    `snapshot()` returns them, `to_prometheus()` renders them in the
+    Prometheus text exposition format.
+    """
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = sorted(buckets)
+        self._metrics: Dict[Text, OperationMetrics] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[Text, Any]:
+        # Settings only: a copy sent to a worker process starts empty.
+        return {"buckets": self.buckets}
+
+    def __setstate__(self, state: Dict[Text, Any]) -> None:
+        self.__init__(**state)
+
+    def record(self, record: OperationRecord) -> None:
+        with self._lock:
+            metrics = self._metrics.get(record.operation)
+            if metrics is None:
+                metrics = self._metrics[record.operation] = OperationMetrics(
+                    operation=record.operation,
+                    buckets=self.buckets,
+                    histogram=[0] * (len(self.buckets) + 1),
+                )
+            metrics.add(record)
+
+    def snapshot(self) -> List[OperationMetrics]:
+        with self._lock:
+            return [
+                metrics.model_copy(deep=True)
+                for _, metrics in sorted(self._metrics.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+    def to_prometheus(self, prefix: Text = "pgvector_perf") -> Text:
+        counters = [
+            ("calls_total", "Calls of the operation", "calls"),
+            ("errors_total", "Calls that raised an exception", "errors"),
+            ("statements_total", "SQL statements executed", "statements"),
+            ("rows_total", "Rows returned or written", "rows"),
+            ("sent_bytes_total", "Approximate bytes sent", "bytes_sent"),
+            ("received_bytes_total", "Approximate bytes received", "bytes_received"),
+            (
+                "database_seconds_total",
+                "Seconds spent executing statements",
+                "database_seconds",
+            ),
+            (
+                "client_seconds_total",
+                "Seconds spent outside statements",
+                "client_seconds",
+            ),
+        ]
+        snapshot = self.snapshot()
+        lines: List[Text] = []
+        for suffix, help, attr in counters:
+            name = f"{prefix}_operation_{suffix}"
+            lines += [f"# HELP {name} {help}.", f"# TYPE {name} counter"]
+            for metrics in snapshot:
+                value = getattr(metrics, attr)
+                lines.append(
+                    f'{name}{{operation="{metrics.operation}"}} {_number(value)}'
+                )
+        name = f"{prefix}_operation_duration_seconds"
+        lines += [
+            f"# HELP {name} Latency of the operation.",
+            f"# TYPE {name} histogram",
+        ]
+        for metrics in snapshot:
+            label = f'operation="{metrics.operation}"'
+            cumulative = 0
+            for bound, count in zip(metrics.buckets + [None], metrics.histogram):
+                cumulative += count
+                le = "+Inf" if bound is None else _number(bound)
+                lines.append(f'{name}_bucket{{{label},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{label}}} {_number(metrics.seconds)}")
+            lines.append(f"{name}_count{{{label}}} {metrics.calls}")
+        return "\n".join(lines) + "\n"
+
+    def __rich__(self):
+        return operations_table(self.snapshot())
+
+
+def operations_table(operations: Sequence[OperationMetrics]) -> Table:
+    """Calls, rows, mean latency, share of database time and MiB per operation."""
+
+    table = Table(title="pgvector-perf operations")
+    table.add_column("operation", style="yellow", no_wrap=True)
+    for column in ("calls", "rows", "mean ms", "db", "MiB out", "MiB in"):
+        table.add_column(column, style="cyan", justify="right")
+    for metrics in operations:
+        table.add_row(
+            metrics.operation,
+            f"{metrics.calls:,}",
+            f"{metrics.rows:,}",
+            f"{metrics.mean_ms:,.1f}",
+            (
+                f"{metrics.database_seconds / metrics.seconds:.0%}"
+                if metrics.seconds > 0
+                else ""
+            ),
+            f"{metrics.bytes_sent / 2**20:,.1f}",
+            f"{metrics.bytes_received / 2**20:,.1f}",
+        )
+    errors = {m.operation: m.errors for m in operations if m.errors > 0}
+    if errors:
+        table.caption = "errors: " + ", ".join(f"{k} {v}" for k, v in errors.items())
+    return table
+
+
+def _number(value: float) -> Text:
+    return repr(float(value)) if isinstance(value, float) else str(value)
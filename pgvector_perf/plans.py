@@ -0,0 +1,230 @@
+import asyncio
+import collections
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Text,
+)
+
+from pydantic import BaseModel
+
+from pgvector_perf.config import logger
+from pgvector_perf.metrics import detach
+
+
+class QueryPlan(BaseModel):
+    """A parsed `EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)` of one query.
+
+    `vector_index` is the first vector index scanned, `None` when the
+    nearest neighbors were found by scanning and sorting rows. Timings and
+    buffers are only set by `EXPLAIN ANALYZE`; buffer counts are summed
+    over the whole plan, in 8 KiB blocks.
+    """
+
+    node_types: List[Text]
+    indexes: List[Text] = []
+    seq_scans: List[Text] = []
+    vector_index: Optional[Text] = None
+    planning_ms: Optional[float] = None
+    execution_ms: Optional[float] = None
+    rows: Optional[int] = None
+    shared_hit_blocks: int = 0
+    shared_read_blocks: int = 0
+    plan: Dict[Text, Any]
+
+    @classmethod
+    def from_explain(cls, document: Any, *, vector_index: Text) -> "QueryPlan":
+        """Parse the JSON document of `EXPLAIN (FORMAT JSON)`.
+
+        Indexes whose name starts with `vector_index` (the per-model and
+        per-partition indexes included) count as vector indexes.
+        """
+
+        explain = document[0] if isinstance(document, list) else document
+        plan = explain["Plan"]
+        nodes = list(_walk(plan))
+        indexes = [node["Index Name"] for node in nodes if "Index Name" in node]
+        return cls(
+            node_types=[node["Node Type"] for node in nodes],
+            indexes=indexes,
+            seq_scans=[
+                node.get("Relation Name", "")
+                for node in nodes
+                if node["Node Type"] == "Seq Scan"
+            ],
+            vector_index=next(
+                (name for name in indexes if name.startswith(vector_index)), None
+            ),
+            planning_ms=explain.get("Planning Time"),
+            execution_ms=explain.get("Execution Time"),
+            rows=plan.get("Actual Rows"),
+            shared_hit_blocks=plan.get("Shared Hit Blocks", 0),
+            shared_read_blocks=plan.get("Shared Read Blocks", 0),
+            plan=plan,
+        )
+
+    @property
+    def index_scan(self) -> bool:
+        """Whether the neighbors came from a vector index scan."""
+
+        return self.vector_index is not None
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        blocks = self.shared_hit_blocks + self.shared_read_blocks
+        return self.shared_hit_blocks / blocks if blocks > 0 else None
+
+    def __str__(self) -> Text:
+        scan = (
+            f"index scan of '{self.vector_index}'"
+            if self.index_scan
+            else f"no vector index scan ({', '.join(self.node_types)})"
+        )
+        if self.execution_ms is None:
+            return scan
+        return (
+            f"{scan}, {self.execution_ms:.3f} ms "
+            + f"(planning {self.planning_ms or 0:.3f} ms), "
+            + f"buffers: {self.shared_hit_blocks} hit, {self.shared_read_blocks} read"
+        )
+
+
+def _walk(node: Dict[Text, Any]) -> Iterator[Dict[Text, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+class PlanSamplerStats(BaseModel):
+    queries: int = 0
+    sampled: int = 0
+    flagged: int = 0
+
+
+class PlanSampler:
+    """Explain one in `every` queries and flag plans without an index scan.
+
+    Set as the client's `plan_sampler`, `Points.query` hands the `EXPLAIN
+    ANALYZE` of every `every`-th query to the sampler once it has its
+    result. The sampler runs it in the background on another connection,
+    one at a time, so it adds neither to the query's latency nor to its
+    metrics; a query due while the last one is still being explained is
+    not sampled. Flagged plans are logged as warnings, passed to
+    `on_flagged` and the latest `max_flagged` are kept in `flagged`.
+    """
+
+    def __init__(
+        self,
+        every: int = 100,
+        *,
+        max_flagged: int = 100,
+        on_flagged: Optional[Callable[[QueryPlan], None]] = None,
+    ):
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.every = every
+        self.on_flagged = on_flagged
+        self.flagged: Deque[QueryPlan] = collections.deque(maxlen=max_flagged)
+        self._lock = threading.Lock()
+        self._stats = PlanSamplerStats()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="plan-sampler"
+        )
+        self._pending: Optional[Future | asyncio.Task] = None
+        self._explaining = False
+
+    def __getstate__(self) -> Dict[Text, Any]:
+        # Settings only: a copy sent to a worker process starts empty.
+        return {
+            "every": self.every,
+            "max_flagged": self.flagged.maxlen,
+            "on_flagged": self.on_flagged,
+        }
+
+    def __setstate__(self, state: Dict[Text, Any]) -> None:
+        self.__init__(state.pop("every"), **state)
+
+    def sample(self) -> bool:
+        """Count a query, and whether to explain it with `submit`.
+
+        Once it returns True, no other query is sampled until the explain
+        handed to `submit` or `asubmit` is done.
+        """
+
+        with self._lock:
+            self._stats.queries += 1
+            if self._stats.queries % self.every != 0 or self._explaining:
+                return False
+            self._stats.sampled += 1
+            self._explaining = True
+            return True
+
+    def submit(self, explain: Callable[[], QueryPlan]) -> None:
+        """Run `explain` on the sampler's thread and record its plan."""
+
+        self._pending = self._executor.submit(self._explain, explain)
+
+    def asubmit(self, explain: Callable[[], Awaitable[QueryPlan]]) -> None:
+        """Run the coroutine `explain` in a task and record its plan."""
+
+        self._pending = asyncio.get_running_loop().create_task(self._aexplain(explain))
+
+    def wait(self) -> None:
+        """Wait until the plan being explained, if any, is recorded."""
+
+        if isinstance(self._pending, Future):
+            self._pending.result()
+
+    async def await_pending(self) -> None:
+        if isinstance(self._pending, asyncio.Task):
+            await self._pending
+
+    def _explain(self, explain: Callable[[], QueryPlan]) -> None:
+        try:
+            self.record(explain())
+        except Exception as e:
+            logger.warning(f"Could not explain a sampled query: {e}")
+        finally:
+            self._explaining = False
+
+    async def _aexplain(self, explain: Callable[[], Awaitable[QueryPlan]]) -> None:
+        # The task's statements are not part of the sampled query.
+        detach()
+        try:
+            self.record(await explain())
+        except Exception as e:
+            logger.warning(f"Could not explain a sampled query: {e}")
+        finally:
+            self._explaining = False
+
+    def record(self, plan: QueryPlan) -> None:
+        if plan.index_scan:
+            return
+        with self._lock:
+            self._stats.flagged += 1
+            self.flagged.append(plan)
+        logger.warning(f"Sampled query plan: {plan}.")
+        if self.on_flagged is not None:
+            self.on_flagged(plan)
+
+    def stats(self) -> PlanSamplerStats:
+        with self._lock:
+            return self._stats.model_copy()
+
+    def merge(self, stats: PlanSamplerStats, flagged: Iterable[QueryPlan]) -> None:
+        """Add the counts and flagged plans of a sampler in another process."""
+
+        with self._lock:
+            self._stats.queries += stats.queries
+            self._stats.sampled += stats.sampled
+            self._stats.flagged += stats.flagged
+            self.flagged.extend(flagged)
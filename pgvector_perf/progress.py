@@ -0,0 +1,50 @@
+import contextlib
+from typing import Callable, Dict, Iterator, Optional, Text
+
+from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    Progress,
+    TaskID,
+    TaskProgressColumn,
+    TextColumn,
+    TimeElapsedColumn,
+)
+
+from pgvector_perf.config import console as default_console
+from pgvector_perf.schemas import IndexBuildProgress
+
+
+@contextlib.contextmanager
+def index_build_progress(
+    console: Optional[Console] = None,
+) -> Iterator[Callable[[IndexBuildProgress], None]]:
+    """A rich progress bar per index, fed by `Index.create(progress=...)`.
+
+    The bar follows the current build phase, whose totals are reported by
+    `pg_stat_progress_create_index`.
+    """
+
+    with Progress(
+        TextColumn("[yellow]{task.description}"),
+        BarColumn(),
+        TaskProgressColumn(),
+        TimeElapsedColumn(),
+        console=console or default_console,
+    ) as progress:
+        tasks: Dict[Text, TaskID] = {}
+
+        def _update(sample: IndexBuildProgress) -> None:
+            if sample.index not in tasks:
+                tasks[sample.index] = progress.add_task(sample.index, total=None)
+            fraction = sample.fraction
+            if sample.phase == "done":
+                fraction = 1.0
+            progress.update(
+                tasks[sample.index],
+                description=f"{sample.index}: {sample.phase}",
+                total=None if fraction is None else 1.0,
+                completed=fraction or 0.0,
+            )
+
+        yield _update
@@ -1,6 +1,15 @@
-from .databases import Databases
-from .index import Index
-from .points import Points
-from .tables import Tables
+from .databases import AsyncDatabases, Databases
+from .index import AsyncIndex, Index
+from .points import AsyncPoints, Points
+from .tables import AsyncTables, Tables
 
-__all__ = ["Databases", "Points", "Tables", "Index"]
+__all__ = [
+    "Databases",
+    "Points",
+    "Tables",
+    "Index",
+    "AsyncDatabases",
+    "AsyncPoints",
+    "AsyncTables",
+    "AsyncIndex",
+]
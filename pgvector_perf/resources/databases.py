@@ -3,12 +3,14 @@ from typing import TYPE_CHECKING, Generic, Optional
 from sqlalchemy import Engine, create_engine
 from sqlalchemy import text as sql_text
 from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 from pgvector_perf.config import logger
+from pgvector_perf.metrics import instrumented
 from pgvector_perf.schemas import PointType
 
 if TYPE_CHECKING:
-    from pgvector_perf.client import PgvectorPerf
+    from pgvector_perf.client import AsyncPgvectorPerf, PgvectorPerf
 
 
 class Databases(Generic[PointType]):
@@ -22,6 +24,7 @@ class Databases(Generic[PointType]):
         self.create(*args, exist_ok=True, **kwargs)
         self.activate_vector(*args, **kwargs)
 
+    @instrumented("databases.create")
     def create(self, *args, exist_ok: bool = True, **kwargs):
         engine = self._default_engine(auto_commit=True)
         db_name = self._client.database_name
@@ -49,6 +52,7 @@ class Databases(Generic[PointType]):
                     logger.error(msg)
                     raise ValueError(msg)
 
+    @instrumented("databases.activate_vector")
     def activate_vector(self, *args, **kwargs):
         engine = self._client.engine
         ext_name = "vector"
@@ -82,4 +86,87 @@ class Databases(Generic[PointType]):
         extra_parameters = kwargs
         if auto_commit is not None:
             extra_parameters["isolation_level"] = "AUTOCOMMIT"
-        return create_engine(url, echo=self._client.echo, **extra_parameters)
+        return self._client._instrument(
+            create_engine(url, echo=self._client.echo, **extra_parameters)
+        )
+
+
+class AsyncDatabases(Generic[PointType]):
+
+    _client: "AsyncPgvectorPerf[PointType]"
+
+    def __init__(self, client: "AsyncPgvectorPerf[PointType]"):
+        self._client = client
+
+    async def touch(self, *args, **kwargs):
+        await self.create(*args, exist_ok=True, **kwargs)
+        await self.activate_vector(*args, **kwargs)
+
+    @instrumented("databases.create")
+    async def create(self, *args, exist_ok: bool = True, **kwargs):
+        engine = self._default_engine(auto_commit=True)
+        db_name = self._client.database_name
+
+        try:
+            async with engine.connect() as connection:
+                # Check if the database exists
+                result = await connection.execute(
+                    sql_text(f"SELECT 1 FROM pg_database WHERE datname='{db_name}'")
+                )
+                exists = result.scalar() is not None
+
+                if not exists:
+                    # If the database does not exist, create it
+                    try:
+                        await connection.execute(sql_text(f"CREATE DATABASE {db_name}"))
+                        logger.info(f"Database '{db_name}' created successfully.")
+                    except ProgrammingError as e:
+                        logger.error(f"Error creating database '{db_name}': {e}")
+                        raise e
+                else:
+                    msg = f"Database '{db_name}' already exists."
+                    if exist_ok:
+                        logger.debug(msg)
+                    else:
+                        logger.error(msg)
+                        raise ValueError(msg)
+        finally:
+            await engine.dispose()
+
+    @instrumented("databases.activate_vector")
+    async def activate_vector(self, *args, **kwargs):
+        engine = self._client.engine
+        ext_name = "vector"
+
+        # Connect to the database
+        async with engine.connect() as connection:
+            # Check if the extension exists
+            result = await connection.execute(
+                sql_text(f"SELECT 1 FROM pg_extension WHERE extname='{ext_name}'")
+            )
+            exists = result.scalar() is not None
+
+            if not exists:
+                # If the extension does not exist, create it
+                try:
+                    await connection.execute(sql_text(f"CREATE EXTENSION {ext_name}"))
+                    await connection.commit()
+                    logger.info(f"Extension '{ext_name}' created successfully.")
+                except ProgrammingError as e:
+                    logger.error(f"Error creating extension: {e}")
+                    raise e
+            else:
+                logger.debug(f"Extension '{ext_name}' already exists.")
+
+    def _default_engine(
+        self,
+        auto_commit: Optional[bool] = None,
+        **kwargs,
+    ) -> "AsyncEngine":
+        url = self._client.engine.url.set(database="postgres")
+        extra_parameters = kwargs
+        if auto_commit is not None:
+            extra_parameters["isolation_level"] = "AUTOCOMMIT"
+        return self._client._instrument(
+            create_async_engine(url, echo=self._client.echo, **extra_parameters)
+        )
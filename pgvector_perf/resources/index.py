@@ -1,15 +1,252 @@
-from typing import TYPE_CHECKING, Generic
+import asyncio
+import contextlib
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Text,
+)
 
 from sqlalchemy import Index as SqlIndex
+from sqlalchemy import text as sql_text
+from sqlalchemy.exc import DBAPIError
 
-from pgvector_perf.schemas import PointType
+from pgvector_perf.config import logger
+from pgvector_perf.metrics import detach, instrumented
+from pgvector_perf.schemas import (
+    IndexBuildCallback,
+    IndexBuildOptions,
+    IndexBuildProgress,
+    IndexBuildResult,
+    IndexConfig,
+    PointType,
+    VectorIndex,
+)
+from pgvector_perf.utils import model_relation_name, sql_literal
 
 if TYPE_CHECKING:
+    from sqlalchemy import TextClause
 
-    from pgvector_perf.client import PgvectorPerf
+    from pgvector_perf.client import (
+        AsyncPgvectorPerf,
+        BasePgvectorPerf,
+        PgvectorPerf,
+    )
 
 
-class Index(Generic[PointType]):
+class BaseIndex(Generic[PointType]):
+
+    _client: "BasePgvectorPerf[PointType]"
+
+    def _index_config(
+        self, config: Optional[IndexConfig] = None, **kwargs
+    ) -> IndexConfig:
+        config = config or self._client.index_config
+        overrides = {
+            key: kwargs[key]
+            for key in IndexConfig.model_fields
+            if kwargs.get(key) is not None
+        }
+        if overrides:
+            config = IndexConfig.model_validate({**config.model_dump(), **overrides})
+        return config
+
+    def _index_name(self, model: Optional[Text] = None) -> Text:
+        """The vector index, or the index over one `model`'s rows.
+
+        That is a partial index, or the index of the model's partition when
+        the table is partitioned by model.
+        """
+
+        if model is None:
+            return self._client.vector_index
+        return model_relation_name(self._client.vector_index, model)
+
+    def _per_partition(self, model: Optional[Text]) -> bool:
+        return model is None and self._client.partition_by_model
+
+    def _index_models(
+        self, model: Optional[Text], partitions: Iterable[Text]
+    ) -> List[Optional[Text]]:
+        """Models whose index an operation applies to, `None` for the table's.
+
+        A partitioned table has no index of its own but one per partition.
+        """
+
+        if model is not None or not self._client.partition_by_model:
+            return [model]
+        return list(partitions)
+
+    def _sql_index(
+        self, config: Optional[IndexConfig] = None, *, model: Optional[Text] = None
+    ) -> SqlIndex:
+        config = config or self._client.index_config
+        sql_model = self._client.model._sql_model
+        return SqlIndex(
+            self._index_name(model),
+            sql_model.embedding,
+            postgresql_using=config.method,
+            postgresql_with=config.build_params(),
+            postgresql_ops={"embedding": config.opclass},
+            postgresql_where=None if model is None else sql_model.model == model,
+        )
+
+    def _create_index_stmt(
+        self,
+        config: IndexConfig,
+        *,
+        model: Optional[Text] = None,
+        concurrently: bool = False,
+    ):
+        """DDL of an index over the (quantized) embedding expression.
+
+        With `model`, the index covers the model's partition or, if the
+        table is not partitioned, its rows through a partial index.
+        """
+
+        table_name = self._client.model._sql_model.__table__.name
+        where = ""
+        if model is not None and self._client.partition_by_model:
+            table_name = model_relation_name(table_name, model)
+        elif model is not None:
+            where = f" WHERE model = {sql_literal(model)}"
+        expression = config.index_expression(
+            "embedding", self._client.vector_dimensions
+        )
+        params = ", ".join(f"{k} = {v}" for k, v in config.build_params().items())
+        return sql_text(
+            "CREATE INDEX "
+            + ("CONCURRENTLY " if concurrently else "")
+            + f"{self._index_name(model)} "
+            + f"ON {table_name} USING {config.method} "
+            + f"(({expression}) {config.index_opclass()}) WITH ({params})"
+            + where
+        )
+
+    @staticmethod
+    def _set_stmts(options: IndexBuildOptions) -> List["TextClause"]:
+        return [
+            sql_text(f"SET {name} = {sql_literal(str(value))}")
+            for name, value in options.settings().items()
+        ]
+
+    @staticmethod
+    def _reset_stmts(options: IndexBuildOptions) -> List["TextClause"]:
+        return [sql_text(f"RESET {name}") for name in options.settings()]
+
+    @staticmethod
+    def _progress_stmt():
+        return sql_text(
+            "SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total "
+            + "FROM pg_stat_progress_create_index WHERE pid = :pid"
+        )
+
+    @staticmethod
+    def _progress_sample(index: Text, row: Any, start: float) -> IndexBuildProgress:
+        phase, blocks_done, blocks_total, tuples_done, tuples_total = row
+        return IndexBuildProgress(
+            index=index,
+            phase=phase,
+            blocks_done=blocks_done or 0,
+            blocks_total=blocks_total or 0,
+            tuples_done=tuples_done or 0,
+            tuples_total=tuples_total or 0,
+            elapsed=time.perf_counter() - start,
+        )
+
+    @staticmethod
+    def _done_sample(
+        index: Text, last: Optional[IndexBuildProgress], start: float
+    ) -> IndexBuildProgress:
+        """The final sample of a build, with the last phase's totals done."""
+
+        last = last or IndexBuildProgress(index=index, phase="")
+        return last.model_copy(
+            update={
+                "phase": "done",
+                "blocks_done": last.blocks_total,
+                "tuples_done": last.tuples_total,
+                "elapsed": time.perf_counter() - start,
+            }
+        )
+
+    @staticmethod
+    def _restore_stmt(index: VectorIndex, *, concurrently: bool = False):
+        definition = index.definition
+        if concurrently:
+            definition = definition.replace(
+                "CREATE INDEX ", "CREATE INDEX CONCURRENTLY ", 1
+            )
+        return sql_text(definition)
+
+    def _drop_index_stmt(self, model: Optional[Text] = None):
+        return self._drop_name_stmt(self._index_name(model))
+
+    @staticmethod
+    def _drop_name_stmt(name: Text, *, concurrently: bool = False):
+        return sql_text(
+            "DROP INDEX "
+            + ("CONCURRENTLY " if concurrently else "")
+            + f"IF EXISTS {name}"
+        )
+
+    @staticmethod
+    def _validity_stmt(names: Sequence[Text]):
+        """`indisvalid` of each existing index among `names`."""
+
+        return sql_text(
+            "SELECT c.relname, x.indisvalid FROM pg_index x "
+            + "JOIN pg_class c ON c.oid = x.indexrelid WHERE c.relname = ANY(:names)"
+        ).bindparams(names=list(names))
+
+    @staticmethod
+    def _built_elsewhere(name: Text, validity: Sequence[Any]) -> bool:
+        """Whether a failed build of `name` lost a race to another session."""
+
+        if not any(valid for _, valid in validity):
+            return False
+        logger.info(f"Index '{name}' was built by another session.")
+        return True
+
+    def _list_stmt(self):
+        """Vector indexes on the table and on each of its partitions."""
+
+        return sql_text(
+            "SELECT i.relname, t.relname, pg_get_indexdef(i.oid) FROM pg_index x "
+            + "JOIN pg_class i ON i.oid = x.indexrelid "
+            + "JOIN pg_class t ON t.oid = x.indrelid "
+            + "JOIN pg_am a ON a.oid = i.relam "
+            + "WHERE a.amname IN ('hnsw', 'ivfflat') AND x.indrelid IN ("
+            + "SELECT to_regclass(:table) UNION ALL "
+            + "SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(:table)"
+            + ") ORDER BY i.relname"
+        ).bindparams(table=self._client.model._sql_model.__table__.name)
+
+    @staticmethod
+    def _vector_indexes(rows: Iterable[Any]) -> List[VectorIndex]:
+        return [
+            VectorIndex(name=name, table=table, definition=definition)
+            for name, table, definition in rows
+        ]
+
+    def _size_stmt(self, models: Sequence[Optional[Text]]):
+        return sql_text(
+            "SELECT sum(pg_relation_size(c.oid))::bigint FROM pg_class c "
+            + "WHERE c.relname = ANY(:names) AND c.relkind = 'i'"
+        ).bindparams(names=[self._index_name(model) for model in models])
+
+
+class Index(BaseIndex[PointType]):
 
     _client: "PgvectorPerf[PointType]"
 
@@ -19,15 +256,470 @@ class Index(Generic[PointType]):
     def touch(self, *args, **kwargs):
         self.create(*args, **kwargs)
 
-    def create(self, *args, **kwargs):
+    @instrumented("index.create")
+    def create(
+        self,
+        *args,
+        config: Optional[IndexConfig] = None,
+        model: Optional[Text] = None,
+        options: Optional[IndexBuildOptions] = None,
+        progress: Optional[IndexBuildCallback] = None,
+        progress_interval: float = 0.5,
+        **kwargs,
+    ) -> IndexBuildResult:
+        """Create the vector index if it does not exist.
+
+        Uses the client's `index_config` unless `config` is given; keyword
+        arguments named like `IndexConfig` fields (`method`, `m`,
+        `ef_construction`, `lists`, `opclass`, `quantization`) override single
+        values. A quantized index is built on the `halfvec` or `bit`
+        expression of the embedding column.
+
+        With `model`, only the index over that model's rows is created: a
+        partial index, which the planner uses for queries filtered on
+        `model`, or the partition's index if the table is partitioned by
+        model. A partitioned table otherwise gets one index per existing
+        partition, built one after the other. `drop` and `size` take the
+        same argument.
+
+        `options` (the client's `index_build_options` by default) are set
+        for the building session only. `progress` is called every
+        `progress_interval` seconds with a sample of
+        `pg_stat_progress_create_index`, and once more when each index is
+        done. Returns the build time and the size of the index.
+
+        An index that already exists is kept, and the result has `created`
+        false if no index was built. An invalid index, left behind by a
+        failed `CREATE INDEX CONCURRENTLY`, is dropped and built again.
+        """
+
+        config = self._index_config(config, **kwargs)
+        options = options or self._client.index_build_options
+
+        partitions = (
+            self._client.tables.partitions() if self._per_partition(model) else ()
+        )
+        start = time.perf_counter()
+        models = self._index_models(model, partitions)
+        valid = self._drop_invalid(models, options)
+        pending = [_model for _model in models if self._index_name(_model) not in valid]
+        built = self._build(
+            {
+                self._index_name(_model): self._create_index_stmt(
+                    config, model=_model, concurrently=options.concurrently
+                )
+                for _model in pending
+            },
+            options,
+            progress,
+            progress_interval,
+        )
+        if built:
+            logger.debug(f"Index '{self._index_name(model)}' is {config}.")
+        return IndexBuildResult(
+            index=self._index_name(model),
+            config=config,
+            options=options,
+            created=bool(built),
+            seconds=time.perf_counter() - start,
+            bytes=self.size(model=model),
+        )
+
+    def _drop_invalid(
+        self, models: Sequence[Optional[Text]], options: IndexBuildOptions
+    ) -> Set[Text]:
+        """Drop the invalid indexes over `models`, returning the valid ones.
+
+        A failed or interrupted `CREATE INDEX CONCURRENTLY` leaves an
+        invalid index behind, which queries never use.
+        """
+
+        with self._client.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            validity = connection.execute(
+                self._validity_stmt([self._index_name(model) for model in models])
+            ).all()
+            for name, valid in validity:
+                if not valid:
+                    logger.warning(f"Rebuilding invalid index '{name}'.")
+                    connection.execute(
+                        self._drop_name_stmt(name, concurrently=options.concurrently)
+                    )
+        return {name for name, valid in validity if valid}
+
+    @instrumented("index.restore")
+    def restore(
+        self,
+        indexes: Sequence[VectorIndex],
+        *args,
+        options: Optional[IndexBuildOptions] = None,
+        progress: Optional[IndexBuildCallback] = None,
+        progress_interval: float = 0.5,
+        **kwargs,
+    ) -> float:
+        """Recreate indexes from their `definition`, as listed by `list`.
+
+        Builds like `create`, with `options` and `progress`. Returns the
+        seconds spent.
+        """
+
+        options = options or self._client.index_build_options
+        start = time.perf_counter()
+        self._build(
+            {
+                index.name: self._restore_stmt(index, concurrently=options.concurrently)
+                for index in indexes
+            },
+            options,
+            progress,
+            progress_interval,
+        )
+        return time.perf_counter() - start
+
+    def _build(
+        self,
+        stmts: Dict[Text, "TextClause"],
+        options: IndexBuildOptions,
+        progress: Optional[IndexBuildCallback],
+        progress_interval: float,
+    ) -> List[Text]:
+        """Run index DDL, keyed by index name, one statement after the other.
+
+        Returns the names of the indexes built, without those another
+        session built at the same time.
+        """
+
+        built: List[Text] = []
+        if not stmts:
+            return built
+        # CONCURRENTLY cannot run in a transaction block.
+        with self._client.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            pid = connection.execute(sql_text("SELECT pg_backend_pid()")).scalar_one()
+            for stmt in self._set_stmts(options):
+                connection.execute(stmt)
+            try:
+                for name, stmt in stmts.items():
+                    try:
+                        with self._watch_progress(
+                            pid, name, progress, progress_interval
+                        ):
+                            connection.execute(stmt)
+                    except DBAPIError:
+                        validity = connection.execute(self._validity_stmt([name])).all()
+                        if not self._built_elsewhere(name, validity):
+                            raise
+                    else:
+                        built.append(name)
+            finally:
+                for stmt in self._reset_stmts(options):
+                    connection.execute(stmt)
+        return built
+
+    @contextlib.contextmanager
+    def _watch_progress(
+        self,
+        pid: int,
+        index: Text,
+        callback: Optional[IndexBuildCallback],
+        interval: float,
+    ) -> Iterator[None]:
+        """Poll the build of backend `pid` from another connection."""
+
+        if callback is None:
+            yield
+            return
+        stop = threading.Event()
+        start = time.perf_counter()
+        last: List[IndexBuildProgress] = []
+
+        def _poll():
+            with self._client.engine.connect() as connection:
+                while not stop.wait(interval):
+                    row = connection.execute(
+                        self._progress_stmt(), {"pid": pid}
+                    ).one_or_none()
+                    # Statistics views are snapshotted per transaction.
+                    connection.rollback()
+                    if row is not None:
+                        last.append(self._progress_sample(index, row, start))
+                        callback(last[-1])
+
+        thread = threading.Thread(target=_poll, name="index-progress", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+            callback(self._done_sample(index, last[-1] if last else None, start))
+
+    @instrumented("index.drop")
+    def drop(
+        self,
+        *args,
+        model: Optional[Text] = None,
+        indexes: Optional[Sequence[VectorIndex]] = None,
+        **kwargs,
+    ):
+        """Drop the vector index, or the index over `model`'s rows.
+
+        With `indexes`, as listed by `list`, drops those instead.
+        """
+
         engine = self._client.engine
 
-        with engine.connect() as connection:
-            index = SqlIndex(
-                self._client.vector_index,
-                self._client.model._sql_model.embedding,
-                postgresql_using="hnsw",
-                postgresql_with={"m": 16, "ef_construction": 64},
-                postgresql_ops={"embedding": "vector_l2_ops"},
-            )
-            index.create(connection, checkfirst=True)
+        if indexes is not None:
+            with engine.begin() as connection:
+                for index in indexes:
+                    connection.execute(self._drop_name_stmt(index.name))
+            return
+        partitions = (
+            self._client.tables.partitions() if self._per_partition(model) else ()
+        )
+        with engine.begin() as connection:
+            for _model in self._index_models(model, partitions):
+                if self._client.partition_by_model:
+                    connection.execute(self._drop_index_stmt(_model))
+                else:
+                    index = self._sql_index(model=_model)
+                    index.drop(connection, checkfirst=True)
+
+    @instrumented("index.list")
+    def list(self, *args, **kwargs) -> List[VectorIndex]:
+        """Every vector index on the table and its partitions, by name.
+
+        Includes the per-model partial and per-partition indexes, and
+        indexes built outside this client.
+        """
+
+        with self._client.engine.connect() as connection:
+            return self._vector_indexes(connection.execute(self._list_stmt()))
+
+    @instrumented("index.size")
+    def size(self, *args, model: Optional[Text] = None, **kwargs) -> Optional[int]:
+        """Index size in bytes from `pg_relation_size`, `None` if missing.
+
+        Summed over the partitions' indexes of a partitioned table.
+        """
+
+        partitions = (
+            self._client.tables.partitions() if self._per_partition(model) else ()
+        )
+        models = self._index_models(model, partitions)
+        with self._client.engine.connect() as connection:
+            return connection.execute(self._size_stmt(models)).scalar()
+
+
+class AsyncIndex(BaseIndex[PointType]):
+
+    _client: "AsyncPgvectorPerf[PointType]"
+
+    def __init__(self, client: "AsyncPgvectorPerf[PointType]"):
+        self._client = client
+
+    async def touch(self, *args, **kwargs):
+        await self.create(*args, **kwargs)
+
+    @instrumented("index.create")
+    async def create(
+        self,
+        *args,
+        config: Optional[IndexConfig] = None,
+        model: Optional[Text] = None,
+        options: Optional[IndexBuildOptions] = None,
+        progress: Optional[IndexBuildCallback] = None,
+        progress_interval: float = 0.5,
+        **kwargs,
+    ) -> IndexBuildResult:
+        config = self._index_config(config, **kwargs)
+        options = options or self._client.index_build_options
+
+        partitions = (
+            await self._client.tables.partitions() if self._per_partition(model) else ()
+        )
+        start = time.perf_counter()
+        models = self._index_models(model, partitions)
+        valid = await self._drop_invalid(models, options)
+        pending = [_model for _model in models if self._index_name(_model) not in valid]
+        built = await self._build(
+            {
+                self._index_name(_model): self._create_index_stmt(
+                    config, model=_model, concurrently=options.concurrently
+                )
+                for _model in pending
+            },
+            options,
+            progress,
+            progress_interval,
+        )
+        if built:
+            logger.debug(f"Index '{self._index_name(model)}' is {config}.")
+        return IndexBuildResult(
+            index=self._index_name(model),
+            config=config,
+            options=options,
+            created=bool(built),
+            seconds=time.perf_counter() - start,
+            bytes=await self.size(model=model),
+        )
+
+    async def _drop_invalid(
+        self, models: Sequence[Optional[Text]], options: IndexBuildOptions
+    ) -> Set[Text]:
+        async with self._client.engine.connect() as connection:
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            validity = (
+                await connection.execute(
+                    self._validity_stmt([self._index_name(model) for model in models])
+                )
+            ).all()
+            for name, valid in validity:
+                if not valid:
+                    logger.warning(f"Rebuilding invalid index '{name}'.")
+                    await connection.execute(
+                        self._drop_name_stmt(name, concurrently=options.concurrently)
+                    )
+        return {name for name, valid in validity if valid}
+
+    @instrumented("index.restore")
+    async def restore(
+        self,
+        indexes: Sequence[VectorIndex],
+        *args,
+        options: Optional[IndexBuildOptions] = None,
+        progress: Optional[IndexBuildCallback] = None,
+        progress_interval: float = 0.5,
+        **kwargs,
+    ) -> float:
+        options = options or self._client.index_build_options
+        start = time.perf_counter()
+        await self._build(
+            {
+                index.name: self._restore_stmt(index, concurrently=options.concurrently)
+                for index in indexes
+            },
+            options,
+            progress,
+            progress_interval,
+        )
+        return time.perf_counter() - start
+
+    async def _build(
+        self,
+        stmts: Dict[Text, "TextClause"],
+        options: IndexBuildOptions,
+        progress: Optional[IndexBuildCallback],
+        progress_interval: float,
+    ) -> List[Text]:
+        built: List[Text] = []
+        if not stmts:
+            return built
+        async with self._client.engine.connect() as connection:
+            # CONCURRENTLY cannot run in a transaction block.
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            pid = (
+                await connection.execute(sql_text("SELECT pg_backend_pid()"))
+            ).scalar_one()
+            for stmt in self._set_stmts(options):
+                await connection.execute(stmt)
+            try:
+                for name, stmt in stmts.items():
+                    try:
+                        async with self._watch_progress(
+                            pid, name, progress, progress_interval
+                        ):
+                            await connection.execute(stmt)
+                    except DBAPIError:
+                        validity = (
+                            await connection.execute(self._validity_stmt([name]))
+                        ).all()
+                        if not self._built_elsewhere(name, validity):
+                            raise
+                    else:
+                        built.append(name)
+            finally:
+                for stmt in self._reset_stmts(options):
+                    await connection.execute(stmt)
+        return built
+
+    @contextlib.asynccontextmanager
+    async def _watch_progress(
+        self,
+        pid: int,
+        index: Text,
+        callback: Optional[IndexBuildCallback],
+        interval: float,
+    ) -> AsyncIterator[None]:
+        if callback is None:
+            yield
+            return
+        start = time.perf_counter()
+        last: List[IndexBuildProgress] = []
+
+        async def _poll():
+            # The task's statements are not part of the build.
+            detach()
+            async with self._client.engine.connect() as connection:
+                while True:
+                    await asyncio.sleep(interval)
+                    row = (
+                        await connection.execute(self._progress_stmt(), {"pid": pid})
+                    ).one_or_none()
+                    await connection.rollback()
+                    if row is not None:
+                        last.append(self._progress_sample(index, row, start))
+                        callback(last[-1])
+
+        task = asyncio.create_task(_poll())
+        try:
+            yield
+        finally:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            callback(self._done_sample(index, last[-1] if last else None, start))
+
+    @instrumented("index.drop")
+    async def drop(
+        self,
+        *args,
+        model: Optional[Text] = None,
+        indexes: Optional[Sequence[VectorIndex]] = None,
+        **kwargs,
+    ):
+        engine = self._client.engine
+
+        if indexes is not None:
+            async with engine.begin() as connection:
+                for index in indexes:
+                    await connection.execute(self._drop_name_stmt(index.name))
+            return
+        partitions = (
+            await self._client.tables.partitions() if self._per_partition(model) else ()
+        )
+        async with engine.begin() as connection:
+            for _model in self._index_models(model, partitions):
+                if self._client.partition_by_model:
+                    await connection.execute(self._drop_index_stmt(_model))
+                else:
+                    index = self._sql_index(model=_model)
+                    await connection.run_sync(index.drop, checkfirst=True)
+
+    @instrumented("index.list")
+    async def list(self, *args, **kwargs) -> List[VectorIndex]:
+        async with self._client.engine.connect() as connection:
+            return self._vector_indexes(await connection.execute(self._list_stmt()))
+
+    @instrumented("index.size")
+    async def size(
+        self, *args, model: Optional[Text] = None, **kwargs
+    ) -> Optional[int]:
+        partitions = (
+            await self._client.tables.partitions() if self._per_partition(model) else ()
+        )
+        models = self._index_models(model, partitions)
+        async with self._client.engine.connect() as connection:
+            return (await connection.execute(self._size_stmt(models))).scalar()
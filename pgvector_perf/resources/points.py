@@ -1,8 +1,12 @@
+import functools
+import time
+from datetime import datetime
 from typing import (
     TYPE_CHECKING,
     Any,
     Dict,
     Generic,
+    Iterator,
     List,
     Literal,
     Optional,
@@ -12,33 +16,206 @@ from typing import (
     overload,
 )
 
-from sqlalchemy import select
+import numpy as np
+import numpy.typing as npt
+import pytz
+from sqlalchemy import (
+    Connection,
+    LargeBinary,
+    Select,
+    TextClause,
+    bindparam,
+    func,
+    select,
+)
+from sqlalchemy import text as sql_text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
 import pgvector_perf.exceptions
-from pgvector_perf.schemas import PointType
-from pgvector_perf.utils import batch_process
+from pgvector_perf.config import logger
+from pgvector_perf.copy_binary import (
+    COPY_COLUMNS,
+    POSTGRES_EPOCH,
+    acopy_from,
+    copy_from,
+    decode_vectors,
+    iter_copy_binary,
+    iter_copy_vectors,
+    to_postgres_timestamp,
+)
+from pgvector_perf.metrics import count_sent, instrumented, record_statement
+from pgvector_perf.plans import QueryPlan
+from pgvector_perf.schemas import (
+    BulkInsertResult,
+    PointBatch,
+    PointType,
+    QueryFilter,
+    SearchParams,
+)
+from pgvector_perf.utils import batch_process, model_relation_name, vectors_to_text
 
 if TYPE_CHECKING:
-    from pgvector_perf.client import PgvectorPerf
+    from pgvector_perf.client import AsyncPgvectorPerf, BasePgvectorPerf, PgvectorPerf
 
+ScalarColumn = Literal["text", "model", "created_at"]
 
-class Points(Generic[PointType]):
+SCALAR_COLUMNS: Tuple[ScalarColumn, ...] = ("text", "model", "created_at")
 
-    _client: "PgvectorPerf[PointType]"
+CopyColumns = Tuple[
+    npt.NDArray[np.int64],
+    Sequence[Text],
+    Sequence[Text],
+    npt.NDArray[np.float32],
+    npt.NDArray[np.int64],
+]
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN (options) statement`, with the statement's parameters bound."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Any, options: Sequence[Text]):
+        self.statement = statement
+        self.options = options
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler, **kwargs) -> Text:
+    return f"EXPLAIN ({', '.join(element.options)}) " + compiler.process(
+        element.statement, **kwargs
+    )
+
+
+class BasePoints(Generic[PointType]):
+    """Statement building shared by the sync and async `Points` resources."""
+
+    _client: "BasePgvectorPerf[PointType]"
 
     hard_limit: int = 1000
 
-    def __init__(self, client: "PgvectorPerf[PointType]"):
-        self._client = client
+    # Candidates per result fetched from a quantized index before re-ranking.
+    default_oversample: int = 4
 
-    def query(
+    def _search_params(
+        self,
+        search_params: Optional[SearchParams],
+        *,
+        ef_search: Optional[int],
+        probes: Optional[int],
+    ) -> SearchParams:
+        return self._client.search_params.merge(search_params).merge(
+            SearchParams(ef_search=ef_search, probes=probes)
+        )
+
+    def _set_local_stmt(self, search_params: SearchParams) -> Optional["TextClause"]:
+        """`SET LOCAL` the search parameters for the current transaction."""
+
+        settings = search_params.settings()
+        if not settings:
+            return None
+        return sql_text(
+            "; ".join(
+                f"SET LOCAL {name} = {v if isinstance(v, str) else int(v)}"
+                for name, v in settings.items()
+            )
+        )
+
+    @staticmethod
+    def _query_filter(
+        model: Optional[Text],
+        created_after: Optional[datetime],
+        created_before: Optional[datetime],
+    ) -> QueryFilter:
+        return QueryFilter(
+            model=model, created_after=created_after, created_before=created_before
+        )
+
+    @staticmethod
+    def _post_filter(query_filter: QueryFilter, search_params: SearchParams) -> bool:
+        """Whether to filter over-fetched neighbors instead of in the scan."""
+
+        return not query_filter.empty and search_params.filter_oversample is not None
+
+    @staticmethod
+    def _order_rows(rows: Sequence[Any], search_params: SearchParams) -> List[Any]:
+        """Rows by distance (their last column), which relaxed scans skip."""
+
+        if search_params.iterative_scan == "relaxed_order":
+            return sorted(rows, key=lambda row: row[-1])
+        return list(rows)
+
+    def _cache_key(
         self,
         embedding: List[float],
-        *args,
-        limit: int = 5,
-        within_distance: Optional[float] = None,
-        **kwargs,
-    ) -> List[Tuple[PointType, float]]:
+        *,
+        limit: int,
+        within_distance: Optional[float],
+        search_params: SearchParams,
+        query_filter: QueryFilter,
+    ) -> Optional[bytes]:
+        if self._client.query_cache is None:
+            return None
+        return self._client.query_cache.key(
+            embedding,
+            limit=limit,
+            within_distance=within_distance,
+            quantization=self._client.index_config.quantization,
+            oversample=search_params.oversample,
+            filter_oversample=search_params.filter_oversample,
+            **search_params.settings(),
+            **query_filter.params(),
+        )
+
+    def _cached_query(
+        self, key: Optional[bytes]
+    ) -> Optional[List[Tuple[PointType, float]]]:
+        if key is None or self._client.query_cache is None:
+            return None
+        result = self._client.query_cache.get(key)
+        if result is None:
+            return None
+        return [(self._copy_point(point), distance) for point, distance in result]
+
+    @staticmethod
+    def _copy_point(point: PointType) -> PointType:
+        # A new embedding list, so changing a returned point's embedding in
+        # place does not change the cached one.
+        return point.model_copy(update={"embedding": list(point.embedding)})
+
+    def _cache_query(
+        self,
+        key: Optional[bytes],
+        version: int,
+        result: List[Tuple[PointType, float]],
+    ) -> None:
+        if key is None or self._client.query_cache is None:
+            return
+        # Python floats and the list slots holding them, plus object overhead.
+        nbytes = sum(32 * len(point.embedding) + 512 for point, _ in result)
+        self._client.query_cache.put(
+            key,
+            [(self._copy_point(point), distance) for point, distance in result],
+            nbytes,
+            version=version,
+        )
+
+    def _invalidate_cache(self) -> None:
+        if self._client.query_cache is not None:
+            self._client.query_cache.invalidate()
+
+    def _query_stmt(
+        self,
+        embedding: List[float] | npt.NDArray[np.float32],
+        *,
+        limit: int,
+        within_distance: Optional[float],
+        columns: Optional[Sequence[Any]] = None,
+        search_params: Optional[SearchParams] = None,
+        query_filter: Optional[QueryFilter] = None,
+    ) -> "Select":
         if len(embedding) != self._client.vector_dimensions:
             raise ValueError(
                 f"Embedding must have {self._client.vector_dimensions} dimensions"
@@ -50,25 +227,912 @@ class Points(Generic[PointType]):
             else within_distance
         )
 
+        search_params = search_params or SearchParams()
+        query_filter = query_filter or QueryFilter()
+
         sql_model = self._client.model.sql_model()
+        where = self._filter_clause(query_filter)
+        post_filter = self._post_filter(query_filter, search_params)
+        candidates = limit * (search_params.filter_oversample if post_filter else 1)
 
-        with self._client.session_factory() as session:
-            stmt = select(
-                sql_model,
-                sql_model.embedding.l2_distance(embedding).label("distance"),
+        stmt = select(
+            *(columns or [sql_model]),
+            sql_model.embedding.l2_distance(embedding).label("distance"),
+        )
+        if within_distance is not None:
+            stmt = stmt.where(
+                sql_model.embedding.l2_distance(embedding) < within_distance
             )
-            if within_distance is not None:
-                stmt = stmt.where(
-                    sql_model.embedding.l2_distance(embedding) < within_distance
+        if where is not None:
+            stmt = stmt.where(where)
+        if self._client.index_config.quantization != "none":
+            stmt = stmt.where(
+                sql_model.id.in_(
+                    self._candidates_stmt(
+                        embedding,
+                        limit=candidates * self._oversample(search_params),
+                        where=None if post_filter else where,
+                    )
                 )
-            stmt = stmt.order_by(sql_model.embedding.l2_distance(embedding))
-            stmt = stmt.limit(limit)
-            result = session.execute(stmt).all()
+            )
+        elif post_filter:
+            # Nearest neighbors from an unfiltered index scan, filtered above.
+            stmt = stmt.where(
+                sql_model.id.in_(
+                    select(sql_model.id)
+                    .order_by(sql_model.embedding.l2_distance(embedding))
+                    .limit(candidates)
+                )
+            )
+        stmt = stmt.order_by(sql_model.embedding.l2_distance(embedding))
+        stmt = stmt.limit(limit)
+        return stmt
+
+    @staticmethod
+    def _explain_stmt(stmt: "Select", *, analyze: bool) -> Explain:
+        return Explain(
+            stmt, ("ANALYZE", "BUFFERS", "FORMAT JSON") if analyze else ("FORMAT JSON",)
+        )
+
+    def _query_plan(self, document: Any) -> QueryPlan:
+        return QueryPlan.from_explain(document, vector_index=self._client.vector_index)
+
+    def _sample_plan(self) -> bool:
+        sampler = self._client.plan_sampler
+        return sampler is not None and sampler.sample()
+
+    def _oversample(self, search_params: Optional[SearchParams]) -> int:
+        if search_params is None or search_params.oversample is None:
+            return self.default_oversample
+        return search_params.oversample
+
+    def _filter_clause(self, query_filter: QueryFilter) -> Optional["TextClause"]:
+        if query_filter.empty:
+            return None
+        table_name = self._client.model.sql_model().__table__.name
+        return sql_text(" AND ".join(query_filter.conditions(table_name))).bindparams(
+            **query_filter.params()
+        )
+
+    def _candidates_stmt(
+        self,
+        embedding: List[float] | npt.NDArray[np.float32],
+        *,
+        limit: int,
+        where: Optional["TextClause"] = None,
+    ) -> "Select":
+        """Ids of the nearest points by the quantized index expression."""
+
+        config = self._client.index_config
+        dimensions = self._client.vector_dimensions
+        sql_model = self._client.model.sql_model()
+        table_name = sql_model.__table__.name
+        distance = sql_text(
+            config.index_expression(f"{table_name}.embedding", dimensions)
+            + f" {config.distance_operator()} "
+            + config.index_expression(
+                f"CAST(:query_embedding AS vector({dimensions}))", dimensions
+            )
+        ).bindparams(
+            query_embedding=vectors_to_text(
+                np.asarray(embedding, dtype=np.float32)[None]
+            )[0]
+        )
+        stmt = select(sql_model.id)
+        if where is not None:
+            stmt = stmt.where(where)
+        return stmt.order_by(distance).limit(limit)
+
+    def _query_batch_stmt(
+        self,
+        search_params: Optional[SearchParams] = None,
+        *,
+        limit: int,
+        query_filter: Optional[QueryFilter] = None,
+    ) -> "TextClause":
+        """Top-k per staged query vector with `ord` in `[:first, :last]`.
+
+        The filter's values are bound by name.
+        """
+
+        search_params = search_params or SearchParams()
+        query_filter = query_filter or QueryFilter()
+        table_name = self._client.model.sql_model().__table__.name
+        if self._client.partition_by_model and query_filter.model is not None:
+            # Search only the model's partition and its index.
+            table_name = model_relation_name(table_name, query_filter.model)
+        config = self._client.index_config
+        post_filter = self._post_filter(query_filter, search_params)
+        candidates = limit * (search_params.filter_oversample if post_filter else 1)
+        inner_where = (
+            ""
+            if post_filter or query_filter.empty
+            else "WHERE " + " AND ".join(query_filter.conditions("c")) + " "
+        )
+        if config.quantization == "none" and not post_filter:
+            source = f"{table_name} p "
+        else:
+            # Over-fetch by the (quantized) index order, then re-rank or
+            # filter below.
+            dimensions = self._client.vector_dimensions
+            if config.quantization != "none":
+                candidates *= self._oversample(search_params)
+            source = (
+                f"(SELECT c.* FROM {table_name} c {inner_where}ORDER BY "
+                + config.index_expression("c.embedding", dimensions)
+                + f" {config.distance_operator()} "
+                + config.index_expression("q.embedding", dimensions)
+                + f" LIMIT {int(candidates)}) p "
+            )
+        if not query_filter.empty:
+            source += "WHERE " + " AND ".join(query_filter.conditions("p")) + " "
+        return sql_text(
+            "SELECT q.ord, r.id, r.distance "
+            + f"FROM {self._queries_table_name()} q "
+            + "CROSS JOIN LATERAL ("
+            + "SELECT p.id, p.embedding <-> q.embedding AS distance "
+            + f"FROM {source}"
+            + "ORDER BY p.embedding <-> q.embedding "
+            + "LIMIT :limit"
+            + ") r "
+            + "WHERE q.ord BETWEEN :first AND :last "
+            + "ORDER BY q.ord, r.distance"
+        )
+
+    def _queries_table_name(self) -> Text:
+        return f"{self._client.model.sql_model().__table__.name}_queries"
+
+    def _create_queries_stmts(self) -> List["TextClause"]:
+        """Temporary table of the query vectors of one `query_batch` call.
+
+        Vectors are kept inline: a TOASTed query vector would be fetched
+        again for every distance computed against it.
+        """
+
+        table_name = self._queries_table_name()
+        return [
+            sql_text(
+                f"CREATE TEMP TABLE {table_name} (ord integer PRIMARY KEY, "
+                + f"embedding vector({self._client.vector_dimensions})) "
+                + "ON COMMIT DROP"
+            ),
+            sql_text(
+                f"ALTER TABLE {table_name} ALTER COLUMN embedding SET STORAGE MAIN"
+            ),
+        ]
+
+    def _queries_target(
+        self, embeddings: npt.NDArray[np.float32]
+    ) -> Tuple[Text, Iterator[bytes]]:
+        return (
+            f"COPY {self._queries_table_name()} (ord, embedding) "
+            + "FROM STDIN WITH (FORMAT BINARY)",
+            iter_copy_vectors(embeddings),
+        )
+
+    def _query_batch_arrays(
+        self, embeddings: npt.ArrayLike, *, limit: int
+    ) -> Tuple[npt.NDArray[np.float32], npt.NDArray[np.int64], npt.NDArray[np.float32]]:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or (
+            embeddings.shape[1] != self._client.vector_dimensions
+        ):
+            raise ValueError(
+                "Embeddings must be an (N, D) array with "
+                + f"D={self._client.vector_dimensions}"
+            )
+        ids = np.full((len(embeddings), limit), -1, dtype=np.int64)
+        distances = np.full((len(embeddings), limit), np.inf, dtype=np.float32)
+        return embeddings, ids, distances
+
+    @staticmethod
+    def _fill_query_batch(
+        ids: npt.NDArray[np.int64],
+        distances: npt.NDArray[np.float32],
+        result: Sequence[Any],
+    ) -> None:
+        if not result:
+            return
+        ords, _ids, _distances = (np.asarray(col) for col in zip(*result))
+        rows = ords.astype(np.int64) - 1
+        ranks = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        ids[rows, ranks] = _ids
+        distances[rows, ranks] = _distances
+
+    def _list_stmt(
+        self,
+        *,
+        text: Optional[Text],
+        model: Optional[Text],
+        limit: int,
+        offset: Optional[int],
+        sort_desc: bool,
+        columns: Optional[Sequence[Any]] = None,
+    ) -> "Select":
+        limit = max(1, min(limit, self.hard_limit))
+
+        sql_model = self._client.model.sql_model()
+
+        stmt = select(*(columns or [sql_model]))
+        if text is not None:
+            stmt = stmt.where(sql_model.text.ilike(f"%{text}%"))
+        if model is not None:
+            stmt = stmt.where(sql_model.model == model)
+        stmt = stmt.limit(limit)
+        if offset is not None:
+            stmt = stmt.offset(offset)
+        stmt = stmt.order_by(
+            sql_model.created_at.desc() if sort_desc else sql_model.created_at.asc()
+        )
+        return stmt
+
+    def _batch_columns(
+        self, columns: Sequence[ScalarColumn], with_embedding: bool
+    ) -> List[Any]:
+        """Columns of a `PointBatch`, the embedding in pgvector's binary form."""
+
+        sql_model = self._client.model.sql_model()
+        unknown = set(columns) - set(SCALAR_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown columns: {sorted(unknown)}")
+        batch_columns = [sql_model.id]
+        batch_columns += [getattr(sql_model, column) for column in columns]
+        if with_embedding:
+            batch_columns.append(
+                func.vector_send(sql_model.embedding, type_=LargeBinary).label(
+                    "embedding"
+                )
+            )
+        return batch_columns
+
+    def _point_batch(
+        self,
+        rows: Sequence[Any],
+        *,
+        columns: Sequence[ScalarColumn],
+        with_embedding: bool,
+        distances: bool,
+    ) -> PointBatch:
+        names = ["id", *columns] + (["embedding"] if with_embedding else [])
+        names += ["distance"] if distances else []
+        values = dict(zip(names, zip(*rows))) if rows else {n: () for n in names}
+        return PointBatch.model_construct(
+            ids=np.array(values["id"], dtype=np.int64),
+            texts=list(values["text"]) if "text" in values else None,
+            models=list(values["model"]) if "model" in values else None,
+            embeddings=(
+                decode_vectors(values["embedding"], self._client.vector_dimensions)
+                if with_embedding
+                else None
+            ),
+            created_at=(
+                np.array(values["created_at"], dtype="datetime64[us]")
+                if "created_at" in values
+                else None
+            ),
+            distances=(
+                np.array(values["distance"], dtype=np.float32) if distances else None
+            ),
+        )
+
+    def _fetch_embeddings_stmt(self) -> "Select":
+        sql_model = self._client.model.sql_model()
+        return select(
+            sql_model.id,
+            func.vector_send(sql_model.embedding, type_=LargeBinary),
+        ).where(sql_model.id == func.any(bindparam("ids")))
+
+    def _ordered_embeddings(
+        self, ids: npt.NDArray[np.int64], rows: Sequence[Any]
+    ) -> npt.NDArray[np.float32]:
+        found_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        missing = np.setdiff1d(ids, found_ids)
+        if len(missing) > 0:
+            raise pgvector_perf.exceptions.PointNotFoundError(
+                f"No points found with IDs: {missing[:10].tolist()}"
+            )
+        embeddings = decode_vectors(
+            [row[1] for row in rows], self._client.vector_dimensions
+        )
+        order = np.argsort(found_ids)
+        return embeddings[order[np.searchsorted(found_ids, ids, sorter=order)]]
+
+    def _copy_columns(
+        self,
+        points: Optional[Sequence[PointType] | PointBatch],
+        *,
+        ids: Optional[npt.ArrayLike],
+        texts: Optional[Sequence[Text]],
+        models: Optional[Sequence[Text] | Text],
+        embeddings: Optional[npt.ArrayLike],
+    ) -> CopyColumns:
+        if isinstance(points, PointBatch):
+            if points.texts is None or points.models is None:
+                raise ValueError("Point batch has no texts or models")
+            if points.embeddings is None:
+                raise ValueError("Point batch has no embeddings")
+            texts, models = points.texts, points.models
+            embeddings = np.asarray(points.embeddings, dtype=np.float32)
+            ids = np.array(points.ids, dtype=np.int64)
+            created_at = (
+                np.full(
+                    len(texts),
+                    to_postgres_timestamp(datetime.now(tz=pytz.utc)),
+                    dtype=np.int64,
+                )
+                if points.created_at is None
+                else (
+                    points.created_at.astype("datetime64[us]")
+                    - np.datetime64(POSTGRES_EPOCH, "us")
+                ).astype(np.int64)
+            )
+        elif points is not None:
+            texts = [point.text for point in points]
+            models = [point.model for point in points]
+            embeddings = np.empty(
+                (len(points), self._client.vector_dimensions), dtype=np.float32
+            )
+            for i, point in enumerate(points):
+                embeddings[i] = point.embedding
+            ids = np.array(
+                [-1 if point.id is None else point.id for point in points],
+                dtype=np.int64,
+            )
+            created_at = np.fromiter(
+                (to_postgres_timestamp(point.created_at) for point in points),
+                dtype=np.int64,
+                count=len(points),
+            )
+        elif texts is not None and models is not None and embeddings is not None:
+            if isinstance(models, Text):
+                models = [models] * len(texts)
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            ids = (
+                np.full(len(texts), -1, dtype=np.int64)
+                if ids is None
+                else np.array(ids, dtype=np.int64)
+            )
+            created_at = np.full(
+                len(texts),
+                to_postgres_timestamp(datetime.now(tz=pytz.utc)),
+                dtype=np.int64,
+            )
+        else:
+            raise ValueError("No points or columnar batch provided")
+
+        if embeddings.ndim != 2 or not (len(embeddings) == len(ids) == len(texts)):
+            raise ValueError("Embeddings must be an (N, D) array matching texts")
+        if len(texts) > 0 and embeddings.shape[1] != self._client.vector_dimensions:
+            raise ValueError(
+                f"Embedding must have {self._client.vector_dimensions} dimensions"
+            )
+        return ids, texts, models, embeddings, created_at
+
+    def _copy_targets(
+        self, columns: CopyColumns, *, chunk_size: int
+    ) -> List[Tuple[Text, Iterator[bytes]]]:
+        """`COPY` statements and their binary data for a batch.
+
+        Rows of a table partitioned by model are copied straight into their
+        model's partition instead of being routed by the server row by row.
+        """
+
+        ids, texts, models, embeddings, created_at = columns
+        if not self._client.partition_by_model:
             return [
+                (
+                    self._copy_sql(),
+                    iter_copy_binary(
+                        ids,
+                        embeddings,
+                        created_at,
+                        texts,
+                        models,
+                        chunk_size=chunk_size,
+                    ),
+                )
+            ]
+        table_name = self._client.model.sql_model().__table__.name
+        names, inverse = np.unique(
+            np.asarray(models, dtype=object), return_inverse=True
+        )
+        targets: List[Tuple[Text, Iterator[bytes]]] = []
+        for i, model in enumerate(names.tolist()):
+            rows = np.flatnonzero(inverse == i)
+            targets.append(
+                (
+                    self._copy_sql(model_relation_name(table_name, model)),
+                    iter_copy_binary(
+                        ids[rows],
+                        embeddings[rows],
+                        created_at[rows],
+                        [texts[row] for row in rows.tolist()],
+                        [model] * len(rows),
+                        chunk_size=chunk_size,
+                    ),
+                )
+            )
+        return targets
+
+    def _copy_sql(self, table_name: Optional[Text] = None) -> Text:
+        table_name = table_name or self._client.model.sql_model().__table__.name
+        return (
+            f"COPY {table_name} ({', '.join(COPY_COLUMNS)}) "
+            + "FROM STDIN WITH (FORMAT BINARY)"
+        )
+
+    def _allocate_ids_stmt(self) -> "TextClause":
+        table_name = self._client.model.sql_model().__table__.name
+        return sql_text(
+            f"SELECT nextval(pg_get_serial_sequence('{table_name}', 'id')) "
+            + "FROM generate_series(1, :count)"
+        )
+
+    def _sync_sequence_stmt(self) -> "TextClause":
+        """Move the id sequence past the largest id, never backwards.
+
+        Sequence values are not transactional: ids taken by uncommitted
+        transactions, or of deleted rows, can be above `MAX(id)`.
+        """
+
+        table_name = self._client.model.sql_model().__table__.name
+        sequence = f"pg_get_serial_sequence('{table_name}', 'id')"
+        return sql_text(
+            f"SELECT setval({sequence}, GREATEST((SELECT MAX(id) FROM {table_name}), "
+            + f"pg_sequence_last_value({sequence})))"
+        )
+
+    def _stage_table_name(self) -> Text:
+        return f"{self._client.model.sql_model().__table__.name}_stage"
+
+    def _stage_target(
+        self, columns: CopyColumns, *, chunk_size: int
+    ) -> Tuple[Text, Iterator[bytes]]:
+        ids, texts, models, embeddings, created_at = columns
+        return (
+            self._copy_sql(self._stage_table_name()),
+            iter_copy_binary(
+                ids, embeddings, created_at, texts, models, chunk_size=chunk_size
+            ),
+        )
+
+    def _create_stage_stmt(self) -> "TextClause":
+        table_name = self._client.model.sql_model().__table__.name
+        return sql_text(
+            f"CREATE TEMP TABLE {self._stage_table_name()} "
+            + f"(LIKE {table_name}) ON COMMIT DROP"
+        )
+
+    def _move_partitions_stmt(self) -> "TextClause":
+        """Delete upserted points whose model, and so partition, changes.
+
+        Their `created_at` is copied into the stage table, so the rows
+        inserted in the new partition keep it.
+        """
+
+        table_name = self._client.model.sql_model().__table__.name
+        stage_name = self._stage_table_name()
+        return sql_text(
+            f"WITH moved AS (DELETE FROM {table_name} AS p USING {stage_name} AS s "
+            + "WHERE p.id = s.id AND p.model <> s.model "
+            + "RETURNING p.id, p.created_at) "
+            + f"UPDATE {stage_name} AS s SET created_at = moved.created_at "
+            + "FROM moved WHERE s.id = moved.id"
+        )
+
+    def _upsert_stmt(self) -> "TextClause":
+        """Insert the staged points, replacing rows with the same id.
+
+        A partitioned table's primary key is `(id, model)`, so rows are
+        matched on both and `_move_partitions_stmt` runs first. Existing
+        rows keep their `created_at`.
+        """
+
+        table_name = self._client.model.sql_model().__table__.name
+        columns = ", ".join(COPY_COLUMNS)
+        if self._client.partition_by_model:
+            conflict, updates = "id, model", ("text", "embedding")
+        else:
+            conflict, updates = "id", ("text", "model", "embedding")
+        return sql_text(
+            f"INSERT INTO {table_name} ({columns}) "
+            + f"SELECT {columns} FROM {self._stage_table_name()} "
+            + f"ON CONFLICT ({conflict}) DO UPDATE SET "
+            + ", ".join(f"{column} = EXCLUDED.{column}" for column in updates)
+        )
+
+    def _update_batch_columns(
+        self,
+        ids: npt.ArrayLike,
+        *,
+        texts: Optional[Sequence[Text]],
+        models: Optional[Sequence[Text] | Text],
+        embeddings: Optional[npt.ArrayLike],
+    ) -> Tuple[npt.NDArray[np.int64], Dict[Text, Any]]:
+        ids = np.array(ids, dtype=np.int64).reshape(-1)
+        columns: Dict[Text, Any] = {}
+        if texts is not None:
+            columns["text"] = list(texts)
+        if models is not None:
+            columns["model"] = (
+                [models] * len(ids) if isinstance(models, Text) else list(models)
+            )
+        if embeddings is not None:
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            if embeddings.ndim != 2 or (
+                len(embeddings) > 0
+                and embeddings.shape[1] != self._client.vector_dimensions
+            ):
+                raise ValueError(
+                    "Embeddings must be an (N, D) array with "
+                    + f"{self._client.vector_dimensions} dimensions"
+                )
+            columns["embedding"] = embeddings
+        if len(columns) == 0:
+            raise ValueError("No texts, models or embeddings provided to update.")
+        if any(len(values) != len(ids) for values in columns.values()):
+            raise ValueError("Columns must have one row per id")
+        self._check_unique_ids(ids)
+        return ids, columns
+
+    @staticmethod
+    def _check_unique_ids(ids: npt.NDArray[np.int64]) -> None:
+        given = ids[ids >= 0]
+        if len(np.unique(given)) != len(given):
+            raise ValueError("Ids must be unique within a batch")
+
+    def _update_batch_stmt(
+        self, columns: Sequence[Text], *, staged: bool
+    ) -> "TextClause":
+        """`UPDATE ... FROM` the staging table, or `unnest` of array parameters.
+
+        Embeddings are staged with binary `COPY` since formatting them as
+        text literals costs more than the update. Text and model updates
+        send one array per column, which keeps the statement the same for
+        every chunk, unlike a `VALUES` list with one placeholder per row.
+        """
+
+        table_name = self._client.model.sql_model().__table__.name
+        if staged:
+            source = self._stage_table_name()
+        else:
+            arrays = ", ".join(f"CAST(:{column} AS text[])" for column in columns)
+            source = (
+                f"unnest(CAST(:ids AS integer[]), {arrays}) "
+                + f"AS s(id, {', '.join(columns)})"
+            )
+        return sql_text(
+            f"UPDATE {table_name} AS p SET "
+            + ", ".join(f"{column} = s.{column}" for column in columns)
+            + f" FROM {source}"
+            + (" AS s" if staged else "")
+            + " WHERE p.id = s.id RETURNING p.id"
+        )
+
+    @staticmethod
+    def _stage_columns(
+        ids: npt.NDArray[np.int64], columns: Dict[Text, Any]
+    ) -> CopyColumns:
+        """Rows to stage for `update_batch`; columns not updated are blank."""
+
+        blank = [""] * len(ids)
+        return (
+            ids,
+            columns.get("text", blank),
+            columns.get("model", blank),
+            columns["embedding"],
+            np.zeros(len(ids), dtype=np.int64),
+        )
+
+    @staticmethod
+    def _update_batch_params(
+        ids: npt.NDArray[np.int64], columns: Dict[Text, Any], start: int, end: int
+    ) -> Dict[Text, Any]:
+        params: Dict[Text, Any] = {"ids": ids[start:end].tolist()}
+        for column, values in columns.items():
+            params[column] = values[start:end]
+        return params
+
+    @staticmethod
+    def _affected_ids(
+        ids: npt.NDArray[np.int64], affected: Sequence[int]
+    ) -> npt.NDArray[np.int64]:
+        """The affected ids, in the order they were given."""
+
+        return ids[np.isin(ids, np.asarray(affected, dtype=np.int64))]
+
+    @staticmethod
+    def _assign_ids(
+        points: Optional[Sequence[PointType] | PointBatch], ids: npt.NDArray[np.int64]
+    ) -> None:
+        if isinstance(points, PointBatch):
+            points.ids = ids
+        elif points is not None:
+            for point, id in zip(points, ids.tolist()):
+                point.id = id
+
+    def _copy_result(
+        self,
+        points: Optional[Sequence[PointType] | PointBatch],
+        ids: npt.NDArray[np.int64],
+        elapsed: float,
+    ) -> BulkInsertResult:
+        result = BulkInsertResult(ids=ids, elapsed=elapsed)
+        self._assign_ids(points, ids)
+        logger.info(
+            f"Copied {result.rows} points in {result.elapsed:.2f}s "
+            + f"({result.rows_per_second:,.0f} rows/s)."
+        )
+        return result
+
+    @staticmethod
+    def _update_attrs(
+        point: Optional[PointType],
+        update_attrs: Optional[Dict[Text, Any]],
+        kwargs: Dict[Text, Any],
+    ) -> Dict[Text, Any]:
+        _update_attrs = {} if point is None else point.model_dump(exclude_none=True)
+        _update_attrs.update(update_attrs or {})
+        _update_attrs.update(kwargs)
+        if len(_update_attrs) == 0:
+            raise ValueError("No attributes provided to update.")
+        return _update_attrs
+
+
+class Points(BasePoints[PointType]):
+
+    _client: "PgvectorPerf[PointType]"
+
+    def __init__(self, client: "PgvectorPerf[PointType]"):
+        self._client = client
+
+    @instrumented("points.query")
+    def query(
+        self,
+        embedding: List[float],
+        *args,
+        limit: int = 5,
+        within_distance: Optional[float] = None,
+        search_params: Optional[SearchParams] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        model: Optional[Text] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        **kwargs,
+    ) -> List[Tuple[PointType, float]]:
+        """Nearest points to `embedding` by l2 distance.
+
+        `search_params`, `ef_search` and `probes` override the client's
+        `search_params` for this call; they are applied with `SET LOCAL`, so
+        they only last for the query's transaction. Results are served from
+        and stored in the client's `query_cache`, if any.
+
+        `model`, `created_after` and `created_before` restrict the results
+        (see `QueryFilter`). A per-model partial index from
+        `Index.create(model=...)` serves `model` filters directly; otherwise
+        a selective filter needs `SearchParams.iterative_scan` or
+        `filter_oversample` to return `limit` rows.
+        """
+
+        _search_params = self._search_params(
+            search_params, ef_search=ef_search, probes=probes
+        )
+        query_filter = self._query_filter(model, created_after, created_before)
+        key = self._cache_key(
+            embedding,
+            limit=limit,
+            within_distance=within_distance,
+            search_params=_search_params,
+            query_filter=query_filter,
+        )
+        cached = self._cached_query(key)
+        if cached is not None:
+            return cached
+        version = (
+            0 if self._client.query_cache is None else self._client.query_cache.version
+        )
+
+        stmt = self._query_stmt(
+            embedding,
+            limit=limit,
+            within_distance=within_distance,
+            search_params=_search_params,
+            query_filter=query_filter,
+        )
+        set_local_stmt = self._set_local_stmt(_search_params)
+
+        with self._client.session_factory() as session:
+            if set_local_stmt is not None:
+                session.execute(set_local_stmt)
+            result = session.execute(stmt).all()
+            points_with_distance = [
                 (self._client.model.from_sql(point), distance)
-                for point, distance in result
+                for point, distance in self._order_rows(result, _search_params)
             ]
+        if self._sample_plan():
+            self._client.plan_sampler.submit(
+                functools.partial(self._explain_sampled, stmt, set_local_stmt)
+            )
+        self._cache_query(key, version, points_with_distance)
+        return points_with_distance
+
+    def _explain_sampled(
+        self, stmt: "Select", set_local_stmt: Optional["TextClause"]
+    ) -> QueryPlan:
+        with self._client.session_factory() as session:
+            if set_local_stmt is not None:
+                session.execute(set_local_stmt)
+            document = session.execute(
+                self._explain_stmt(stmt, analyze=True)
+            ).scalar_one()
+            session.rollback()
+        return self._query_plan(document)
+
+    @instrumented("points.explain_query")
+    def explain_query(
+        self,
+        embedding: List[float],
+        *args,
+        limit: int = 5,
+        within_distance: Optional[float] = None,
+        search_params: Optional[SearchParams] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        model: Optional[Text] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        analyze: bool = True,
+        **kwargs,
+    ) -> QueryPlan:
+        """The plan of `query` with the same arguments, see `QueryPlan`.
+
+        `QueryPlan.index_scan` tells whether the vector index was used. With
+        `analyze` (the default) the query is executed by `EXPLAIN (ANALYZE,
+        BUFFERS)`, which adds timings and buffer hits and reads; otherwise it
+        is only planned. The query cache is bypassed.
+        """
+
+        _search_params = self._search_params(
+            search_params, ef_search=ef_search, probes=probes
+        )
+        stmt = self._query_stmt(
+            embedding,
+            limit=limit,
+            within_distance=within_distance,
+            search_params=_search_params,
+            query_filter=self._query_filter(model, created_after, created_before),
+        )
+        set_local_stmt = self._set_local_stmt(_search_params)
+
+        with self._client.session_factory() as session:
+            if set_local_stmt is not None:
+                session.execute(set_local_stmt)
+            document = session.execute(
+                self._explain_stmt(stmt, analyze=analyze)
+            ).scalar_one()
+            # EXPLAIN ANALYZE of a statement runs it, never keep its effects.
+            session.rollback()
+        return self._query_plan(document)
+
+    @instrumented("points.query_batch")
+    def query_batch(
+        self,
+        embeddings: npt.ArrayLike,
+        *args,
+        limit: int = 5,
+        batch_size: Optional[int] = None,
+        search_params: Optional[SearchParams] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        model: Optional[Text] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        **kwargs,
+    ) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.float32]]:
+        """Run one top-k search per row of an `(N, D)` array in one statement.
+
+        Returns `(ids, distances)` arrays of shape `(N, limit)`; slots without
+        a neighbor are filled with `-1` and `inf`. `batch_size` bounds the
+        number of queries sent per statement (all of them by default). Search
+        parameters and filters apply to every statement, as in `query`.
+        """
+
+        limit = max(1, min(limit, self.hard_limit))
+        embeddings, ids, distances = self._query_batch_arrays(embeddings, limit=limit)
+        batch_size = max(1, batch_size or len(embeddings))
+        _search_params = self._search_params(
+            search_params, ef_search=ef_search, probes=probes
+        )
+        query_filter = self._query_filter(model, created_after, created_before)
+        stmt = self._query_batch_stmt(
+            _search_params, limit=limit, query_filter=query_filter
+        )
+        set_local_stmt = self._set_local_stmt(_search_params)
+
+        if len(embeddings) == 0:
+            return ids, distances
+        with self._client.session_factory() as session:
+            # Query vectors go through binary COPY: text literals of a large
+            # batch take longer to format than the search itself.
+            for create_stmt in self._create_queries_stmts():
+                session.execute(create_stmt)
+            copy_sql, data = self._queries_target(embeddings)
+            copy_start = time.perf_counter()
+            copy_from(
+                session.connection().connection.dbapi_connection,
+                copy_sql,
+                count_sent(data),
+            )
+            record_statement(time.perf_counter() - copy_start)
+            if set_local_stmt is not None:
+                session.execute(set_local_stmt)
+            for start in range(0, len(embeddings), batch_size):
+                result = session.execute(
+                    stmt,
+                    {
+                        "first": start + 1,
+                        "last": start + batch_size,
+                        "limit": limit,
+                        **query_filter.params(),
+                    },
+                ).all()
+                self._fill_query_batch(ids, distances, result)
+        return ids, distances
+
+    @instrumented("points.query_columns")
+    def query_columns(
+        self,
+        embedding: npt.ArrayLike,
+        *args,
+        limit: int = 5,
+        within_distance: Optional[float] = None,
+        search_params: Optional[SearchParams] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        model: Optional[Text] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        columns: Sequence[ScalarColumn] = SCALAR_COLUMNS,
+        with_embedding: bool = True,
+        **kwargs,
+    ) -> PointBatch:
+        """Like `query`, but returns the hits as a `PointBatch`.
+
+        Embeddings are read as `vector_send` bytes and decoded in one pass
+        into a float32 array; `distances` holds the l2 distances. Only `id`,
+        the scalar `columns` and, with `with_embedding`, the embedding are
+        selected, so `columns=(), with_embedding=False` transfers just ids
+        and distances. Embeddings left out can be loaded later with
+        `fetch_embeddings`.
+        """
+
+        _search_params = self._search_params(
+            search_params, ef_search=ef_search, probes=probes
+        )
+        query_filter = self._query_filter(model, created_after, created_before)
+        stmt = self._query_stmt(
+            np.asarray(embedding, dtype=np.float32),
+            limit=limit,
+            within_distance=within_distance,
+            columns=self._batch_columns(columns, with_embedding),
+            search_params=_search_params,
+            query_filter=query_filter,
+        )
+        set_local_stmt = self._set_local_stmt(_search_params)
+
+        with self._client.session_factory() as session:
+            if set_local_stmt is not None:
+                session.execute(set_local_stmt)
+            result = session.execute(stmt).all()
+        return self._point_batch(
+            self._order_rows(result, _search_params),
+            columns=columns,
+            with_embedding=with_embedding,
+            distances=True,
+        )
 
+    @instrumented("points.list")
     def list(
         self,
         *args,
@@ -79,25 +1143,48 @@ class Points(Generic[PointType]):
         sort_desc: bool = True,
         **kwargs,
     ) -> List[PointType]:
-        limit = max(1, min(limit, self.hard_limit))
-
-        sql_model = self._client.model.sql_model()
+        stmt = self._list_stmt(
+            text=text, model=model, limit=limit, offset=offset, sort_desc=sort_desc
+        )
 
         with self._client.session_factory() as session:
-            stmt = select(sql_model)
-            if text is not None:
-                stmt.where(sql_model.text.ilike(f"%{text}%"))
-            if model is not None:
-                stmt = stmt.where(sql_model.model == model)
-            stmt = stmt.limit(limit)
-            if offset is not None:
-                stmt = stmt.offset(offset)
-            stmt = stmt.order_by(
-                sql_model.created_at.desc() if sort_desc else sql_model.created_at.asc()
-            )
             result = session.execute(stmt).scalars().all()
             return [self._client.model.from_sql(point) for point in result]
 
+    @instrumented("points.list_columns")
+    def list_columns(
+        self,
+        *args,
+        text: Optional[Text] = None,
+        model: Optional[Text] = None,
+        limit: int = 5,
+        offset: Optional[int] = None,
+        sort_desc: bool = True,
+        columns: Sequence[ScalarColumn] = SCALAR_COLUMNS,
+        with_embedding: bool = True,
+        **kwargs,
+    ) -> PointBatch:
+        """Like `list`, but returns the points as a `PointBatch`.
+
+        `columns` and `with_embedding` select the columns as in
+        `query_columns`.
+        """
+
+        stmt = self._list_stmt(
+            text=text,
+            model=model,
+            limit=limit,
+            offset=offset,
+            sort_desc=sort_desc,
+            columns=self._batch_columns(columns, with_embedding),
+        )
+
+        with self._client.session_factory() as session:
+            result = session.execute(stmt).all()
+        return self._point_batch(
+            result, columns=columns, with_embedding=with_embedding, distances=False
+        )
+
     @overload
     def retrieve(
         self, id: int, *args, not_found_ok: Literal[False] = False, **kwargs
@@ -108,6 +1195,7 @@ class Points(Generic[PointType]):
         self, id: int, *args, not_found_ok: Literal[True], **kwargs
     ) -> Optional[PointType]: ...
 
+    @instrumented("points.retrieve")
     def retrieve(
         self, id: int, *args, not_found_ok: bool = False, **kwargs
     ) -> Optional[PointType]:
@@ -129,18 +1217,43 @@ class Points(Generic[PointType]):
             else:
                 return self._client.model.from_sql(point)
 
+    @instrumented("points.fetch_embeddings")
+    def fetch_embeddings(
+        self, ids: npt.ArrayLike, *args, **kwargs
+    ) -> npt.NDArray[np.float32]:
+        """Embeddings of `ids` as an `(N, D)` float32 array, in the given order.
+
+        Loads what a projection without embeddings deferred; raises
+        `PointNotFoundError` if any id does not exist.
+        """
+
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return np.empty((0, self._client.vector_dimensions), dtype=np.float32)
+
+        with self._client.session_factory() as session:
+            result = session.execute(
+                self._fetch_embeddings_stmt(), {"ids": np.unique(ids).tolist()}
+            ).all()
+        return self._ordered_embeddings(ids, result)
+
+    @instrumented("points.create")
     def create(self, point: PointType, *args, **kwargs) -> PointType:
+        self._client.tables.ensure_partitions([point.model])
         with self._client.session_factory() as session:
             sql_point = self._client.model.to_sql(point)
             session.add(sql_point)
             session.commit()
+            self._invalidate_cache()
             session.refresh(sql_point)
             return point.update_from_sql(sql_point)
 
+    @instrumented("points.create_batch")
     def create_batch(
         self, points: Sequence[PointType], *args, batch_size: int = 16, **kwargs
     ) -> List[PointType]:
         output_points: List[PointType] = []
+        self._client.tables.ensure_partitions([point.model for point in points])
         with self._client.session_factory() as session:
             for points_chunk in batch_process(points, batch_size=batch_size):
                 sql_points = [
@@ -148,12 +1261,161 @@ class Points(Generic[PointType]):
                 ]
                 session.add_all(sql_points)
                 session.commit()
+                self._invalidate_cache()
                 for _point, sql_point in zip(points_chunk, sql_points):
                     session.refresh(sql_point)
                     _point.update_from_sql(sql_point)
                     output_points.append(_point)
         return output_points
 
+    @instrumented("points.copy_batch")
+    def copy_batch(
+        self,
+        points: Optional[Sequence[PointType] | PointBatch] = None,
+        *args,
+        ids: Optional[npt.ArrayLike] = None,
+        texts: Optional[Sequence[Text]] = None,
+        models: Optional[Sequence[Text] | Text] = None,
+        embeddings: Optional[npt.ArrayLike] = None,
+        chunk_size: int = 1000,
+        **kwargs,
+    ) -> BulkInsertResult:
+        """Bulk insert points with `COPY ... FROM STDIN (FORMAT BINARY)`.
+
+        Accepts a sequence of points or a `PointBatch`, whose ids are set in
+        place, or a columnar batch of `texts`, `models` and an `(N, D)`
+        `embeddings` array with optional explicit `ids`. Points without an id
+        get one from the table's sequence.
+        """
+
+        columns = self._copy_columns(
+            points, ids=ids, texts=texts, models=models, embeddings=embeddings
+        )
+        ids = columns[0]
+
+        start = time.perf_counter()
+        self._client.tables.ensure_partitions(columns[2])
+        with self._client.engine.begin() as connection:
+            missing = ids < 0
+            ids[missing] = self._allocate_ids(connection, int(missing.sum()))
+            given = len(ids) - int(missing.sum())
+            if len(ids) > 0:
+                for copy_sql, data in self._copy_targets(
+                    columns, chunk_size=chunk_size
+                ):
+                    copy_start = time.perf_counter()
+                    copy_from(
+                        connection.connection.dbapi_connection,
+                        copy_sql,
+                        count_sent(data),
+                    )
+                    record_statement(time.perf_counter() - copy_start)
+            if given > 0:
+                connection.execute(self._sync_sequence_stmt())
+        self._invalidate_cache()
+        return self._copy_result(points, ids, time.perf_counter() - start)
+
+    @instrumented("points.upsert_batch")
+    def upsert_batch(
+        self,
+        points: Optional[Sequence[PointType] | PointBatch] = None,
+        *args,
+        ids: Optional[npt.ArrayLike] = None,
+        texts: Optional[Sequence[Text]] = None,
+        models: Optional[Sequence[Text] | Text] = None,
+        embeddings: Optional[npt.ArrayLike] = None,
+        chunk_size: int = 1000,
+        **kwargs,
+    ) -> npt.NDArray[np.int64]:
+        """Insert points, or replace the text, model and embedding of the
+        points with the same ids, in one statement.
+
+        Takes the same batches as `copy_batch`. The points are copied into a
+        temporary table with binary `COPY`, then merged with `INSERT ... ON
+        CONFLICT DO UPDATE`. Returns the ids of all the points, which are
+        also set in place; points without an id are inserted with a new one.
+        """
+
+        columns = self._copy_columns(
+            points, ids=ids, texts=texts, models=models, embeddings=embeddings
+        )
+        ids = columns[0]
+        self._check_unique_ids(ids)
+
+        self._client.tables.ensure_partitions(columns[2])
+        with self._client.engine.begin() as connection:
+            missing = ids < 0
+            ids[missing] = self._allocate_ids(connection, int(missing.sum()))
+            given = len(ids) - int(missing.sum())
+            if len(ids) > 0:
+                connection.execute(self._create_stage_stmt())
+                copy_sql, data = self._stage_target(columns, chunk_size=chunk_size)
+                copy_start = time.perf_counter()
+                copy_from(
+                    connection.connection.dbapi_connection, copy_sql, count_sent(data)
+                )
+                record_statement(time.perf_counter() - copy_start)
+                if self._client.partition_by_model:
+                    connection.execute(self._move_partitions_stmt())
+                connection.execute(self._upsert_stmt())
+            if given > 0:
+                connection.execute(self._sync_sequence_stmt())
+        self._invalidate_cache()
+        self._assign_ids(points, ids)
+        return ids
+
+    @instrumented("points.update_batch")
+    def update_batch(
+        self,
+        ids: npt.ArrayLike,
+        *args,
+        texts: Optional[Sequence[Text]] = None,
+        models: Optional[Sequence[Text] | Text] = None,
+        embeddings: Optional[npt.ArrayLike] = None,
+        chunk_size: int = 1000,
+        **kwargs,
+    ) -> npt.NDArray[np.int64]:
+        """Update the given columns of many points in a few statements.
+
+        Only the columns passed are changed: for example, re-embedding a
+        corpus takes `ids` and an `(N, D)` `embeddings` array, which is
+        copied into a temporary table and applied in one `UPDATE`. Returns
+        the ids that were found and updated, in the order given; missing ids
+        are skipped.
+        """
+
+        ids, columns = self._update_batch_columns(
+            ids, texts=texts, models=models, embeddings=embeddings
+        )
+        if "model" in columns:
+            self._client.tables.ensure_partitions(columns["model"])
+        staged = "embedding" in columns
+        stmt = self._update_batch_stmt(list(columns), staged=staged)
+
+        chunk_size = max(1, chunk_size)
+        affected: List[int] = []
+        with self._client.engine.begin() as connection:
+            if not staged:
+                for start in range(0, len(ids), chunk_size):
+                    params = self._update_batch_params(
+                        ids, columns, start, start + chunk_size
+                    )
+                    affected.extend(connection.execute(stmt, params).scalars())
+            elif len(ids) > 0:
+                connection.execute(self._create_stage_stmt())
+                copy_sql, data = self._stage_target(
+                    self._stage_columns(ids, columns), chunk_size=chunk_size
+                )
+                copy_start = time.perf_counter()
+                copy_from(
+                    connection.connection.dbapi_connection, copy_sql, count_sent(data)
+                )
+                record_statement(time.perf_counter() - copy_start)
+                affected.extend(connection.execute(stmt).scalars())
+        self._invalidate_cache()
+        return self._affected_ids(ids, affected)
+
+    @instrumented("points.update")
     def update(
         self,
         id: int,
@@ -162,11 +1424,9 @@ class Points(Generic[PointType]):
         update_attrs: Optional[Dict[Text, Any]] = None,
         **kwargs,
     ) -> PointType:
-        _update_attrs = {} if point is None else point.model_dump(exclude_none=True)
-        _update_attrs.update(update_attrs or {})
-        _update_attrs.update(kwargs)
-        if len(_update_attrs) == 0:
-            raise ValueError("No attributes provided to update.")
+        _update_attrs = self._update_attrs(point, update_attrs, kwargs)
+        if _update_attrs.get("model") is not None:
+            self._client.tables.ensure_partitions([_update_attrs["model"]])
 
         # Validate that the ID is provided
         with self._client.session_factory() as session:
@@ -183,9 +1443,11 @@ class Points(Generic[PointType]):
                     setattr(sql_point, key, value)
 
             session.commit()
+            self._invalidate_cache()
             session.refresh(sql_point)
             return self._client.model.from_sql(sql_point)
 
+    @instrumented("points.delete")
     def delete(self, id: int, *args, not_found_ok: bool = False, **kwargs) -> bool:
         with self._client.session_factory() as session:
             sql_model = self._client.model._sql_model
@@ -200,4 +1462,531 @@ class Points(Generic[PointType]):
 
             session.delete(sql_point)
             session.commit()
+            self._invalidate_cache()
+            return True
+
+    def _allocate_ids(
+        self, connection: "Connection", count: int
+    ) -> npt.NDArray[np.int64]:
+        if count == 0:
+            return np.empty(0, dtype=np.int64)
+        result = connection.execute(self._allocate_ids_stmt(), {"count": count})
+        return np.fromiter(result.scalars(), dtype=np.int64, count=count)
+
+
+class AsyncPoints(BasePoints[PointType]):
+
+    _client: "AsyncPgvectorPerf[PointType]"
+
+    def __init__(self, client: "AsyncPgvectorPerf[PointType]"):
+        self._client = client
+
+    @instrumented("points.query")
+    async def query(
+        self,
+        embedding: List[float],
+        *args,
+        limit: int = 5,
+        within_distance: Optional[float] = None,
+        search_params: Optional[SearchParams] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        model: Optional[Text] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        **kwargs,
+    ) -> List[Tuple[PointType, float]]:
+        _search_params = self._search_params(
+            search_params, ef_search=ef_search, probes=probes
+        )
+        query_filter = self._query_filter(model, created_after, created_before)
+        key = self._cache_key(
+            embedding,
+            limit=limit,
+            within_distance=within_distance,
+            search_params=_search_params,
+            query_filter=query_filter,
+        )
+        cached = self._cached_query(key)
+        if cached is not None:
+            return cached
+        version = (
+            0 if self._client.query_cache is None else self._client.query_cache.version
+        )
+
+        stmt = self._query_stmt(
+            embedding,
+            limit=limit,
+            within_distance=within_distance,
+            search_params=_search_params,
+            query_filter=query_filter,
+        )
+        set_local_stmt = self._set_local_stmt(_search_params)
+
+        async with self._client.session_factory() as session:
+            if set_local_stmt is not None:
+                await session.execute(set_local_stmt)
+            result = (await session.execute(stmt)).all()
+            points_with_distance = [
+                (self._client.model.from_sql(point), distance)
+                for point, distance in self._order_rows(result, _search_params)
+            ]
+        if self._sample_plan():
+            self._client.plan_sampler.asubmit(
+                functools.partial(self._explain_sampled, stmt, set_local_stmt)
+            )
+        self._cache_query(key, version, points_with_distance)
+        return points_with_distance
+
+    async def _explain_sampled(
+        self, stmt: "Select", set_local_stmt: Optional["TextClause"]
+    ) -> QueryPlan:
+        async with self._client.session_factory() as session:
+            if set_local_stmt is not None:
+                await session.execute(set_local_stmt)
+            document = (
+                await session.execute(self._explain_stmt(stmt, analyze=True))
+            ).scalar_one()
+            await session.rollback()
+        return self._query_plan(document)
+
+    @instrumented("points.explain_query")
+    async def explain_query(
+        self,
+        embedding: List[float],
+        *args,
+        limit: int = 5,
+        within_distance: Optional[float] = None,
+        search_params: Optional[SearchParams] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        model: Optional[Text] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        analyze: bool = True,
+        **kwargs,
+    ) -> QueryPlan:
+        _search_params = self._search_params(
+            search_params, ef_search=ef_search, probes=probes
+        )
+        stmt = self._query_stmt(
+            embedding,
+            limit=limit,
+            within_distance=within_distance,
+            search_params=_search_params,
+            query_filter=self._query_filter(model, created_after, created_before),
+        )
+        set_local_stmt = self._set_local_stmt(_search_params)
+
+        async with self._client.session_factory() as session:
+            if set_local_stmt is not None:
+                await session.execute(set_local_stmt)
+            document = (
+                await session.execute(self._explain_stmt(stmt, analyze=analyze))
+            ).scalar_one()
+            await session.rollback()
+        return self._query_plan(document)
+
+    @instrumented("points.query_batch")
+    async def query_batch(
+        self,
+        embeddings: npt.ArrayLike,
+        *args,
+        limit: int = 5,
+        batch_size: Optional[int] = None,
+        search_params: Optional[SearchParams] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        model: Optional[Text] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        **kwargs,
+    ) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.float32]]:
+        limit = max(1, min(limit, self.hard_limit))
+        embeddings, ids, distances = self._query_batch_arrays(embeddings, limit=limit)
+        batch_size = max(1, batch_size or len(embeddings))
+        _search_params = self._search_params(
+            search_params, ef_search=ef_search, probes=probes
+        )
+        query_filter = self._query_filter(model, created_after, created_before)
+        stmt = self._query_batch_stmt(
+            _search_params, limit=limit, query_filter=query_filter
+        )
+        set_local_stmt = self._set_local_stmt(_search_params)
+
+        if len(embeddings) == 0:
+            return ids, distances
+        async with self._client.session_factory() as session:
+            for create_stmt in self._create_queries_stmts():
+                await session.execute(create_stmt)
+            raw_connection = await (await session.connection()).get_raw_connection()
+            copy_sql, data = self._queries_target(embeddings)
+            copy_start = time.perf_counter()
+            await acopy_from(
+                raw_connection.driver_connection, copy_sql, count_sent(data)
+            )
+            record_statement(time.perf_counter() - copy_start)
+            if set_local_stmt is not None:
+                await session.execute(set_local_stmt)
+            for start in range(0, len(embeddings), batch_size):
+                result = (
+                    await session.execute(
+                        stmt,
+                        {
+                            "first": start + 1,
+                            "last": start + batch_size,
+                            "limit": limit,
+                            **query_filter.params(),
+                        },
+                    )
+                ).all()
+                self._fill_query_batch(ids, distances, result)
+        return ids, distances
+
+    @instrumented("points.query_columns")
+    async def query_columns(
+        self,
+        embedding: npt.ArrayLike,
+        *args,
+        limit: int = 5,
+        within_distance: Optional[float] = None,
+        search_params: Optional[SearchParams] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        model: Optional[Text] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        columns: Sequence[ScalarColumn] = SCALAR_COLUMNS,
+        with_embedding: bool = True,
+        **kwargs,
+    ) -> PointBatch:
+        _search_params = self._search_params(
+            search_params, ef_search=ef_search, probes=probes
+        )
+        query_filter = self._query_filter(model, created_after, created_before)
+        stmt = self._query_stmt(
+            np.asarray(embedding, dtype=np.float32),
+            limit=limit,
+            within_distance=within_distance,
+            columns=self._batch_columns(columns, with_embedding),
+            search_params=_search_params,
+            query_filter=query_filter,
+        )
+        set_local_stmt = self._set_local_stmt(_search_params)
+
+        async with self._client.session_factory() as session:
+            if set_local_stmt is not None:
+                await session.execute(set_local_stmt)
+            result = (await session.execute(stmt)).all()
+        return self._point_batch(
+            self._order_rows(result, _search_params),
+            columns=columns,
+            with_embedding=with_embedding,
+            distances=True,
+        )
+
+    @instrumented("points.list")
+    async def list(
+        self,
+        *args,
+        text: Optional[Text] = None,
+        model: Optional[Text] = None,
+        limit: int = 5,
+        offset: Optional[int] = None,
+        sort_desc: bool = True,
+        **kwargs,
+    ) -> List[PointType]:
+        stmt = self._list_stmt(
+            text=text, model=model, limit=limit, offset=offset, sort_desc=sort_desc
+        )
+
+        async with self._client.session_factory() as session:
+            result = (await session.execute(stmt)).scalars().all()
+            return [self._client.model.from_sql(point) for point in result]
+
+    @instrumented("points.list_columns")
+    async def list_columns(
+        self,
+        *args,
+        text: Optional[Text] = None,
+        model: Optional[Text] = None,
+        limit: int = 5,
+        offset: Optional[int] = None,
+        sort_desc: bool = True,
+        columns: Sequence[ScalarColumn] = SCALAR_COLUMNS,
+        with_embedding: bool = True,
+        **kwargs,
+    ) -> PointBatch:
+        stmt = self._list_stmt(
+            text=text,
+            model=model,
+            limit=limit,
+            offset=offset,
+            sort_desc=sort_desc,
+            columns=self._batch_columns(columns, with_embedding),
+        )
+
+        async with self._client.session_factory() as session:
+            result = (await session.execute(stmt)).all()
+        return self._point_batch(
+            result, columns=columns, with_embedding=with_embedding, distances=False
+        )
+
+    @overload
+    async def retrieve(
+        self, id: int, *args, not_found_ok: Literal[False] = False, **kwargs
+    ) -> PointType: ...
+
+    @overload
+    async def retrieve(
+        self, id: int, *args, not_found_ok: Literal[True], **kwargs
+    ) -> Optional[PointType]: ...
+
+    @instrumented("points.retrieve")
+    async def retrieve(
+        self, id: int, *args, not_found_ok: bool = False, **kwargs
+    ) -> Optional[PointType]:
+        if not id:
+            raise ValueError("No ID provided")
+
+        sql_model = self._client.model._sql_model
+
+        async with self._client.session_factory() as session:
+            stmt = select(sql_model).where(sql_model.id == id)
+            point = (await session.execute(stmt)).scalar_one_or_none()
+            if point is None:
+                if not_found_ok:
+                    return None
+                raise pgvector_perf.exceptions.PointNotFoundError(
+                    f"No point found with ID: {id}"
+                )
+            else:
+                return self._client.model.from_sql(point)
+
+    @instrumented("points.fetch_embeddings")
+    async def fetch_embeddings(
+        self, ids: npt.ArrayLike, *args, **kwargs
+    ) -> npt.NDArray[np.float32]:
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return np.empty((0, self._client.vector_dimensions), dtype=np.float32)
+
+        async with self._client.session_factory() as session:
+            result = (
+                await session.execute(
+                    self._fetch_embeddings_stmt(), {"ids": np.unique(ids).tolist()}
+                )
+            ).all()
+        return self._ordered_embeddings(ids, result)
+
+    @instrumented("points.create")
+    async def create(self, point: PointType, *args, **kwargs) -> PointType:
+        await self._client.tables.ensure_partitions([point.model])
+        async with self._client.session_factory() as session:
+            sql_point = self._client.model.to_sql(point)
+            session.add(sql_point)
+            await session.commit()
+            self._invalidate_cache()
+            await session.refresh(sql_point)
+            return point.update_from_sql(sql_point)
+
+    @instrumented("points.create_batch")
+    async def create_batch(
+        self, points: Sequence[PointType], *args, batch_size: int = 16, **kwargs
+    ) -> List[PointType]:
+        output_points: List[PointType] = []
+        await self._client.tables.ensure_partitions([point.model for point in points])
+        async with self._client.session_factory() as session:
+            for points_chunk in batch_process(points, batch_size=batch_size):
+                sql_points = [
+                    self._client.model.to_sql(point) for point in points_chunk
+                ]
+                session.add_all(sql_points)
+                await session.commit()
+                self._invalidate_cache()
+                for _point, sql_point in zip(points_chunk, sql_points):
+                    await session.refresh(sql_point)
+                    _point.update_from_sql(sql_point)
+                    output_points.append(_point)
+        return output_points
+
+    @instrumented("points.copy_batch")
+    async def copy_batch(
+        self,
+        points: Optional[Sequence[PointType] | PointBatch] = None,
+        *args,
+        ids: Optional[npt.ArrayLike] = None,
+        texts: Optional[Sequence[Text]] = None,
+        models: Optional[Sequence[Text] | Text] = None,
+        embeddings: Optional[npt.ArrayLike] = None,
+        chunk_size: int = 1000,
+        **kwargs,
+    ) -> BulkInsertResult:
+        columns = self._copy_columns(
+            points, ids=ids, texts=texts, models=models, embeddings=embeddings
+        )
+        ids = columns[0]
+
+        start = time.perf_counter()
+        await self._client.tables.ensure_partitions(columns[2])
+        async with self._client.engine.begin() as connection:
+            missing = ids < 0
+            ids[missing] = await self._allocate_ids(connection, int(missing.sum()))
+            given = len(ids) - int(missing.sum())
+            if len(ids) > 0:
+                raw_connection = await connection.get_raw_connection()
+                for copy_sql, data in self._copy_targets(
+                    columns, chunk_size=chunk_size
+                ):
+                    copy_start = time.perf_counter()
+                    await acopy_from(
+                        raw_connection.driver_connection, copy_sql, count_sent(data)
+                    )
+                    record_statement(time.perf_counter() - copy_start)
+            if given > 0:
+                await connection.execute(self._sync_sequence_stmt())
+        self._invalidate_cache()
+        return self._copy_result(points, ids, time.perf_counter() - start)
+
+    @instrumented("points.upsert_batch")
+    async def upsert_batch(
+        self,
+        points: Optional[Sequence[PointType] | PointBatch] = None,
+        *args,
+        ids: Optional[npt.ArrayLike] = None,
+        texts: Optional[Sequence[Text]] = None,
+        models: Optional[Sequence[Text] | Text] = None,
+        embeddings: Optional[npt.ArrayLike] = None,
+        chunk_size: int = 1000,
+        **kwargs,
+    ) -> npt.NDArray[np.int64]:
+        columns = self._copy_columns(
+            points, ids=ids, texts=texts, models=models, embeddings=embeddings
+        )
+        ids = columns[0]
+        self._check_unique_ids(ids)
+
+        await self._client.tables.ensure_partitions(columns[2])
+        async with self._client.engine.begin() as connection:
+            missing = ids < 0
+            ids[missing] = await self._allocate_ids(connection, int(missing.sum()))
+            given = len(ids) - int(missing.sum())
+            if len(ids) > 0:
+                await connection.execute(self._create_stage_stmt())
+                raw_connection = await connection.get_raw_connection()
+                copy_sql, data = self._stage_target(columns, chunk_size=chunk_size)
+                copy_start = time.perf_counter()
+                await acopy_from(
+                    raw_connection.driver_connection, copy_sql, count_sent(data)
+                )
+                record_statement(time.perf_counter() - copy_start)
+                if self._client.partition_by_model:
+                    await connection.execute(self._move_partitions_stmt())
+                await connection.execute(self._upsert_stmt())
+            if given > 0:
+                await connection.execute(self._sync_sequence_stmt())
+        self._invalidate_cache()
+        self._assign_ids(points, ids)
+        return ids
+
+    @instrumented("points.update_batch")
+    async def update_batch(
+        self,
+        ids: npt.ArrayLike,
+        *args,
+        texts: Optional[Sequence[Text]] = None,
+        models: Optional[Sequence[Text] | Text] = None,
+        embeddings: Optional[npt.ArrayLike] = None,
+        chunk_size: int = 1000,
+        **kwargs,
+    ) -> npt.NDArray[np.int64]:
+        ids, columns = self._update_batch_columns(
+            ids, texts=texts, models=models, embeddings=embeddings
+        )
+        if "model" in columns:
+            await self._client.tables.ensure_partitions(columns["model"])
+        staged = "embedding" in columns
+        stmt = self._update_batch_stmt(list(columns), staged=staged)
+
+        chunk_size = max(1, chunk_size)
+        affected: List[int] = []
+        async with self._client.engine.begin() as connection:
+            if not staged:
+                for start in range(0, len(ids), chunk_size):
+                    params = self._update_batch_params(
+                        ids, columns, start, start + chunk_size
+                    )
+                    affected.extend((await connection.execute(stmt, params)).scalars())
+            elif len(ids) > 0:
+                await connection.execute(self._create_stage_stmt())
+                raw_connection = await connection.get_raw_connection()
+                copy_sql, data = self._stage_target(
+                    self._stage_columns(ids, columns), chunk_size=chunk_size
+                )
+                copy_start = time.perf_counter()
+                await acopy_from(
+                    raw_connection.driver_connection, copy_sql, count_sent(data)
+                )
+                record_statement(time.perf_counter() - copy_start)
+                affected.extend((await connection.execute(stmt)).scalars())
+        self._invalidate_cache()
+        return self._affected_ids(ids, affected)
+
+    @instrumented("points.update")
+    async def update(
+        self,
+        id: int,
+        point: Optional[PointType] = None,
+        *args,
+        update_attrs: Optional[Dict[Text, Any]] = None,
+        **kwargs,
+    ) -> PointType:
+        _update_attrs = self._update_attrs(point, update_attrs, kwargs)
+        if _update_attrs.get("model") is not None:
+            await self._client.tables.ensure_partitions([_update_attrs["model"]])
+
+        async with self._client.session_factory() as session:
+            sql_model = self._client.model._sql_model
+            stmt = select(sql_model).where(sql_model.id == id)
+            sql_point = (await session.execute(stmt)).scalar_one_or_none()
+            if sql_point is None:
+                raise pgvector_perf.exceptions.PointNotFoundError(
+                    f"No point found with ID: {id}"
+                )
+
+            for key, value in _update_attrs.items():
+                if value is not None:
+                    setattr(sql_point, key, value)
+
+            await session.commit()
+            self._invalidate_cache()
+            await session.refresh(sql_point)
+            return self._client.model.from_sql(sql_point)
+
+    @instrumented("points.delete")
+    async def delete(
+        self, id: int, *args, not_found_ok: bool = False, **kwargs
+    ) -> bool:
+        async with self._client.session_factory() as session:
+            sql_model = self._client.model._sql_model
+            stmt = select(sql_model).where(sql_model.id == id)
+            sql_point = (await session.execute(stmt)).scalar_one_or_none()
+            if sql_point is None:
+                if not_found_ok:
+                    return False
+                raise pgvector_perf.exceptions.PointNotFoundError(
+                    f"No point found with ID: {id}"
+                )
+
+            await session.delete(sql_point)
+            await session.commit()
+            self._invalidate_cache()
             return True
+
+    async def _allocate_ids(
+        self, connection: "AsyncConnection", count: int
+    ) -> npt.NDArray[np.int64]:
+        if count == 0:
+            return np.empty(0, dtype=np.int64)
+        result = await connection.execute(self._allocate_ids_stmt(), {"count": count})
+        return np.fromiter(result.scalars(), dtype=np.int64, count=count)
@@ -1,14 +1,128 @@
-from typing import TYPE_CHECKING, Generic
+from typing import TYPE_CHECKING, Dict, Generic, List, Optional, Sequence, Text
 
+from sqlalchemy import Column
+from sqlalchemy import Index as SqlIndex
+from sqlalchemy import MetaData, PrimaryKeyConstraint, Table
+from sqlalchemy import text as sql_text
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from pgvector_perf.config import logger
+from pgvector_perf.metrics import instrumented
 from pgvector_perf.schemas import PointType
+from pgvector_perf.utils import model_relation_name, sql_literal
 
 if TYPE_CHECKING:
-    from sqlalchemy.sql.schema import MetaData
+    from sqlalchemy.sql.schema import MetaData as SqlMetaData
+
+    from pgvector_perf.client import (
+        AsyncPgvectorPerf,
+        BasePgvectorPerf,
+        PgvectorPerf,
+    )
+
+
+class BaseTables(Generic[PointType]):
+
+    _client: "BasePgvectorPerf[PointType]"
+
+    @property
+    def _table_name(self) -> Text:
+        return self._client.model._sql_model.__table__.name
+
+    def _partitioned_table_stmts(self) -> List:
+        """DDL of the points table list-partitioned by `model`.
+
+        The primary key must include the partition key, so it is
+        `(id, model)`; ids still come from one sequence and stay unique.
+        Scalar column indexes are created on every partition.
+        """
+
+        table = self._client.model._sql_model.__table__
+        partitioned = Table(
+            table.name,
+            MetaData(),
+            *(
+                Column(
+                    column.name,
+                    column.type,
+                    nullable=column.nullable,
+                    autoincrement=column.name == "id",
+                )
+                for column in table.columns
+            ),
+            PrimaryKeyConstraint("id", "model"),
+            postgresql_partition_by="LIST (model)",
+        )
+        indexes = [
+            SqlIndex(index.name, *(partitioned.c[c.name] for c in index.columns))
+            for index in table.indexes
+            if "embedding" not in index.columns
+        ]
+        return [CreateTable(partitioned, if_not_exists=True)] + [
+            CreateIndex(index, if_not_exists=True) for index in indexes
+        ]
+
+    def _partition_name(self, model: Text) -> Text:
+        return model_relation_name(self._table_name, model)
+
+    def _create_partition_stmt(self, model: Text):
+        return sql_text(
+            f"CREATE TABLE IF NOT EXISTS {self._partition_name(model)} "
+            + f"PARTITION OF {self._table_name} FOR VALUES IN ({sql_literal(model)})"
+        )
+
+    def _lock_partitions_stmt(self):
+        """Serialize partition creation until the end of the transaction.
 
-    from pgvector_perf.client import PgvectorPerf
+        Two sessions creating the same partition would otherwise both pass
+        `IF NOT EXISTS`, and one of them fail.
+        """
 
+        return sql_text("SELECT pg_advisory_xact_lock(hashtext(:table))").bindparams(
+            table=self._table_name
+        )
 
-class Tables(Generic[PointType]):
+    def _partitions_stmt(self):
+        return sql_text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            + "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            + "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+        ).bindparams(table=self._table_name)
+
+    @staticmethod
+    def _partitions(rows: Sequence) -> Dict[Text, Text]:
+        """Partition names by model, from `FOR VALUES IN ('model')` bounds."""
+
+        partitions: Dict[Text, Text] = {}
+        for name, bound in rows:
+            prefix = "FOR VALUES IN ('"
+            if bound.startswith(prefix) and bound.endswith("')"):
+                partitions[bound[len(prefix) : -2].replace("''", "'")] = name
+        return partitions
+
+    @staticmethod
+    def _index_partition(
+        model: Text, partitions: Dict[Text, Text], index_bytes: Optional[int]
+    ) -> bool:
+        """Whether a new partition gets the vector index.
+
+        It does unless it already existed, or other partitions exist and
+        none of them is indexed. An empty table counts as indexed.
+        """
+
+        if model in partitions:
+            return False
+        return len(partitions) == 0 or index_bytes is not None
+
+    def _missing_partitions(self, models: Sequence[Text]) -> List[Text]:
+        """Models of a write whose partition this client has not created."""
+
+        if not self._client.partition_by_model:
+            return []
+        return sorted(set(models) - self._client._partitions)
+
+
+class Tables(BaseTables[PointType]):
 
     _client: "PgvectorPerf[PointType]"
 
@@ -18,8 +132,126 @@ class Tables(Generic[PointType]):
     def touch(self, *args, **kwargs):
         self.create(*args, **kwargs)
 
+    @instrumented("tables.create")
     def create(self, *args, **kwargs):
+        """Create the points table if it does not exist.
+
+        With the client's `partition_by_model`, the table is list-partitioned
+        by `model`; `Points` creates the partition of each model it writes.
+        """
+
+        engine = self._client.engine
+        metadata: "SqlMetaData" = self._client.model._sql_model.metadata
+
+        if not self._client.partition_by_model:
+            metadata.create_all(engine, checkfirst=True)
+            return
+        with engine.begin() as connection:
+            for stmt in self._partitioned_table_stmts():
+                connection.execute(stmt)
+        self._client._partitions = set(self.partitions())
+
+    @instrumented("tables.create_partition")
+    def create_partition(self, model: Text, *args, **kwargs) -> Text:
+        """Create the partition of `model` if it does not exist.
+
+        A new partition gets the vector index of the client's `index_config`,
+        unless the other partitions have none (it was dropped), so queries
+        filtered on `model` do not fall back to a scan.
+        """
+
+        with self._client.engine.begin() as connection:
+            connection.execute(self._lock_partitions_stmt())
+            partitions = self._partitions(
+                connection.execute(self._partitions_stmt()).all()
+            )
+            connection.execute(self._create_partition_stmt(model))
+        self._client._partitions.add(model)
+        if self._index_partition(model, partitions, self._client.index.size()):
+            self._client.index.create(model=model)
+        logger.debug(f"Partition '{self._partition_name(model)}' of '{model}'.")
+        return self._partition_name(model)
+
+    def ensure_partitions(self, models: Sequence[Text], *args, **kwargs):
+        for model in self._missing_partitions(models):
+            self.create_partition(model)
+
+    @instrumented("tables.partitions")
+    def partitions(self, *args, **kwargs) -> Dict[Text, Text]:
+        """Partition table names by model, empty if not partitioned."""
+
+        with self._client.engine.connect() as connection:
+            return self._partitions(connection.execute(self._partitions_stmt()).all())
+
+    @instrumented("tables.truncate")
+    def truncate(self, *args, **kwargs):
+        engine = self._client.engine
+        table_name = self._client.model._sql_model.__table__.name
+
+        with engine.begin() as connection:
+            connection.execute(sql_text(f"TRUNCATE {table_name} RESTART IDENTITY"))
+        if self._client.query_cache is not None:
+            self._client.query_cache.invalidate()
+        logger.info(f"Table '{table_name}' truncated.")
+
+
+class AsyncTables(BaseTables[PointType]):
+
+    _client: "AsyncPgvectorPerf[PointType]"
+
+    def __init__(self, client: "AsyncPgvectorPerf[PointType]"):
+        self._client = client
+
+    async def touch(self, *args, **kwargs):
+        await self.create(*args, **kwargs)
+
+    @instrumented("tables.create")
+    async def create(self, *args, **kwargs):
+        engine = self._client.engine
+        metadata: "SqlMetaData" = self._client.model._sql_model.metadata
+
+        async with engine.begin() as connection:
+            if not self._client.partition_by_model:
+                await connection.run_sync(metadata.create_all, checkfirst=True)
+                return
+            for stmt in self._partitioned_table_stmts():
+                await connection.execute(stmt)
+        self._client._partitions = set(await self.partitions())
+
+    @instrumented("tables.create_partition")
+    async def create_partition(self, model: Text, *args, **kwargs) -> Text:
+        async with self._client.engine.begin() as connection:
+            await connection.execute(self._lock_partitions_stmt())
+            partitions = self._partitions(
+                (await connection.execute(self._partitions_stmt())).all()
+            )
+            await connection.execute(self._create_partition_stmt(model))
+        self._client._partitions.add(model)
+        if self._index_partition(model, partitions, await self._client.index.size()):
+            await self._client.index.create(model=model)
+        logger.debug(f"Partition '{self._partition_name(model)}' of '{model}'.")
+        return self._partition_name(model)
+
+    async def ensure_partitions(self, models: Sequence[Text], *args, **kwargs):
+        for model in self._missing_partitions(models):
+            await self.create_partition(model)
+
+    @instrumented("tables.partitions")
+    async def partitions(self, *args, **kwargs) -> Dict[Text, Text]:
+        async with self._client.engine.connect() as connection:
+            return self._partitions(
+                (await connection.execute(self._partitions_stmt())).all()
+            )
+
+    @instrumented("tables.truncate")
+    async def truncate(self, *args, **kwargs):
         engine = self._client.engine
-        metadata: "MetaData" = self._client.model._sql_model.metadata
+        table_name = self._client.model._sql_model.__table__.name
 
-        metadata.create_all(engine, checkfirst=True)
+        async with engine.begin() as connection:
+            await connection.execute(
+                sql_text(f"TRUNCATE {table_name} RESTART IDENTITY")
+            )
+        if self._client.query_cache is not None:
+            self._client.query_cache.invalidate()
+        logger.info(f"Table '{table_name}' truncated.")
@@ -1,6 +1,19 @@
 from datetime import datetime
-from typing import ClassVar, List, Optional, Text, Type, TypeVar
+from typing import (
+    Callable,
+    ClassVar,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Text,
+    Type,
+    TypeVar,
+)
 
+import numpy as np
+import numpy.typing as npt
 import pytz
 from pgvector.sqlalchemy import Vector
 from pydantic import BaseModel, ConfigDict, Field
@@ -10,6 +23,7 @@ from sqlalchemy import DateTime, Integer, String
 from sqlalchemy.orm import declarative_base, mapped_column
 
 from pgvector_perf.config import settings
+from pgvector_perf.copy_binary import POSTGRES_EPOCH, to_postgres_timestamp
 
 Base = declarative_base()
 
@@ -108,6 +122,422 @@ class PointWithEmbeddingSchema(BaseModel):
         return self
 
 
+class BulkInsertResult(BaseModel):
+    model_config: ConfigDict = ConfigDict(arbitrary_types_allowed=True)
+
+    ids: npt.NDArray[np.int64]
+    elapsed: float
+
+    @property
+    def rows(self) -> int:
+        return len(self.ids)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class PointBatch(BaseModel):
+    """Columnar batch of points with embeddings in one `(N, D)` float32 array.
+
+    Read and written by `Points` without building a Python float per
+    dimension. `ids` of points not yet stored are `-1`; `distances` is set
+    for query results. Columns left out of a projection are `None`.
+    """
+
+    model_config: ConfigDict = ConfigDict(arbitrary_types_allowed=True)
+
+    ids: npt.NDArray[np.int64]
+    texts: Optional[List[Text]] = None
+    models: Optional[List[Text]] = None
+    embeddings: Optional[npt.NDArray[np.float32]] = None
+    created_at: Optional[npt.NDArray[np.datetime64]] = None
+    distances: Optional[npt.NDArray[np.float32]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        return None if self.embeddings is None else self.embeddings.shape[1]
+
+    @classmethod
+    def from_points(cls, points: Sequence["PointWithEmbeddingSchema"]) -> "PointBatch":
+        embeddings = np.empty(
+            (len(points), len(points[0].embedding) if points else 0), dtype=np.float32
+        )
+        for i, point in enumerate(points):
+            embeddings[i] = point.embedding
+        return cls.model_construct(
+            ids=np.array(
+                [-1 if point.id is None else point.id for point in points],
+                dtype=np.int64,
+            ),
+            texts=[point.text for point in points],
+            models=[point.model for point in points],
+            embeddings=embeddings,
+            created_at=np.datetime64(POSTGRES_EPOCH, "us")
+            + np.array(
+                [to_postgres_timestamp(point.created_at) for point in points],
+                dtype="timedelta64[us]",
+            ),
+            distances=None,
+        )
+
+    def to_points(
+        self, model: Type[PointWithEmbeddingSchema] = PointWithEmbeddingSchema
+    ) -> List[PointWithEmbeddingSchema]:
+        """Expand into one `model` instance per row, embeddings as lists."""
+
+        if self.texts is None or self.models is None or self.embeddings is None:
+            raise ValueError("Points need texts, models and embeddings")
+        created_at = (
+            [None] * len(self)
+            if self.created_at is None
+            else self.created_at.astype("datetime64[us]").tolist()
+        )
+        return [
+            model.model_validate(
+                {
+                    "id": None if id < 0 else id,
+                    "text": text,
+                    "model": model_name,
+                    "embedding": embedding,
+                    **(
+                        {}
+                        if dt is None
+                        else {"created_at": dt.replace(tzinfo=pytz.utc)}
+                    ),
+                }
+            )
+            for id, text, model_name, embedding, dt in zip(
+                self.ids.tolist(),
+                self.texts,
+                self.models,
+                self.embeddings.tolist(),
+                created_at,
+            )
+        ]
+
+
+class WarmupResult(BaseModel):
+    connections: int
+    prewarmed_blocks: Dict[Text, int] = {}
+    queries: int
+    elapsed: float
+
+    def __str__(self) -> Text:
+        blocks = ", ".join(f"{k}={v}" for k, v in self.prewarmed_blocks.items())
+        return (
+            f"{self.connections} connections, {self.queries} queries, "
+            + f"prewarmed blocks: {blocks or 'none'}"
+        )
+
+
+Quantization = Literal["none", "halfvec", "bit"]
+
+IterativeScan = Literal["off", "relaxed_order", "strict_order"]
+
+# Distance operator of each operator class suffix.
+DISTANCE_OPERATORS: Dict[Text, Text] = {
+    "l2_ops": "<->",
+    "ip_ops": "<#>",
+    "cosine_ops": "<=>",
+    "l1_ops": "<+>",
+    "hamming_ops": "<~>",
+    "jaccard_ops": "<%>",
+}
+
+
+class IndexConfig(BaseModel):
+    """Vector index build configuration.
+
+    `m` and `ef_construction` apply to HNSW, `lists` to IVFFlat. The operator
+    class must match the distance used by queries (`vector_l2_ops` for
+    `Points.query`) for the index to be used.
+
+    `quantization` indexes a compressed copy of the embedding instead of the
+    full vector: `halfvec` casts it to half precision and `bit` keeps only
+    the sign of each dimension (`binary_quantize`, Hamming distance). The
+    table keeps full-precision vectors, which queries use to re-rank the
+    candidates found through the index. Both need pgvector 0.7 or later.
+    """
+
+    method: Literal["hnsw", "ivfflat"] = "hnsw"
+    m: int = Field(default=16, ge=2, le=100)
+    ef_construction: int = Field(default=64, ge=4, le=1000)
+    lists: int = Field(default=100, ge=1, le=32768)
+    opclass: Text = "vector_l2_ops"
+    quantization: Quantization = "none"
+
+    def __str__(self) -> Text:
+        params = ", ".join(f"{k}={v}" for k, v in self.build_params().items())
+        return f"{self.method}({params}, {self.index_opclass()})"
+
+    def build_params(self) -> Dict[Text, int]:
+        if self.method == "hnsw":
+            return {"m": self.m, "ef_construction": self.ef_construction}
+        return {"lists": self.lists}
+
+    def index_opclass(self) -> Text:
+        """Operator class of the indexed expression."""
+
+        if self.quantization == "halfvec":
+            return self.opclass.replace("vector_", "halfvec_", 1)
+        if self.quantization == "bit":
+            return "bit_hamming_ops"
+        return self.opclass
+
+    def index_expression(self, vector: Text, dimensions: int) -> Text:
+        """SQL of the indexed form of the `vector` SQL expression."""
+
+        if self.quantization == "halfvec":
+            return f"({vector})::halfvec({dimensions})"
+        if self.quantization == "bit":
+            return f"binary_quantize({vector})::bit({dimensions})"
+        return vector
+
+    def distance_operator(self) -> Text:
+        """Operator that orders by distance in the index."""
+
+        for suffix, operator in DISTANCE_OPERATORS.items():
+            if self.index_opclass().endswith(suffix):
+                return operator
+        raise ValueError(f"Unknown operator class: {self.index_opclass()}")
+
+
+class IndexBuildOptions(BaseModel):
+    """How `Index.create` builds, `None` keeps the server setting.
+
+    HNSW builds are much faster while the graph fits in
+    `maintenance_work_mem` (e.g. `"4GB"`), and pgvector 0.6 or later builds
+    with `max_parallel_maintenance_workers` workers besides the leader (also
+    capped by `max_parallel_workers`). `concurrently` builds without
+    blocking writes, at the cost of a second pass over the table.
+    """
+
+    maintenance_work_mem: Optional[Text] = Field(
+        default=None, pattern=r"^\d+\s*(kB|MB|GB|TB)?$"
+    )
+    max_parallel_maintenance_workers: Optional[int] = Field(default=None, ge=0, le=1024)
+    concurrently: bool = False
+
+    def __str__(self) -> Text:
+        params = [f"{k}={v}" for k, v in self.settings().items()]
+        if self.concurrently:
+            params.append("concurrently")
+        return f"IndexBuildOptions({', '.join(params)})"
+
+    def settings(self) -> Dict[Text, int | Text]:
+        """Server settings to apply, keyed by GUC name."""
+
+        settings: Dict[Text, int | Text] = {}
+        if self.maintenance_work_mem is not None:
+            settings["maintenance_work_mem"] = self.maintenance_work_mem
+        if self.max_parallel_maintenance_workers is not None:
+            settings["max_parallel_maintenance_workers"] = (
+                self.max_parallel_maintenance_workers
+            )
+        return settings
+
+
+class IndexBuildProgress(BaseModel):
+    """A sample of `pg_stat_progress_create_index` during a build."""
+
+    index: Text
+    phase: Text
+    blocks_done: int = 0
+    blocks_total: int = 0
+    tuples_done: int = 0
+    tuples_total: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Share of the current phase done, `None` if it has no total."""
+
+        if self.tuples_total > 0:
+            return min(1.0, self.tuples_done / self.tuples_total)
+        if self.blocks_total > 0:
+            return min(1.0, self.blocks_done / self.blocks_total)
+        return None
+
+
+IndexBuildCallback = Callable[[IndexBuildProgress], None]
+
+
+class IndexBuildResult(BaseModel):
+    """Time and size of an `Index.create`, over every partition's index.
+
+    `created` is false when every index already existed and none was built.
+    """
+
+    index: Text
+    config: IndexConfig
+    options: IndexBuildOptions
+    created: bool = True
+    seconds: float
+    bytes: Optional[int] = None
+
+    def __str__(self) -> Text:
+        if not self.created:
+            return (
+                f"Index '{self.index}' already exists "
+                + f"({(self.bytes or 0) / 2**20:,.1f} MiB)"
+            )
+        return (
+            f"Index '{self.index}' {self.config} built in {self.seconds:.2f}s "
+            + f"({(self.bytes or 0) / 2**20:,.1f} MiB)"
+        )
+
+
+class VectorIndex(BaseModel):
+    """A vector index on the table or a partition, as listed by `Index.list`.
+
+    `definition` is the `pg_get_indexdef` DDL that recreates it.
+    """
+
+    name: Text
+    table: Text
+    definition: Text
+
+
+class BulkLoadResult(BaseModel):
+    """Seconds spent in each phase of a `bulk_load`, in order.
+
+    `dropped` are the vector indexes dropped before the load.
+    """
+
+    load: BulkInsertResult
+    index_existed: bool
+    build: Optional[IndexBuildResult] = None
+    dropped: List[VectorIndex] = []
+    phases: Dict[Text, float] = {}
+
+    @property
+    def rows(self) -> int:
+        return self.load.rows
+
+    @property
+    def elapsed(self) -> float:
+        return sum(self.phases.values())
+
+    @property
+    def rows_per_second(self) -> float:
+        """Rows loaded per second of the whole load, index build included."""
+
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> Text:
+        phases = ", ".join(f"{k} {v:.2f}s" for k, v in self.phases.items())
+        return f"Bulk loaded {self.rows:,} points in {self.elapsed:.2f}s: {phases}"
+
+
+class SearchParams(BaseModel):
+    """Search-time index parameters, `None` keeps the server setting.
+
+    `ef_search` is the HNSW candidate list size (`hnsw.ef_search`) and
+    should be at least the query limit; `probes` is the number of IVFFlat
+    lists scanned (`ivfflat.probes`). With a quantized index, `oversample`
+    results per requested one are fetched from the index and re-ranked by
+    full-precision distance; HNSW needs `ef_search` of at least
+    `limit * oversample` to return them all.
+
+    Filtered queries (`model`, `created_after`, `created_before`) stop
+    early when the index scan runs out of candidates that pass the filter.
+    `iterative_scan` (`hnsw.iterative_scan`, pgvector 0.8 or later) keeps
+    scanning until `limit` rows match, up to `max_scan_tuples` tuples;
+    `relaxed_order` results are re-sorted by distance on the client. On
+    older servers, `filter_oversample` fetches that many unfiltered
+    neighbors per requested result and filters them instead.
+    """
+
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+    probes: Optional[int] = Field(default=None, ge=1, le=32768)
+    oversample: Optional[int] = Field(default=None, ge=1, le=100)
+    iterative_scan: Optional[IterativeScan] = None
+    max_scan_tuples: Optional[int] = Field(default=None, ge=1)
+    filter_oversample: Optional[int] = Field(default=None, ge=1, le=1000)
+
+    def __str__(self) -> Text:
+        params = [f"{k}={v}" for k, v in self.settings().items()]
+        if self.oversample is not None:
+            params.append(f"oversample={self.oversample}")
+        if self.filter_oversample is not None:
+            params.append(f"filter_oversample={self.filter_oversample}")
+        return f"SearchParams({', '.join(params)})"
+
+    def merge(self, other: Optional["SearchParams"]) -> "SearchParams":
+        """Values set in `other` take precedence over this one's."""
+
+        if other is None:
+            return self
+        return SearchParams.model_validate(
+            {**self.model_dump(), **other.model_dump(exclude_none=True)}
+        )
+
+    def settings(self) -> Dict[Text, int | Text]:
+        """Server settings to apply, keyed by GUC name."""
+
+        settings: Dict[Text, int | Text] = {}
+        if self.ef_search is not None:
+            settings["hnsw.ef_search"] = self.ef_search
+        if self.probes is not None:
+            settings["ivfflat.probes"] = self.probes
+        if self.iterative_scan is not None:
+            settings["hnsw.iterative_scan"] = self.iterative_scan
+            # IVFFlat has no strict ordering.
+            if self.iterative_scan != "strict_order":
+                settings["ivfflat.iterative_scan"] = self.iterative_scan
+        if self.max_scan_tuples is not None:
+            settings["hnsw.max_scan_tuples"] = self.max_scan_tuples
+        return settings
+
+
+class QueryFilter(BaseModel):
+    """Scalar conditions a vector search's results must match.
+
+    `created_after` is inclusive and `created_before` exclusive. Times
+    without a timezone are taken as UTC, like `created_at`.
+    """
+
+    model: Optional[Text] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    @property
+    def empty(self) -> bool:
+        return self.model is None and not self.has_time_range
+
+    @property
+    def has_time_range(self) -> bool:
+        return self.created_after is not None or self.created_before is not None
+
+    def params(self) -> Dict[Text, Text | datetime]:
+        """Values of the conditions set, keyed by bind parameter name."""
+
+        params: Dict[Text, Text | datetime] = {}
+        if self.model is not None:
+            params["model"] = self.model
+        for name in ("created_after", "created_before"):
+            value = getattr(self, name)
+            if value is not None:
+                if value.tzinfo is not None:
+                    value = value.astimezone(pytz.utc).replace(tzinfo=None)
+                params[name] = value
+        return params
+
+    def conditions(self, alias: Text) -> List[Text]:
+        """SQL conditions on the `alias` table, bound as in `params`."""
+
+        operators = {"model": "=", "created_after": ">=", "created_before": "<"}
+        columns = {"created_after": "created_at", "created_before": "created_at"}
+        return [
+            f"{alias}.{columns.get(name, name)} {operators[name]} :{name}"
+            for name in self.params()
+        ]
+
+
 PointType = TypeVar("PointType", bound=PointWithEmbeddingSchema)
 
 NOT_GIVEN = NotGiven()
@@ -0,0 +1,183 @@
+import itertools
+from typing import TYPE_CHECKING, List, Optional, Sequence, Text
+
+from pydantic import BaseModel
+from rich.table import Table
+
+from pgvector_perf.benchmark import (
+    LatencySummary,
+    build_index,
+    load_corpus,
+    measure_queries,
+    prepare_benchmark,
+    recall_at_k,
+)
+from pgvector_perf.config import logger
+from pgvector_perf.ground_truth import default_cache_dir
+from pgvector_perf.schemas import IndexBuildCallback, IndexConfig, Quantization
+
+if TYPE_CHECKING:
+    from pgvector_perf.client import PgvectorPerf
+
+
+class SweepResult(BaseModel):
+    index: IndexConfig
+    build_seconds: float
+    index_bytes: Optional[int] = None
+    recall: float
+    qps: float
+    latency: LatencySummary
+
+
+class SweepReport(BaseModel):
+    dataset: Text
+    corpus_size: int
+    num_queries: int
+    k: int
+    load_seconds: Optional[float] = None
+    results: List[SweepResult] = []
+
+    def pareto(self) -> List[SweepResult]:
+        """Configurations not beaten on both recall and p50 latency."""
+
+        return [
+            result
+            for result in self.results
+            if not any(
+                other.recall >= result.recall
+                and other.latency.p50_ms <= result.latency.p50_ms
+                and (
+                    other.recall > result.recall
+                    or other.latency.p50_ms < result.latency.p50_ms
+                )
+                for other in self.results
+            )
+        ]
+
+    def __rich__(self):
+        pareto = [id(result) for result in self.pareto()]
+        table = Table(title=f"pgvector-perf sweep: {self.dataset}")
+        table.add_column("index", style="magenta")
+        table.add_column("build s", style="cyan", justify="right")
+        table.add_column("MiB", style="cyan", justify="right")
+        table.add_column(f"recall@{self.k}", style="cyan", justify="right")
+        table.add_column("QPS", style="cyan", justify="right")
+        table.add_column("p50 ms", style="cyan", justify="right")
+        table.add_column("p99 ms", style="cyan", justify="right")
+        table.add_column("pareto", style="green", justify="center")
+        for result in self.results:
+            table.add_row(
+                f"{result.index}",
+                f"{result.build_seconds:.2f}",
+                f"{(result.index_bytes or 0) / 2**20:,.1f}",
+                f"{result.recall:.4f}",
+                f"{result.qps:,.1f}",
+                f"{result.latency.p50_ms:.3f}",
+                f"{result.latency.p99_ms:.3f}",
+                "*" if id(result) in pareto else "",
+            )
+        return table
+
+
+def index_grid(
+    *,
+    hnsw_m: Sequence[int] = (),
+    hnsw_ef_construction: Sequence[int] = (),
+    ivfflat_lists: Sequence[int] = (),
+    opclass: Text = "vector_l2_ops",
+    quantizations: Sequence[Quantization] = ("none",),
+) -> List[IndexConfig]:
+    """Cartesian product of HNSW build parameters plus IVFFlat list counts,
+    each with every quantization."""
+
+    configs = [
+        IndexConfig(
+            method="hnsw",
+            m=m,
+            ef_construction=ef,
+            opclass=opclass,
+            quantization=quantization,
+        )
+        for m, ef, quantization in itertools.product(
+            hnsw_m, hnsw_ef_construction, quantizations
+        )
+    ]
+    configs += [
+        IndexConfig(
+            method="ivfflat", lists=lists, opclass=opclass, quantization=quantization
+        )
+        for lists, quantization in itertools.product(ivfflat_lists, quantizations)
+    ]
+    return configs
+
+
+def run_sweep(
+    client: "PgvectorPerf",
+    dataset_path: Text,
+    configs: Sequence[IndexConfig],
+    *,
+    k: int = 10,
+    num_queries: int = 1000,
+    limit: Optional[int] = None,
+    load: bool = True,
+    warmup: int = 10,
+    progress: Optional[IndexBuildCallback] = None,
+    seed: int = 0,
+    ground_truth_dir: Text = default_cache_dir,
+    processes: Optional[int] = None,
+) -> SweepReport:
+    """Build each index configuration in turn and benchmark it.
+
+    The corpus is loaded once; before every build the previous index is
+    dropped, so each configuration is measured on its own. The client's
+    `index_config` follows the configuration being measured, so queries
+    re-rank candidates from quantized indexes.
+    """
+
+    if not configs:
+        raise ValueError("No index configurations provided")
+
+    data = prepare_benchmark(
+        client,
+        dataset_path,
+        k=k,
+        num_queries=num_queries,
+        limit=limit,
+        seed=seed,
+        ground_truth_dir=ground_truth_dir,
+        processes=processes,
+    )
+    report = SweepReport(
+        dataset=dataset_path,
+        corpus_size=len(data.corpus),
+        num_queries=len(data.queries),
+        k=k,
+    )
+    if load:
+        report.load_seconds = load_corpus(client, data.corpus).elapsed
+
+    index_config = client.index_config
+    for config in configs:
+        client.index.drop()
+        client.index_config = config
+        try:
+            build = build_index(client, config, progress=progress)
+            retrieved, latencies, wall_seconds = measure_queries(
+                client, data.queries.embeddings, k, warmup=warmup
+            )
+        finally:
+            client.index_config = index_config
+        result = SweepResult(
+            index=config,
+            build_seconds=build.seconds,
+            index_bytes=build.bytes,
+            recall=recall_at_k(retrieved, data.truth, k),
+            qps=len(data.queries) / wall_seconds,
+            latency=LatencySummary.from_seconds(latencies),
+        )
+        logger.info(
+            f"Index {config}: recall@{k}={result.recall:.4f}, "
+            + f"p50={result.latency.p50_ms:.3f}ms."
+        )
+        report.results.append(result)
+    return report
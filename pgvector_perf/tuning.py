@@ -0,0 +1,139 @@
+import time
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+from rich.table import Table
+
+from pgvector_perf.benchmark import recall_at_k
+from pgvector_perf.config import logger
+from pgvector_perf.schemas import SearchParams
+
+if TYPE_CHECKING:
+    from pgvector_perf.client import PgvectorPerf
+
+SearchParameter = Literal["ef_search", "probes"]
+
+
+class TuningTrial(BaseModel):
+    value: int
+    recall: float
+    seconds: float
+
+
+class TuningResult(BaseModel):
+    parameter: SearchParameter
+    target_recall: float
+    k: int
+    value: int
+    recall: float
+    met: bool
+    trials: List[TuningTrial]
+
+    @property
+    def search_params(self) -> SearchParams:
+        return SearchParams.model_validate({self.parameter: self.value})
+
+    def __rich__(self):
+        table = Table(
+            title=f"pgvector-perf tune: {self.parameter} for "
+            + f"recall@{self.k} >= {self.target_recall}"
+        )
+        table.add_column(self.parameter, style="magenta", justify="right")
+        table.add_column(f"recall@{self.k}", style="cyan", justify="right")
+        table.add_column("seconds", style="cyan", justify="right")
+        table.add_column("chosen", style="green", justify="center")
+        for trial in sorted(self.trials, key=lambda t: t.value):
+            table.add_row(
+                f"{trial.value}",
+                f"{trial.recall:.4f}",
+                f"{trial.seconds:.3f}",
+                "*" if trial.value == self.value else "",
+            )
+        return table
+
+
+def tune_search_params(
+    client: "PgvectorPerf",
+    queries: npt.ArrayLike,
+    truth: npt.NDArray[np.int64],
+    *,
+    k: int = 10,
+    target_recall: float = 0.95,
+    parameter: Optional[SearchParameter] = None,
+    low: Optional[int] = None,
+    high: Optional[int] = None,
+    batch_size: int = 100,
+) -> TuningResult:
+    """Binary-search the smallest search parameter that meets `target_recall`.
+
+    `parameter` defaults to `ef_search` for an HNSW index and `probes` for
+    IVFFlat, following `client.index_config`. The bounds default to
+    `[k, 1000]` for `ef_search` and `[1, lists]` for `probes`. Recall is
+    assumed to grow with the parameter; if even `high` misses the target it
+    is returned with `met=False`. `truth` holds the exact neighbor ids of
+    each query row.
+    """
+
+    if not 0 < target_recall <= 1:
+        raise ValueError("Target recall must be in (0, 1]")
+    queries = np.asarray(queries, dtype=np.float32)
+    if parameter is None:
+        parameter = "ef_search" if client.index_config.method == "hnsw" else "probes"
+    if parameter == "ef_search":
+        low = k if low is None else low
+        high = 1000 if high is None else high
+    else:
+        low = 1 if low is None else low
+        high = client.index_config.lists if high is None else high
+    if not 0 < low <= high:
+        raise ValueError(f"Invalid {parameter} bounds: [{low}, {high}]")
+
+    trials: Dict[int, TuningTrial] = {}
+
+    def _trial(value: int) -> TuningTrial:
+        if value not in trials:
+            start = time.perf_counter()
+            retrieved, _ = client.points.query_batch(
+                queries,
+                limit=k,
+                batch_size=batch_size,
+                search_params=SearchParams.model_validate({parameter: value}),
+            )
+            trials[value] = TuningTrial(
+                value=value,
+                recall=recall_at_k(retrieved, truth, k),
+                seconds=time.perf_counter() - start,
+            )
+            logger.debug(f"{parameter}={value}: recall@{k}={trials[value].recall:.4f}")
+        return trials[value]
+
+    met = _trial(high).recall >= target_recall
+    if met:
+        while low < high:
+            middle = (low + high) // 2
+            if _trial(middle).recall >= target_recall:
+                high = middle
+            else:
+                low = middle + 1
+    else:
+        logger.warning(
+            f"Recall@{k} {trials[high].recall:.4f} at {parameter}={high} "
+            + f"is below the target {target_recall}."
+        )
+
+    result = TuningResult(
+        parameter=parameter,
+        target_recall=target_recall,
+        k=k,
+        value=high,
+        recall=_trial(high).recall,
+        met=met,
+        trials=list(trials.values()),
+    )
+    logger.info(
+        f"Tuned {parameter}={result.value} with recall@{k}={result.recall:.4f} "
+        + f"in {len(result.trials)} trials."
+    )
+    return result
@@ -1,5 +1,7 @@
 import base64
+import hashlib
 import itertools
+import re
 from datetime import datetime
 from typing import Generator, List, Literal, Sequence, Text, TypeVar, cast, overload
 
@@ -45,6 +47,32 @@ def dummy_embedding(
     return np_to_base64(array) if encoding_format == "base64" else array.tolist()
 
 
+def model_relation_name(prefix: Text, model: Text) -> Text:
+    """Name of a per-model table or index, `{prefix}_{slug}_{hash}`.
+
+    The slug keeps it readable and the hash of the model unique, within
+    Postgres' 63 byte identifier limit.
+    """
+
+    slug = re.sub(r"[^a-z0-9]+", "_", model.lower()).strip("_")
+    digest = hashlib.blake2b(model.encode(), digest_size=4).hexdigest()
+    prefix = prefix[: 63 - len(digest) - 2]
+    slug = slug[: max(0, 63 - len(prefix) - len(digest) - 2)]
+    return "_".join(part for part in (prefix, slug, digest) if part)
+
+
+def sql_literal(value: Text) -> Text:
+    """Quote a string as an SQL literal, for DDL that takes no parameters."""
+
+    return "'" + value.replace("'", "''") + "'"
+
+
+def vectors_to_text(embeddings: np.ndarray) -> List[Text]:
+    """Format the rows of a 2-dimensional array as pgvector text literals."""
+
+    return ["[" + ",".join(map(repr, row)) + "]" for row in embeddings.tolist()]
+
+
 def batch_process(
     items: Sequence[T], batch_size: int = 32
 ) -> Generator[Sequence[T], None, None]:
@@ -1,15 +1,29 @@
-import base64
-from typing import List, Text, TypeVar
+import functools
+import itertools
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Text, TypeVar
 
 import numpy as np
 import numpy.typing as npt
 import pyarrow as pa
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
+import torch
 from datasets import load_dataset
-from diskcache import FanoutCache
 from FlagEmbedding import BGEM3FlagModel
-from pydantic import BaseModel
 from tqdm import tqdm
+from transformers import AutoTokenizer
+
+from pgvector_perf.batching import token_budget_batches
+from pgvector_perf.client import PgvectorPerf
+from pgvector_perf.config import console
+from pgvector_perf.datasets import EMBEDDING_COLUMN, embedding_array
+from pgvector_perf.embedding_store import EmbeddingStore
+from pgvector_perf.ingest import run_ingest
 
 T = TypeVar("T")
 
@@ -51,174 +65,350 @@ langs = [
     "vi",
     "zh",
 ]
-dataset_intermediate_path = "data/opus-100-intermediate.parquet"
+dataset_intermediate_path = "data/opus-100-intermediate"
 dataset_feature_path = "data/opus-100-feature.parquet"
 
 compression = "snappy"
-cache = FanoutCache("data/BAAI__bge_m3.cache")
-strings_set = FanoutCache(f"data/{dataset_name.replace('/', '__')}.cache")
-strings_set.clear()
+embedding_store_path = "data/BAAI__bge_m3.store"
 model_name = "BAAI/bge-m3"
-model = BGEM3FlagModel(model_name)
-
+embedding_size = 1024
 
-def np_to_base64(array: npt.NDArray) -> Text:
-    return base64.b64encode(array.tobytes()).decode("utf-8")
 
+@functools.lru_cache(maxsize=None)
+def get_model() -> BGEM3FlagModel:
+    return BGEM3FlagModel(model_name)
 
-def base64_to_np(base64_str: Text, dtype: npt.DTypeLike = np.float32) -> npt.NDArray:
-    return np.frombuffer(base64.b64decode(base64_str), dtype=dtype)
 
-
-def embedding_texts(
-    texts: List[Text], embedding_size: int = 1024, dtype: npt.DTypeLike = np.float32
-) -> npt.NDArray[np.float32]:
-    embeddings = np.empty((len(texts), embedding_size), dtype=dtype)
-    cached_indices = []
-    no_cached_indices = []
-
-    for i, text in enumerate(texts):
-        if text in cache:
-            embeddings[i] = base64_to_np(cache[text])  # type: ignore
-            cached_indices.append(i)
-        else:
-            no_cached_indices.append(i)
-
-    if cached_indices and len(cached_indices) == len(texts):
-        return embeddings
-    else:
-        no_cached_texts = [texts[i] for i in no_cached_indices]
-        no_cached_embeddings = model.encode(no_cached_texts)["dense_vecs"]
-        for _text, (i, j) in zip(no_cached_texts, enumerate(no_cached_indices)):
-            cache[_text] = np_to_base64(no_cached_embeddings[i])
-            embeddings[j] = no_cached_embeddings[i]
-
-    return embeddings
+@functools.lru_cache(maxsize=None)
+def get_store() -> EmbeddingStore:
+    return EmbeddingStore(embedding_store_path, embedding_size)
 
 
-def process_dataset_intermediate(save_dataset_path: Text = dataset_intermediate_path):
-    id_accumulator = 0
-
-    def _process_dataset_intermediate_in_chunks(
-        dataset, subset: Text, split: Text, chunk_size: int = 10000
-    ):
-        nonlocal id_accumulator
-        batch = []
-        lang_en = "en"
-        lang_tar = subset.replace(lang_en, "").strip(" _-")
-        for row in tqdm(dataset, leave=False, desc=f"{subset}:{split}"):
-            trans_data = row["translation"]
-            if trans_data[lang_en] not in strings_set:
-                batch.append(
-                    PointIntermediate.model_validate(
-                        {
-                            "id": id_accumulator + 1,
-                            "text": trans_data[lang_en],
-                            "language": lang_en,
-                            "split": split,
-                            "subset": subset,
-                            "source": dataset_name,
-                        }
-                    ).model_dump(),
-                )
-                id_accumulator += 1
-                strings_set[trans_data[lang_en]] = True
-            if trans_data[lang_tar] not in strings_set:
-                batch.append(
-                    PointIntermediate.model_validate(
-                        {
-                            "id": id_accumulator + 1,
-                            "text": trans_data[lang_tar],
-                            "language": lang_tar,
-                            "split": split,
-                            "subset": subset,
-                            "source": dataset_name,
-                        }
-                    ).model_dump(),
-                )
-                id_accumulator += 1
-                strings_set[trans_data[lang_tar]] = True
-
-            if len(batch) >= chunk_size:
-                yield pa.Table.from_pylist(batch)
-                batch = []
-
-        if batch:
-            yield pa.Table.from_pylist(batch)
-
-    parquet_writer = None
-    # for subset in subsets:
-    #     for split in splits:
-    subsets = ["en-zh"]
-    splits = ["test"]
-    for subset in tqdm(subsets, leave=False, desc="Processing subsets"):
-        for split in tqdm(splits, leave=False, desc="Processing splits"):
-            dataset = load_dataset(dataset_name, subset, split=split)
-            for table in _process_dataset_intermediate_in_chunks(
-                dataset, subset=subset, split=split
-            ):
-                if parquet_writer is None:
-                    parquet_writer = pq.ParquetWriter(
-                        save_dataset_path, table.schema, compression=compression
-                    )
-                parquet_writer.write_table(table)
-
-    if parquet_writer:
-        parquet_writer.close()
+def process_dataset_intermediate(
+    save_dataset_path: Text = dataset_intermediate_path,
+    processes: Optional[int] = None,
+):
+    """Extract the unique texts of every subset and split into Parquet shards.
+
+    Each (subset, split) pair is read and deduped in its own process. Texts
+    are then deduped across shards by their 128-bit hash in a fixed
+    subset/split order, so a text belongs to its first shard and ids are
+    consecutive in that order on every run, whatever the process timing.
+    """
+
+    os.makedirs(save_dataset_path, exist_ok=True)
+    for name in os.listdir(save_dataset_path):
+        if name.endswith(".parquet") or name.endswith(".raw"):
+            os.remove(os.path.join(save_dataset_path, name))
+    shards = [
+        (i, subset, split, save_dataset_path)
+        for i, (subset, split) in enumerate(itertools.product(subsets, splits))
+    ]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        raw_paths = list(
+            tqdm(
+                executor.map(_extract_shard, *zip(*shards)),
+                total=len(shards),
+                desc="Extracting shards",
+            )
+        )
+
+        seen = np.empty(0, dtype=EmbeddingStore.key_dtype)
+        keep_masks: List[npt.NDArray[np.bool_]] = []
+        first_ids: List[int] = []
+        id_accumulator = 0
+        for raw_path in raw_paths:
+            hashes = (
+                pq.read_table(raw_path, columns=["hash"])["hash"]
+                .to_numpy()
+                .astype(EmbeddingStore.key_dtype)
+            )
+            keep = ~np.isin(hashes, seen, assume_unique=True)
+            seen = np.union1d(seen, hashes[keep])
+            keep_masks.append(keep)
+            first_ids.append(id_accumulator + 1)
+            id_accumulator += int(keep.sum())
+
+        list(
+            tqdm(
+                executor.map(
+                    _write_shard,
+                    raw_paths,
+                    [path[: -len(".raw")] for path in raw_paths],
+                    keep_masks,
+                    first_ids,
+                ),
+                total=len(raw_paths),
+                desc="Writing shards",
+            )
+        )
 
     print(f"Dataset successfully saved as '{save_dataset_path}'")
     print(f"There are {id_accumulator} unique texts in the dataset")
 
 
+def _extract_shard(shard: int, subset: Text, split: Text, save_dataset_path: Text):
+    lang_en = "en"
+    lang_tar = subset.replace(lang_en, "").strip(" _-")
+    dataset = load_dataset(dataset_name, subset, split=split)
+    translations = (
+        dataset.with_format("arrow")[:].column("translation").combine_chunks()
+    )
+
+    # Interleave the two sides of each pair, English first
+    num_rows = len(translations)
+    order = np.empty(2 * num_rows, dtype=np.int64)
+    order[0::2] = np.arange(num_rows)
+    order[1::2] = np.arange(num_rows, 2 * num_rows)
+    texts = pa.concat_arrays(
+        [translations.field(lang_en), translations.field(lang_tar)]
+    ).take(pa.array(order))
+    languages = np.tile([lang_en, lang_tar], num_rows)
+
+    hashes = EmbeddingStore.hash_texts(texts.to_pylist())
+    _, first = np.unique(hashes, return_index=True)
+    first.sort()
+    table = pa.table(
+        {
+            "hash": pa.array(hashes[first]),
+            "text": texts.take(pa.array(first)),
+            "language": pa.array(languages[first]),
+            "split": pa.array([split] * len(first)),
+            "subset": pa.array([subset] * len(first)),
+            "source": pa.array([dataset_name] * len(first)),
+        }
+    )
+    raw_path = os.path.join(
+        save_dataset_path, f"part-{shard:03d}-{subset}-{split}.parquet.raw"
+    )
+    pq.write_table(table, raw_path, compression=compression)
+    return raw_path
+
+
+def _write_shard(
+    raw_path: Text, path: Text, keep: npt.NDArray[np.bool_], first_id: int
+) -> None:
+    table = pq.read_table(raw_path).filter(pa.array(keep)).drop_columns(["hash"])
+    ids = pa.array(np.arange(first_id, first_id + len(table), dtype=np.int64))
+    pq.write_table(table.add_column(0, "id", ids), path, compression=compression)
+    os.remove(raw_path)
+
+
 def dataset_intermediate_to_feature(
     intermediate_path: Text = dataset_intermediate_path,
     feature_path: Text = dataset_feature_path,
-    batch_size: int = 100,
+    window_size: int = 50000,
+    max_tokens: int = 16384,
+    max_batch_size: int = 256,
+    max_length: int = 512,
+    workers: Optional[int] = None,
+    threads_per_worker: int = 4,
 ):
-    def _process_batch(record_batch: "pa.RecordBatch"):
-        record_batch_dict = record_batch.to_pydict()
-        embeddings = embedding_texts(record_batch_dict["text"])
-        record_batch_dict["model"] = [model_name] * len(record_batch_dict["text"])
-        record_batch_dict["embedding_base64"] = list(map(np_to_base64, embeddings))
-        return pa.Table.from_pydict(record_batch_dict)
-
-    parquet_file = pq.ParquetFile(intermediate_path)
+    """Embed the intermediate dataset and write the feature Parquet.
+
+    Rows are read `window_size` at a time. Texts missing from the embedding
+    store are tokenized, grouped into length-sorted batches of at most
+    `max_tokens` padded tokens and encoded on a pool of `workers` CPU
+    processes; the results are put back in row order before writing.
+    Throughput of each stage is printed at the end.
+    """
+
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    store = get_store()
+    dataset = ds.dataset(intermediate_path, format="parquet")
+    stages: Dict[Text, List[float]] = {
+        stage: [0, 0.0] for stage in ("read", "lookup", "tokenize", "encode", "write")
+    }
+
+    def _record(stage: Text, texts: int, start: float):
+        stages[stage][0] += texts
+        stages[stage][1] += time.perf_counter() - start
 
     writer = None
-    for batch in tqdm(
-        parquet_file.iter_batches(batch_size=batch_size),
-        desc="Batches",
-        total=parquet_file.metadata.num_rows // batch_size + 1,
-    ):
-        table = _process_batch(batch)
-        if writer is None:
-            writer = pq.ParquetWriter(
-                feature_path, table.schema, compression=compression
-            )
-
-        writer.write_table(table)
+    record_batches = iter(dataset.to_batches(batch_size=window_size))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_encoder,
+        initargs=(threads_per_worker,),
+    ) as executor, tqdm(total=dataset.count_rows(), desc="Texts") as progress:
+        while True:
+            start = time.perf_counter()
+            record_batch = next(record_batches, None)
+            if record_batch is None:
+                break
+            texts = record_batch.column("text").to_pylist()
+            _record("read", len(texts), start)
+
+            start = time.perf_counter()
+            embeddings, found = store.get(texts)
+            missing = np.flatnonzero(~found)
+            missing_texts = [texts[i] for i in missing]
+            _record("lookup", len(texts), start)
+
+            if missing_texts:
+                start = time.perf_counter()
+                lengths = _token_lengths(tokenizer, missing_texts, max_length)
+                _record("tokenize", len(missing_texts), start)
+
+                start = time.perf_counter()
+                missing_embeddings = _encode_texts(
+                    executor,
+                    missing_texts,
+                    lengths,
+                    max_tokens=max_tokens,
+                    max_batch_size=max_batch_size,
+                    max_length=max_length,
+                )
+                store.put(missing_texts, missing_embeddings)
+                embeddings[missing] = missing_embeddings
+                _record("encode", len(missing_texts), start)
+
+            start = time.perf_counter()
+            table = pa.Table.from_batches([record_batch])
+            table = table.append_column(
+                "model", pa.array([model_name] * len(texts))
+            ).append_column(EMBEDDING_COLUMN, embedding_array(embeddings))
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    feature_path, table.schema, compression=compression
+                )
+            writer.write_table(table)
+            _record("write", len(texts), start)
+            progress.update(len(texts))
 
     if writer:
         writer.close()
+    store.flush()
 
     print(f"Feature dataset successfully saved as '{feature_path}'")
+    for stage, (texts, seconds) in stages.items():
+        rate = texts / seconds if seconds > 0 else 0.0
+        print(f"{stage:>8}: {texts:,.0f} texts in {seconds:.1f}s ({rate:,.0f} texts/s)")
+
+
+def ingest_dataset(
+    url: Optional[Text] = None,
+    batch_size: int = 10000,
+    queue_size: int = 4,
+    embed_workers: int = 2,
+    checkpoint_path: Text = "data/opus-100-ingest.json",
+    max_tokens: int = 16384,
+    max_batch_size: int = 256,
+    max_length: int = 512,
+    workers: Optional[int] = None,
+    threads_per_worker: int = 4,
+):
+    """Stream every subset and split straight into the database.
+
+    Reading, dedupe, embedding and COPY overlap in `run_ingest` instead of
+    going through the intermediate and feature Parquet files; a rerun
+    resumes from `checkpoint_path`. Run with `VECTOR_DIMENSIONS=1024`.
+    """
+
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    store = get_store()
+    store_lock = threading.Lock()
+    client = PgvectorPerf(url=url, vector_dimensions=embedding_size)
+    client.databases.touch()
+    client.tables.touch()
+
+    def _read_texts():
+        for subset, split in itertools.product(subsets, splits):
+            lang_en = "en"
+            lang_tar = subset.replace(lang_en, "").strip(" _-")
+            dataset = load_dataset(dataset_name, subset, split=split)
+            for batch in dataset.iter(batch_size=batch_size):
+                yield [
+                    text
+                    for row in batch["translation"]
+                    for text in (row[lang_en], row[lang_tar])
+                ]
+
+    def _embed(texts: List[Text]) -> npt.NDArray[np.float32]:
+        with store_lock:
+            embeddings, found = store.get(texts)
+        missing = np.flatnonzero(~found)
+        if len(missing) == 0:
+            return embeddings
+        missing_texts = [texts[i] for i in missing]
+        missing_embeddings = _encode_texts(
+            executor,
+            missing_texts,
+            _token_lengths(tokenizer, missing_texts, max_length),
+            max_tokens=max_tokens,
+            max_batch_size=max_batch_size,
+            max_length=max_length,
+        )
+        with store_lock:
+            store.put(missing_texts, missing_embeddings)
+        embeddings[missing] = missing_embeddings
+        return embeddings
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_encoder,
+        initargs=(threads_per_worker,),
+    ) as executor:
+        result = run_ingest(
+            client,
+            _read_texts(),
+            _embed,
+            model=model_name,
+            queue_size=queue_size,
+            embed_workers=embed_workers,
+            checkpoint_path=checkpoint_path,
+        )
+    store.flush()
+    console.print(result)
+
+
+def _token_lengths(tokenizer, texts: List[Text], max_length: int) -> List[int]:
+    return [
+        len(ids)
+        for ids in tokenizer(texts, truncation=True, max_length=max_length)["input_ids"]
+    ]
+
+
+def _encode_texts(
+    executor: ProcessPoolExecutor,
+    texts: List[Text],
+    lengths: List[int],
+    *,
+    max_tokens: int,
+    max_batch_size: int,
+    max_length: int,
+) -> npt.NDArray[np.float32]:
+    futures = {
+        executor.submit(_encode_batch, [texts[i] for i in batch], max_length): batch
+        for batch in token_budget_batches(
+            lengths, max_tokens=max_tokens, max_batch_size=max_batch_size
+        )
+    }
+    embeddings = np.empty((len(texts), embedding_size), dtype=np.float32)
+    for future in as_completed(futures):
+        embeddings[futures[future]] = future.result()
+    return embeddings
 
 
-class PointIntermediate(BaseModel):
-    id: int
-    text: Text
-    language: Text
-    split: Text
-    subset: Text
-    source: Text
+def _init_encoder(threads: int):
+    torch.set_num_threads(threads)
+    get_model()
 
 
-class PointFeature(PointIntermediate):
-    model: Text
-    embedding_base64: Text
+def _encode_batch(texts: List[Text], max_length: int) -> npt.NDArray[np.float32]:
+    embeddings = get_model().encode(
+        texts, batch_size=len(texts), max_length=max_length
+    )["dense_vecs"]
+    return np.asarray(embeddings, dtype=np.float32)
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "ingest":
+        ingest_dataset(sys.argv[2] if len(sys.argv) > 2 else None)
+        return
     process_dataset_intermediate()
     dataset_intermediate_to_feature()
 
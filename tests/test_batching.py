@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from pgvector_perf.batching import token_budget_batches
+
+
+def test_token_budget_batches():
+    rng = np.random.default_rng(0)
+    lengths = rng.integers(1, 64, size=500)
+    lengths[7] = 200
+
+    batches = token_budget_batches(lengths, max_tokens=256, max_batch_size=32)
+    rows = np.concatenate(batches)
+    assert sorted(rows.tolist()) == list(range(500))
+    costs = [len(batch) * lengths[batch].max() for batch in batches]
+    assert costs == sorted(costs, reverse=True)
+    assert all(len(batch) <= 32 for batch in batches)
+    assert all(cost <= 256 for cost in costs)
+    # Batches hold rows of similar length
+    assert np.mean([np.ptp(lengths[batch]) for batch in batches]) < 4
+
+    assert [b.tolist() for b in token_budget_batches([300, 1], max_tokens=256)] == [
+        [0],
+        [1],
+    ]
+    assert token_budget_batches([], max_tokens=256) == []
+    with pytest.raises(ValueError):
+        token_budget_batches([1], max_tokens=0)
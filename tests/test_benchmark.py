@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from pgvector_perf.benchmark import LatencySummary, recall_at_k
+from pgvector_perf.schemas import (
+    IndexBuildOptions,
+    IndexBuildProgress,
+    IndexConfig,
+    QueryFilter,
+    SearchParams,
+)
+from pgvector_perf.sweep import SweepReport, SweepResult, index_grid
+
+
+def test_recall_at_k():
+    truth = np.array([[1, 2, 3], [4, 5, 6]])
+    retrieved = np.array([[3, 2, 1], [4, 7, -1]])
+    assert recall_at_k(retrieved, truth, 3) == (3 + 1) / 6
+
+
+def test_latency_summary():
+    summary = LatencySummary.from_seconds(np.arange(1, 1001) / 1000)
+    assert summary.p50_ms == np.percentile(np.arange(1, 1001), 50)
+    assert summary.max_ms == 1000
+
+
+def test_sweep_pareto():
+    latency = LatencySummary.from_seconds(np.array([0.001]))
+    results = [
+        SweepResult(
+            index=config,
+            build_seconds=1.0,
+            recall=recall,
+            qps=1.0,
+            latency=latency.model_copy(update={"p50_ms": p50_ms}),
+        )
+        for config, recall, p50_ms in zip(
+            index_grid(hnsw_m=[8, 16], hnsw_ef_construction=[64], ivfflat_lists=[10]),
+            [0.9, 0.95, 0.8],
+            [1.0, 2.0, 3.0],
+        )
+    ]
+    report = SweepReport(
+        dataset="dataset", corpus_size=1, num_queries=1, k=1, results=results
+    )
+    assert [r.index.method for r in report.results] == ["hnsw", "hnsw", "ivfflat"]
+    assert report.pareto() == results[:2]
+
+
+def test_search_params():
+    params = SearchParams(ef_search=40).merge(SearchParams(probes=10))
+    assert params.settings() == {"hnsw.ef_search": 40, "ivfflat.probes": 10}
+    assert params.merge(SearchParams(ef_search=80)).ef_search == 80
+    assert SearchParams().settings() == {}
+    assert str(SearchParams(oversample=4)) == "SearchParams(oversample=4)"
+    assert SearchParams(iterative_scan="relaxed_order").settings() == {
+        "hnsw.iterative_scan": "relaxed_order",
+        "ivfflat.iterative_scan": "relaxed_order",
+    }
+    assert SearchParams(iterative_scan="strict_order").settings() == {
+        "hnsw.iterative_scan": "strict_order"
+    }
+
+
+def test_query_filter():
+    assert QueryFilter().empty
+    created_after = datetime(2024, 1, 1, 8, tzinfo=timezone(timedelta(hours=8)))
+    query_filter = QueryFilter(model="m", created_after=created_after)
+    assert query_filter.params() == {
+        "model": "m",
+        "created_after": datetime(2024, 1, 1),
+    }
+    assert query_filter.conditions("p") == [
+        "p.model = :model",
+        "p.created_at >= :created_after",
+    ]
+
+
+def test_index_build_options():
+    options = IndexBuildOptions(
+        maintenance_work_mem="4GB", max_parallel_maintenance_workers=7
+    )
+    assert options.settings() == {
+        "maintenance_work_mem": "4GB",
+        "max_parallel_maintenance_workers": 7,
+    }
+    assert IndexBuildOptions().settings() == {}
+    assert str(IndexBuildOptions(concurrently=True)) == (
+        "IndexBuildOptions(concurrently)"
+    )
+    with pytest.raises(ValidationError):
+        IndexBuildOptions(maintenance_work_mem="4GB; RESET ALL")
+
+    sample = IndexBuildProgress(
+        index="i", phase="building index", blocks_done=5, blocks_total=10
+    )
+    assert sample.fraction == 0.5
+    assert IndexBuildProgress(index="i", phase="initializing").fraction is None
+
+
+def test_index_quantization():
+    halfvec = IndexConfig(quantization="halfvec")
+    assert halfvec.index_opclass() == "halfvec_l2_ops"
+    assert halfvec.index_expression("embedding", 8) == "(embedding)::halfvec(8)"
+    bit = IndexConfig(method="ivfflat", quantization="bit")
+    assert bit.index_opclass() == "bit_hamming_ops"
+    assert bit.distance_operator() == "<~>"
+    assert IndexConfig().index_expression("embedding", 8) == "embedding"
+
+    configs = index_grid(
+        hnsw_m=[16], hnsw_ef_construction=[64], quantizations=["none", "bit"]
+    )
+    assert [config.quantization for config in configs] == ["none", "bit"]
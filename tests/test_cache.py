@@ -0,0 +1,57 @@
+import pickle
+
+from pgvector_perf.cache import QueryCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_query_cache_lru_and_ttl():
+    clock = FakeClock()
+    cache: QueryCache[str] = QueryCache(max_entries=2, ttl=10, clock=clock)
+    keys = [QueryCache.key([float(i)] * 4, limit=5) for i in range(3)]
+    assert QueryCache.key([0.0] * 4, limit=5) == keys[0]
+    assert QueryCache.key([0.0] * 4, limit=6) != keys[0]
+
+    for i, key in enumerate(keys[:2]):
+        assert cache.put(key, f"value {i}", 10, version=cache.version)
+    assert cache.get(keys[0]) == "value 0"
+    cache.put(keys[2], "value 2", 10, version=cache.version)
+    # The least recently used entry is evicted
+    assert cache.get(keys[1]) is None and cache.get(keys[0]) == "value 0"
+
+    clock.now = 11
+    assert cache.get(keys[0]) is None
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.expirations) == (
+        2,
+        2,
+        1,
+        1,
+    )
+    assert stats.entries == 1 and stats.bytes == 10
+
+
+def test_query_cache_memory_bound_and_versions():
+    cache: QueryCache[str] = QueryCache(max_bytes=25)
+    keys = [QueryCache.key([float(i)], limit=5) for i in range(3)]
+    for key in keys:
+        cache.put(key, "value", 10, version=cache.version)
+    assert len(cache) == 2 and cache.stats().bytes == 20
+
+    version = cache.version
+    cache.invalidate()
+    assert len(cache) == 0 and cache.get(keys[2]) is None
+    # A result computed before the invalidation is not stored
+    assert not cache.put(keys[2], "stale", 10, version=version)
+    assert cache.put(keys[2], "fresh", 10, version=cache.version)
+
+    # A copy for a worker process keeps the settings, not the entries
+    copy = pickle.loads(pickle.dumps(cache))
+    assert (copy.max_bytes, len(copy), copy.stats().misses) == (25, 0, 0)
+    assert cache.stats().merge(cache.stats()).misses == 2 * cache.stats().misses
@@ -1,13 +1,33 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
 import pytest
+import pytz
 import sqlalchemy.engine.url
-from sqlalchemy import MetaData, create_engine
+from sqlalchemy import MetaData, create_engine, event
 from sqlalchemy import text as sql_text
 from sqlalchemy.engine.url import URL
 
-from pgvector_perf.client import PgvectorPerf
+import pgvector_perf.exceptions
+from pgvector_perf.cache import QueryCache
+from pgvector_perf.client import AsyncPgvectorPerf, PgvectorPerf
 from pgvector_perf.config import console, settings
-from pgvector_perf.schemas import PointWithEmbedding, PointWithEmbeddingSchema
-from pgvector_perf.utils import dummy_embedding, gen_session_id
+from pgvector_perf.ingest import run_ingest
+from pgvector_perf.load import LoadConfig, run_load
+from pgvector_perf.metrics import MetricsCollector
+from pgvector_perf.plans import PlanSampler
+from pgvector_perf.schemas import (
+    IndexBuildOptions,
+    IndexConfig,
+    PointBatch,
+    PointWithEmbedding,
+    PointWithEmbeddingSchema,
+    SearchParams,
+)
+from pgvector_perf.utils import dummy_embedding, gen_session_id, model_relation_name
 
 test_model_name = "pytest_model"
 
@@ -140,3 +160,787 @@ def test_client_point_operations(pg_url: URL):
     assert all(p[0].id is not None for p in points_with_distance) and all(
         p[1] > 0 for p in points_with_distance
     )
+
+
+def test_client_copy_operations(pg_url: URL):
+    console.print(f"\nTesting client copy operations with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(url=pg_url, echo=True)
+
+    # Copy points
+    points = [
+        PointWithEmbeddingSchema.model_validate(
+            {
+                "text": f"This is a copied {n}.",
+                "model": test_model_name,
+                "embedding": dummy_embedding(settings.vector_dimensions),
+            }
+        )
+        for n in animals
+    ]
+    result = client.points.copy_batch(points)
+    assert result.rows == len(animals) and all(p.id is not None for p in points)
+    point = client.points.retrieve(int(result.ids[0]))
+    assert point.text == points[0].text
+
+    # Copy columnar batch
+    embeddings = np.random.rand(len(animals), settings.vector_dimensions)
+    result = client.points.copy_batch(
+        texts=[f"This is a columnar {n}." for n in animals],
+        models=test_model_name,
+        embeddings=embeddings.astype(np.float32),
+    )
+    assert result.rows == len(animals) and len(set(result.ids.tolist())) == len(animals)
+
+    # Mix explicit ids with sequence ids; an id taken by an open transaction
+    # is not handed out again after a batch with lower explicit ids
+    def copy(ids):
+        return client.points.copy_batch(
+            ids=ids,
+            texts=[f"This is a mixed {i}." for i in range(len(ids))],
+            models=test_model_name,
+            embeddings=embeddings[: len(ids)].astype(np.float32),
+        ).ids
+
+    assert copy([150001, -1])[0] == 150001
+    table_name = client.model.sql_model().__table__.name
+    with client.engine.connect() as connection:
+        reserved = connection.execute(
+            sql_text(f"SELECT nextval(pg_get_serial_sequence('{table_name}', 'id'))")
+        ).scalar_one()
+        assert reserved > 150001
+        assert copy([140001]).tolist() == [140001]
+        assert copy([-1, -1]).min() > reserved
+
+
+def test_client_query_batch_operations(pg_url: URL):
+    console.print(f"\nTesting client query batch operations with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(url=pg_url, echo=True)
+
+    embeddings = np.random.rand(3, settings.vector_dimensions).astype(np.float32)
+    ids, distances = client.points.query_batch(embeddings, limit=4, batch_size=2)
+    assert ids.shape == distances.shape == (3, 4)
+    assert (ids > 0).all() and (np.diff(distances, axis=1) >= 0).all()
+    points_with_distance = client.points.query(embeddings[0].tolist(), limit=4)
+    assert [p.id for p, _ in points_with_distance] == ids[0].tolist()
+
+
+def test_client_point_batch_operations(pg_url: URL):
+    console.print(f"\nTesting client point batch operations with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(url=pg_url, echo=True)
+
+    # Copy a batch
+    batch = PointBatch.from_points(
+        [
+            PointWithEmbeddingSchema.model_validate(
+                {
+                    "text": f"This is a batched {n}.",
+                    "model": test_model_name,
+                    "embedding": dummy_embedding(settings.vector_dimensions),
+                }
+            )
+            for n in animals[:3]
+        ]
+    )
+    client.points.copy_batch(batch)
+    assert (batch.ids > 0).all()
+
+    # Query as a batch
+    hits = client.points.query_columns(batch.embeddings[0], limit=3)
+    assert hits.ids[0] == batch.ids[0] and hits.distances is not None
+    assert hits.embeddings.dtype == np.float32
+    np.testing.assert_array_equal(hits.embeddings[0], batch.embeddings[0])
+    points_with_distance = client.points.query(batch.embeddings[0].tolist(), limit=3)
+    assert hits.ids.tolist() == [p.id for p, _ in points_with_distance]
+
+    # Query without embeddings, then load them
+    hits = client.points.query_columns(
+        batch.embeddings[0], limit=3, columns=(), with_embedding=False
+    )
+    assert hits.embeddings is None and hits.texts is None
+    assert hits.ids.tolist() == [p.id for p, _ in points_with_distance]
+    embeddings = client.points.fetch_embeddings(hits.ids[::-1])
+    np.testing.assert_array_equal(embeddings[-1], batch.embeddings[0])
+    with pytest.raises(pgvector_perf.exceptions.PointNotFoundError):
+        client.points.fetch_embeddings([-1])
+
+    # List as a batch
+    listed = client.points.list_columns(model=test_model_name, limit=3)
+    assert len(listed) == 3 and listed.dimensions == settings.vector_dimensions
+    points = listed.to_points()
+    assert [p.id for p in points] == listed.ids.tolist()
+    np.testing.assert_array_equal(
+        np.asarray(points[0].embedding, dtype=np.float32), listed.embeddings[0]
+    )
+
+
+def test_client_query_cache(pg_url: URL):
+    console.print(f"\nTesting client query cache with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(url=pg_url, query_cache=QueryCache(), echo=True)
+    assert client.query_cache is not None
+
+    embedding = dummy_embedding(settings.vector_dimensions)
+    first = client.points.query(embedding, limit=3)
+    second = client.points.query(embedding, limit=3)
+    assert [p.id for p, _ in first] == [p.id for p, _ in second]
+    # Results do not share their embeddings with the cache
+    nearest = list(first[0][0].embedding)
+    first[0][0].embedding[0] += 1.0
+    second[0][0].embedding[0] += 1.0
+    assert client.points.query(embedding, limit=3)[0][0].embedding == nearest
+    client.points.query(embedding, limit=3, ef_search=80)
+    stats = client.query_cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (2, 2, 2)
+
+    # Writes invalidate the cache
+    point = client.points.create(
+        PointWithEmbeddingSchema.model_validate(
+            {
+                "text": "This is a cached point.",
+                "model": test_model_name,
+                "embedding": embedding,
+            }
+        )
+    )
+    assert len(client.query_cache) == 0
+    assert client.points.query(embedding, limit=3)[0][0].id == point.id
+    client.points.delete(point.id)
+    assert client.points.query(embedding, limit=3)[0][0].id != point.id
+    assert client.query_cache.stats().invalidations == 2
+
+
+def test_client_index_operations(pg_url: URL):
+    console.print(f"\nTesting client index operations with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(url=pg_url, echo=True)
+
+    # Rebuild as IVFFlat
+    client.index.drop()
+    assert client.index.size() is None
+    client.index.create(config=IndexConfig(method="ivfflat", lists=2))
+    assert (client.index.size() or 0) > 0
+    with client.engine.connect() as connection:
+        indexdef = connection.execute(
+            sql_text("SELECT indexdef FROM pg_indexes WHERE indexname = :name"),
+            {"name": client.vector_index},
+        ).scalar_one()
+    assert "ivfflat" in indexdef and "lists='2'" in indexdef
+
+    # Back to HNSW with an override
+    client.index.drop()
+    client.index.create(m=8)
+    assert (client.index.size() or 0) > 0
+
+    # Tuned, concurrent build with progress samples
+    samples = []
+    with client.engine.connect() as connection:
+        work_mem = connection.execute(sql_text("SHOW maintenance_work_mem")).scalar()
+    client.index.drop()
+    result = client.index.create(
+        options=IndexBuildOptions(
+            maintenance_work_mem="64MB",
+            max_parallel_maintenance_workers=1,
+            concurrently=True,
+        ),
+        progress=samples.append,
+        progress_interval=0.01,
+    )
+    assert result.seconds > 0 and (result.bytes or 0) > 0
+    assert samples and samples[-1].phase == "done"
+    assert samples[-1].index == client.vector_index
+    with client.engine.connect() as connection:
+        show = connection.execute(sql_text("SHOW maintenance_work_mem")).scalar()
+    assert show == work_mem
+
+    # An existing index is kept, an invalid one rebuilt
+    assert not client.index.create().created
+    validity_stmt = sql_text(
+        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+    )
+    with client.engine.begin() as connection:
+        connection.execute(
+            sql_text(
+                "UPDATE pg_index SET indisvalid = false "
+                + "WHERE indexrelid = to_regclass(:name)"
+            ),
+            {"name": client.vector_index},
+        )
+    result = client.index.create()
+    assert result.created and (result.bytes or 0) > 0
+    with client.engine.connect() as connection:
+        valid = connection.execute(
+            validity_stmt, {"name": client.vector_index}
+        ).scalar_one()
+    assert valid
+
+
+def test_client_quantized_index(pg_url: URL):
+    console.print(f"\nTesting client quantized index with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(url=pg_url)
+    with client.engine.connect() as connection:
+        version = connection.execute(
+            sql_text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        ).scalar_one()
+    if tuple(int(v) for v in version.split(".")[:2]) < (0, 7):
+        pytest.skip(f"halfvec and bit need pgvector 0.7, server has {version}")
+
+    embedding = dummy_embedding(settings.vector_dimensions)
+    exact = [point.id for point, _ in client.points.query(embedding, limit=5)]
+    for quantization in ("halfvec", "bit"):
+        client.index.drop()
+        client.index_config = IndexConfig(quantization=quantization)
+        client.index.create()
+        assert (client.index.size() or 0) > 0
+        # Candidates are re-ranked by full-precision distance
+        search_params = SearchParams(ef_search=1000, oversample=100)
+        hits = client.points.query(embedding, limit=5, search_params=search_params)
+        distances = [distance for _, distance in hits]
+        assert distances == sorted(distances)
+        assert len({point.id for point, _ in hits} & set(exact)) >= 4
+        ids, _ = client.points.query_batch(
+            [embedding], limit=5, search_params=search_params
+        )
+        assert ids[0].tolist() == [point.id for point, _ in hits]
+    client.index.drop()
+    client.index_config = IndexConfig()
+    client.index.create()
+
+
+def test_client_filtered_query(pg_url: URL):
+    console.print(f"\nTesting client filtered query with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(url=pg_url)
+    embeddings = np.random.rand(50, settings.vector_dimensions).astype(np.float32)
+    result = client.points.copy_batch(
+        texts=[f"This is a filtered {i}." for i in range(50)],
+        models="pytest_filtered_model",
+        embeddings=embeddings,
+    )
+    query = np.random.rand(settings.vector_dimensions).astype(np.float32)
+    exact = result.ids[np.argsort(np.linalg.norm(embeddings - query, axis=1))[:5]]
+
+    client.index.create(model="pytest_filtered_model")
+    assert (client.index.size(model="pytest_filtered_model") or 0) > 0
+    hits = client.points.query(query.tolist(), limit=5, model="pytest_filtered_model")
+    assert [point.id for point, _ in hits] == exact.tolist()
+    assert all(point.model == "pytest_filtered_model" for point, _ in hits)
+    ids, _ = client.points.query_batch([query], limit=5, model="pytest_filtered_model")
+    assert ids[0].tolist() == exact.tolist()
+    client.index.drop(model="pytest_filtered_model")
+    assert client.index.size(model="pytest_filtered_model") is None
+
+    # Over-fetch unfiltered neighbors, then filter them
+    batch = client.points.query_columns(
+        query,
+        limit=5,
+        model="pytest_filtered_model",
+        search_params=SearchParams(ef_search=1000, filter_oversample=1000),
+        columns=("model",),
+        with_embedding=False,
+    )
+    assert batch.ids.tolist() == exact.tolist()
+    assert not client.points.query(
+        query.tolist(),
+        limit=5,
+        model="pytest_filtered_model",
+        created_before=datetime.now(tz=pytz.utc) - timedelta(days=1),
+    )
+
+    with client.engine.connect() as connection:
+        version = connection.execute(
+            sql_text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        ).scalar_one()
+    if tuple(int(v) for v in version.split(".")[:2]) < (0, 8):
+        pytest.skip(f"Iterative scans need pgvector 0.8, server has {version}")
+    hits = client.points.query(
+        query.tolist(),
+        limit=5,
+        model="pytest_filtered_model",
+        search_params=SearchParams(iterative_scan="relaxed_order"),
+    )
+    distances = [distance for _, distance in hits]
+    assert len(hits) == 5 and distances == sorted(distances)
+
+
+def test_client_search_params(pg_url: URL):
+    console.print(f"\nTesting client search params with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(
+        url=pg_url, search_params=SearchParams(ef_search=100), echo=True
+    )
+    embedding = dummy_embedding(settings.vector_dimensions)
+
+    # Per-call values override the client's
+    points_with_distance = client.points.query(embedding, limit=4, probes=2)
+    assert len(points_with_distance) == 4
+    ids, _ = client.points.query_batch(
+        np.asarray([embedding]), limit=4, search_params=SearchParams(ef_search=200)
+    )
+    assert ids[0].tolist() == [p.id for p, _ in points_with_distance]
+
+    # SET LOCAL ends with the query's transaction
+    with client.engine.connect() as connection:
+        ef_search = connection.execute(
+            sql_text("SELECT current_setting('hnsw.ef_search', true)")
+        ).scalar()
+    assert ef_search in (None, "", "40")
+
+
+def test_client_explain_query(pg_url: URL):
+    console.print(f"\nTesting client query plans with URL: '{pg_url}'.")
+
+    sampler = PlanSampler(every=2)
+    client = PgvectorPerf(url=pg_url, plan_sampler=sampler)
+    embedding = dummy_embedding(settings.vector_dimensions)
+
+    # The test table is small enough for a sequential scan to be cheaper
+    @event.listens_for(client.engine, "connect")
+    def _disable_seqscan(dbapi_connection, connection_record):
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+
+    plan = client.points.explain_query(embedding, limit=3)
+    assert plan.index_scan and plan.vector_index == client.vector_index
+    assert plan.rows == 3 and (plan.execution_ms or 0) > 0
+    assert plan.shared_hit_blocks + plan.shared_read_blocks > 0
+    assert client.points.explain_query(embedding, analyze=False).execution_ms is None
+
+    # Sampled queries without the index are flagged
+    client.index.drop()
+    try:
+        for _ in range(4):
+            client.points.query(embedding, limit=3)
+            sampler.wait()
+    finally:
+        client.index.touch()
+    stats = sampler.stats()
+    assert (stats.queries, stats.sampled, stats.flagged) == (4, 2, 2)
+    assert "Seq Scan" in sampler.flagged[-1].node_types
+
+
+def test_client_warmup(pg_url: URL):
+    console.print(f"\nTesting client warmup with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(url=pg_url, pool_size=2, max_overflow=0, pool_pre_ping=True)
+
+    queries = np.random.rand(5, settings.vector_dimensions)
+    result = client.warmup(queries, num_queries=3)
+    assert result.connections == 2 and result.queries == 3
+    assert client.engine.pool.checkedin() == 2
+
+
+def test_client_load(pg_url: URL):
+    console.print(f"\nTesting client load generation with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(url=pg_url)
+
+    queries = np.random.rand(8, settings.vector_dimensions)
+    result = run_load(
+        client,
+        queries,
+        LoadConfig(mode="open", concurrency=2, qps=20, duration=1, write_ratio=0.2),
+        model=test_model_name,
+    )
+    assert sum(stats.errors for stats in result.totals) == 0
+    assert sum(stats.count for stats in result.intervals) > 0
+    assert {stats.operation for stats in result.totals} <= {"query", "create"}
+
+
+def test_client_ingest(pg_url: URL, tmp_path):
+    console.print(f"\nTesting client streaming ingest with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(url=pg_url)
+
+    # 6 batches of 10 texts, half of each repeated from the previous batch
+    source = [[f"ingest {i * 5 + j}" for j in range(10)] for i in range(6)]
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    failing = {"ingest 22"}
+
+    def embed(texts):
+        if failing & set(texts):
+            # Fail once earlier batches have been checkpointed
+            for _ in range(100):
+                if os.path.exists(checkpoint_path):
+                    break
+                time.sleep(0.05)
+            raise RuntimeError("Embedding failed")
+        return np.array([dummy_embedding(settings.vector_dimensions) for _ in texts])
+
+    with pytest.raises(RuntimeError):
+        run_ingest(
+            client,
+            source,
+            embed,
+            model=test_model_name,
+            first_id=100001,
+            queue_size=1,
+            embed_workers=2,
+            checkpoint_path=checkpoint_path,
+        )
+    assert client.points.retrieve(100021, not_found_ok=True) is None
+
+    failing.clear()
+    result = run_ingest(
+        client,
+        source,
+        embed,
+        model=test_model_name,
+        first_id=100001,
+        embed_workers=2,
+        checkpoint_path=checkpoint_path,
+    )
+    assert result.resumed_from is not None and result.rows < 35
+    assert [stats.stage for stats in result.stages] == [
+        "read",
+        "dedupe",
+        "embed",
+        "load",
+    ]
+    batch = client.points.list_columns(limit=1000, with_embedding=False)
+    texts = dict(zip(batch.ids.tolist(), batch.texts))
+    assert [texts[100001 + i] for i in range(35)] == [f"ingest {i}" for i in range(35)]
+    assert 100036 not in texts
+
+
+def test_client_bulk_load(pg_url: URL):
+    console.print(f"\nTesting client bulk load with URL: '{pg_url}'.")
+
+    build_options = IndexBuildOptions(maintenance_work_mem="64MB")
+    client = PgvectorPerf(url=pg_url, index_build_options=build_options)
+    client.index.touch()
+    client.index.create(model=test_model_name, m=8)
+    indexes = {index.name: index for index in client.index.list()}
+    assert set(indexes) == {
+        client.vector_index,
+        model_relation_name(client.vector_index, test_model_name),
+    }
+
+    embeddings = np.random.rand(20, settings.vector_dimensions).astype(np.float32)
+    result = client.bulk_load(
+        ids=np.arange(200001, 200021),
+        texts=[f"bulk {i}" for i in range(20)],
+        models=test_model_name,
+        embeddings=embeddings,
+    )
+    assert result.rows == 20 and result.index_existed
+    assert list(result.phases) == [
+        "touch",
+        "drop index",
+        "copy",
+        "analyze",
+        "build index",
+    ]
+    assert result.build is not None and result.build.options == build_options
+    assert (client.index.size() or 0) > 0
+    # The partial index is rebuilt as it was
+    assert {index.name for index in result.dropped} == set(indexes)
+    assert {index.name: index for index in client.index.list()} == indexes
+    assert client.points.retrieve(200020).text == "bulk 19"
+    client.index.drop(model=test_model_name)
+
+    # Without an index to begin with, none is built unless asked for
+    client.index.drop()
+    result = client.bulk_load(
+        texts=["bulk 20"], models=test_model_name, embeddings=embeddings[:1]
+    )
+    assert not result.index_existed and result.build is None
+    assert client.index.size() is None
+    client.index.touch()
+
+
+def test_client_batch_updates(pg_url: URL):
+    console.print(f"\nTesting client batch upserts and updates with URL: '{pg_url}'.")
+
+    client = PgvectorPerf(url=pg_url)
+    embeddings = np.random.rand(4, settings.vector_dimensions).astype(np.float32)
+    ids = client.points.upsert_batch(
+        ids=[300001, 300002, -1],
+        texts=["upsert 1", "upsert 2", "upsert 3"],
+        models=test_model_name,
+        embeddings=embeddings[:3],
+    )
+    assert ids[:2].tolist() == [300001, 300002] and ids[2] > 0
+    created_at = client.points.retrieve(300001).created_at
+
+    # Existing ids are replaced, new ones inserted
+    assert client.points.upsert_batch(
+        ids=[300002, 300004],
+        texts=["upserted 2", "upsert 4"],
+        models=test_model_name,
+        embeddings=embeddings[2:],
+    ).tolist() == [300002, 300004]
+    point = client.points.retrieve(300002)
+    assert point.text == "upserted 2"
+    assert np.allclose(point.embedding, embeddings[2])
+
+    # Only the columns given are updated; missing ids are skipped
+    updated = client.points.update_batch(
+        [300004, 10**9, 300001], embeddings=embeddings[[0, 1, 3]], chunk_size=2
+    )
+    assert updated.tolist() == [300004, 300001]
+    point = client.points.retrieve(300001)
+    assert point.text == "upsert 1" and point.created_at == created_at
+    assert np.allclose(point.embedding, embeddings[3])
+    assert client.points.update_batch([300004], texts=["updated 4"]).tolist() == [
+        300004
+    ]
+    assert client.points.retrieve(300004).text == "updated 4"
+
+    with pytest.raises(ValueError):
+        client.points.update_batch([300001, 300001], texts=["a", "b"])
+    with pytest.raises(ValueError):
+        client.points.update_batch([300001])
+
+
+def test_client_instrumentation(pg_url: URL):
+    console.print(f"\nTesting client instrumentation with URL: '{pg_url}'.")
+
+    collector = MetricsCollector()
+    client = PgvectorPerf(url=pg_url, instrumentation=collector)
+
+    embedding = dummy_embedding(settings.vector_dimensions)
+    client.points.query(embedding, limit=3)
+    client.points.copy_batch(
+        texts=["instrumented"],
+        models=test_model_name,
+        embeddings=np.random.rand(1, settings.vector_dimensions),
+    )
+    with pytest.raises(pgvector_perf.exceptions.PointNotFoundError):
+        client.points.retrieve(10**9)
+
+    metrics = {m.operation: m for m in collector.snapshot()}
+    query = metrics["points.query"]
+    assert (query.calls, query.rows, query.errors) == (1, 3, 0)
+    assert query.statements >= 1 and 0 < query.database_seconds <= query.seconds
+    assert query.bytes_sent > settings.vector_dimensions
+    assert query.bytes_received > 3 * settings.vector_dimensions * 4
+    copy = metrics["points.copy_batch"]
+    assert copy.rows == 1 and copy.bytes_sent > settings.vector_dimensions * 4
+    assert metrics["points.retrieve"].errors == 1
+
+    # Engines created before it was set are instrumented too
+    client.instrumentation = None
+    client.points.query(embedding, limit=3)
+    assert collector.snapshot()[1].calls == 1
+    client.instrumentation = collector
+    client.points.query(embedding, limit=3)
+    assert metrics["points.query"].calls == 1
+    assert {m.operation: m for m in collector.snapshot()}["points.query"].calls == 2
+
+
+def test_client_partitioned_table(pg_url: URL):
+    console.print(f"\nTesting client partitioned table with URL: '{pg_url}'.")
+
+    url = pg_url.set(database=f"{pg_url.database}_partitioned")
+    client = PgvectorPerf(url=url, partition_by_model=True)
+    client.databases.touch()
+    try:
+        client.tables.touch()
+        embeddings = np.random.rand(40, settings.vector_dimensions).astype(np.float32)
+        models = ["pytest_model_a", "pytest_model_b"] * 20
+        result = client.points.copy_batch(
+            texts=[f"This is a partitioned {i}." for i in range(40)],
+            models=models,
+            embeddings=embeddings,
+        )
+        point = client.points.create(
+            PointWithEmbeddingSchema(
+                text="This is a created point.",
+                model="pytest_model_c",
+                embedding=embeddings[0].tolist(),
+            )
+        )
+        partitions = client.tables.partitions()
+        assert sorted(partitions) == [
+            "pytest_model_a",
+            "pytest_model_b",
+            "pytest_model_c",
+        ]
+        with client.engine.connect() as connection:
+            count = connection.execute(
+                sql_text(f"SELECT count(*) FROM {partitions['pytest_model_a']}")
+            ).scalar_one()
+        assert count == 20
+        # Partitions created on an empty table are indexed
+        assert (client.index.size(model="pytest_model_c") or 0) > 0
+
+        # One index per partition, rebuilt one at a time
+        client.index.create()
+        sizes = {model: client.index.size(model=model) for model in partitions}
+        assert all(size and size > 0 for size in sizes.values())
+        assert client.index.size() == sum(sizes.values())
+        prewarmed = client.warmup(num_queries=1).prewarmed_blocks
+        if prewarmed:  # Empty without pg_prewarm on the server
+            assert set(partitions.values()) <= set(prewarmed)
+            assert {index.name for index in client.index.list()} <= set(prewarmed)
+        client.index.drop(model="pytest_model_b")
+        assert client.index.size(model="pytest_model_b") is None
+        client.index.create(model="pytest_model_b")
+
+        query = embeddings[1]
+        rows = np.flatnonzero(np.asarray(models) == "pytest_model_b")
+        exact = result.ids[
+            rows[np.argsort(np.linalg.norm(embeddings[rows] - query, axis=1))]
+        ]
+        hits = client.points.query(
+            query.tolist(), limit=5, model="pytest_model_b", ef_search=100
+        )
+        assert [p.id for p, _ in hits] == exact[:5].tolist()
+        ids, _ = client.points.query_batch([query], limit=5, model="pytest_model_b")
+        assert ids[0].tolist() == exact[:5].tolist()
+        assert client.points.retrieve(point.id).model == "pytest_model_c"
+
+        # Upserts move points whose model changes to their new partition
+        moved = result.ids[:2]
+        created_at = client.points.retrieve(int(moved[0])).created_at
+        client.points.upsert_batch(
+            ids=moved,
+            texts=["moved a", "moved b"],
+            models="pytest_model_d",
+            embeddings=embeddings[:2],
+        )
+        point = client.points.retrieve(int(moved[0]))
+        assert point.model == "pytest_model_d" and point.created_at == created_at
+        assert "pytest_model_d" in client.tables.partitions()
+        # Partitions added after the index was built get one too
+        assert (client.index.size(model="pytest_model_d") or 0) > 0
+        updated = client.points.update_batch(moved, models="pytest_model_a")
+        assert updated.tolist() == moved.tolist()
+        assert client.points.retrieve(int(moved[1])).model == "pytest_model_a"
+        with client.engine.connect() as connection:
+            count = connection.execute(
+                sql_text(f"SELECT count(*) FROM {partitions['pytest_model_a']}")
+            ).scalar_one()
+        assert count == 21
+
+        # Bulk loads drop and rebuild every partition's index
+        indexes = client.index.list()
+        assert len(indexes) == len(client.tables.partitions())
+        loaded = client.bulk_load(
+            texts=["bulk a"], models="pytest_model_a", embeddings=embeddings[:1]
+        )
+        assert loaded.index_existed and loaded.dropped == indexes
+        assert client.index.list() == indexes
+
+        # Unless the index was dropped
+        client.index.drop()
+        client.tables.create_partition("pytest_model_e")
+        assert client.index.size(model="pytest_model_e") is None
+
+        # Process workers open a client with the same options
+        loader = PgvectorPerf(
+            url=url,
+            partition_by_model=True,
+            query_cache=QueryCache(),
+            plan_sampler=PlanSampler(every=2),
+        )
+        config = LoadConfig(
+            executor="process", concurrency=2, duration=1, write_ratio=0.5
+        )
+        # Their caches would not see each other's writes
+        with pytest.raises(ValueError):
+            run_load(loader, embeddings[:4], config)
+        result = run_load(
+            loader,
+            embeddings[:4],
+            config.model_copy(update={"write_ratio": 0.0, "duration": 0.5}),
+        )
+        assert result.cache is not None and result.cache.misses > 0
+        loader.query_cache = None
+        result = run_load(loader, embeddings[:4], config, model="pytest_model_load")
+        assert sum(stats.errors for stats in result.totals) == 0
+        assert "pytest_model_load" in client.tables.partitions()
+        assert loader.plan_sampler.stats().sampled > 0
+    finally:
+        client.engine.dispose()
+        engine = create_engine(
+            pg_url.set(database="postgres"), isolation_level="AUTOCOMMIT"
+        )
+        with engine.connect() as connection:
+            connection.execute(sql_text(f"DROP DATABASE IF EXISTS {url.database}"))
+        engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_client_point_operations(pg_url: URL):
+    console.print(f"\nTesting async client point operations with URL: '{pg_url}'.")
+
+    collector = MetricsCollector()
+    client = AsyncPgvectorPerf(url=pg_url, echo=True, instrumentation=collector)
+
+    # Create database, tables and index
+    await client.databases.touch()
+    await client.tables.touch()
+    await client.index.touch()
+    assert (await client.warmup(num_queries=2)).queries == 2
+
+    # Create point
+    point = await client.points.create(
+        PointWithEmbeddingSchema.model_validate(
+            {
+                "text": f"This is an async {animals[0]}.",
+                "model": test_model_name,
+                "embedding": dummy_embedding(settings.vector_dimensions),
+            }
+        )
+    )
+    assert point.id is not None and point.model == test_model_name
+    # Copy columnar batch
+    result = await client.points.copy_batch(
+        texts=[f"This is an async {n}." for n in animals[1:]],
+        models=test_model_name,
+        embeddings=np.random.rand(len(animals) - 1, settings.vector_dimensions),
+    )
+    assert result.rows == len(animals) - 1
+    updated = await client.points.update_batch(
+        result.ids,
+        embeddings=np.random.rand(len(result.ids), settings.vector_dimensions),
+    )
+    assert updated.tolist() == result.ids.tolist()
+    ids = await client.points.upsert_batch(
+        ids=result.ids[:1],
+        texts=["This is an async upsert."],
+        models=test_model_name,
+        embeddings=np.random.rand(1, settings.vector_dimensions),
+    )
+    assert (await client.points.retrieve(int(ids[0]))).text.endswith("upsert.")
+
+    # Query points concurrently
+    results = await asyncio.gather(
+        *[
+            client.points.query(dummy_embedding(settings.vector_dimensions))
+            for _ in range(20)
+        ]
+    )
+    assert all(len(points_with_distance) > 0 for points_with_distance in results)
+    points_with_distance = await client.points.query(
+        dummy_embedding(settings.vector_dimensions), ef_search=100, probes=2
+    )
+    assert len(points_with_distance) > 0
+    hits = await client.points.query_columns(
+        dummy_embedding(settings.vector_dimensions), limit=3
+    )
+    assert len(hits) == 3 and hits.embeddings.shape[1] == settings.vector_dimensions
+    ids, distances = await client.points.query_batch(
+        hits.embeddings, limit=2, batch_size=2
+    )
+    # Some points share an embedding, so each hit is among its two nearest
+    assert all(hit in row for hit, row in zip(hits.ids.tolist(), ids.tolist()))
+    assert np.allclose(distances[:, 0], 0, atol=1e-5)
+    assert len(await client.points.list_columns(limit=2)) == 2
+
+    # Delete point
+    assert await client.points.delete(point.id, not_found_ok=False)
+    assert await client.points.retrieve(point.id, not_found_ok=True) is None
+
+    metrics = {m.operation: m for m in collector.snapshot()}
+    query = metrics["points.query"]
+    assert query.calls == 23 and query.statements >= query.calls
+    assert 0 < query.database_seconds < query.seconds
+    assert metrics["points.copy_batch"].rows == len(animals) - 1
+
+    await client.close()
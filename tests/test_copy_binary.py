@@ -0,0 +1,83 @@
+import struct
+from datetime import datetime
+
+import numpy as np
+import pytest
+import pytz
+
+from pgvector_perf.copy_binary import (
+    COPY_COLUMNS,
+    PGCOPY_HEADER,
+    PGCOPY_TRAILER,
+    IterableIO,
+    decode_vectors,
+    iter_copy_binary,
+    iter_copy_vectors,
+    to_postgres_timestamp,
+)
+
+
+def test_to_postgres_timestamp():
+    assert to_postgres_timestamp(datetime(2000, 1, 1)) == 0
+    assert to_postgres_timestamp(datetime(2000, 1, 2, tzinfo=pytz.utc)) == 86400e6
+
+
+def test_iter_copy_binary():
+    embeddings = np.random.rand(3, 4).astype(np.float32)
+    ids = np.array([1, 2, 3], dtype=np.int64)
+    created_at = np.array([0, 1, 2], dtype=np.int64)
+    texts = ["dog", "貓", ""]
+    models = ["pytest_model"] * 3
+
+    stream = IterableIO(
+        iter_copy_binary(ids, embeddings, created_at, texts, models, chunk_size=2)
+    )
+    data = stream.read()
+    assert data.startswith(PGCOPY_HEADER) and data.endswith(PGCOPY_TRAILER)
+
+    offset = len(PGCOPY_HEADER)
+    for i in range(3):
+        (field_count,) = struct.unpack_from(">h", data, offset)
+        assert field_count == len(COPY_COLUMNS)
+        offset += 2
+        fields = []
+        for _ in range(field_count):
+            (size,) = struct.unpack_from(">i", data, offset)
+            fields.append(data[offset + 4 : offset + 4 + size])
+            offset += 4 + size
+        _id, _embedding, _created_at, _text, _model = fields
+        assert struct.unpack(">i", _id)[0] == ids[i]
+        assert struct.unpack(">HH", _embedding[:4]) == (4, 0)
+        np.testing.assert_array_equal(
+            np.frombuffer(_embedding[4:], dtype=">f4"), embeddings[i]
+        )
+        assert struct.unpack(">q", _created_at)[0] == created_at[i]
+        assert _text.decode("utf-8") == texts[i]
+        assert _model.decode("utf-8") == models[i]
+    assert data[offset:] == PGCOPY_TRAILER
+
+
+def test_decode_vectors():
+    embeddings = np.random.rand(3, 4).astype(np.float32)
+    buffers = [
+        struct.pack(">HH", 4, 0) + row.astype(">f4").tobytes() for row in embeddings
+    ]
+    np.testing.assert_array_equal(decode_vectors(buffers, 4), embeddings)
+    with pytest.raises(ValueError):
+        decode_vectors(buffers, 2)
+
+
+def test_iter_copy_vectors():
+    embeddings = np.random.rand(3, 4).astype(np.float32)
+    data = b"".join(iter_copy_vectors(embeddings, chunk_size=2))
+    assert data.startswith(PGCOPY_HEADER) and data.endswith(PGCOPY_TRAILER)
+
+    offset = len(PGCOPY_HEADER)
+    for i in range(3):
+        field_count, ord_size, _ord, size = struct.unpack_from(">hiii", data, offset)
+        assert (field_count, ord_size, _ord, size) == (2, 4, i + 1, 4 + 4 * 4)
+        offset += 14
+        buffer = data[offset : offset + size]
+        np.testing.assert_array_equal(decode_vectors([buffer], 4)[0], embeddings[i])
+        offset += size
+    assert data[offset:] == PGCOPY_TRAILER
@@ -0,0 +1,47 @@
+import base64
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pgvector_perf.datasets import (
+    EMBEDDING_COLUMN,
+    convert_feature_dataset,
+    embedding_array,
+    read_feature_dataset,
+)
+
+
+def test_feature_dataset_conversion(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = rng.random((50, 8), dtype=np.float32)
+    legacy_path, path = tmp_path / "legacy.parquet", tmp_path / "feature.parquet"
+    columns = {
+        "id": pa.array(np.arange(1, 51)),
+        "text": pa.array([f"text {i}" for i in range(50)]),
+        "model": pa.array(["model"] * 50),
+    }
+    pq.write_table(
+        pa.table(
+            {
+                **columns,
+                "embedding_base64": pa.array(
+                    [base64.b64encode(e.tobytes()).decode() for e in embeddings]
+                ),
+            }
+        ),
+        legacy_path,
+    )
+
+    assert convert_feature_dataset(str(legacy_path), str(path), batch_size=16) == 50
+    schema = pq.read_schema(path)
+    assert schema.names == ["id", "text", "model", EMBEDDING_COLUMN]
+    assert schema.field(EMBEDDING_COLUMN).type == embedding_array(embeddings).type
+
+    for dataset_path in (legacy_path, path):
+        dataset = read_feature_dataset(str(dataset_path))
+        np.testing.assert_array_equal(dataset.embeddings, embeddings)
+        assert dataset.ids.tolist() == list(range(1, 51))
+        limited = read_feature_dataset(str(dataset_path), limit=20, batch_size=16)
+        np.testing.assert_array_equal(limited.embeddings, embeddings[:20])
+        assert limited.texts == [f"text {i}" for i in range(20)]
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from pgvector_perf.embedding_store import EmbeddingStore
+
+
+def test_embedding_store_batch_lookup_and_insert(tmp_path):
+    rng = np.random.default_rng(0)
+    texts = [f"text {i}" for i in range(100)]
+    embeddings = rng.random((100, 8), dtype=np.float32)
+
+    with EmbeddingStore(tmp_path, 8, initial_capacity=16, merge_threshold=32) as store:
+        rows = store.put(texts[:60], embeddings[:60])
+        assert rows.tolist() == list(range(60))
+        # Stored texts and repeats within a batch keep their first row
+        rows = store.put(
+            texts[50:] + ["text 99"], np.vstack([embeddings[50:], np.zeros((1, 8))])
+        )
+        assert rows.tolist() == list(range(50, 100)) + [99]
+        assert len(store) == 100 and store.capacity == 128
+        assert "text 0" in store and "missing" not in store
+
+        cached, found = store.get(texts[10:40])
+        assert found.all() and not cached.flags.writeable
+        np.testing.assert_array_equal(cached, embeddings[10:40])
+
+    store = EmbeddingStore(tmp_path, 8)
+    mixed, found = store.get(["text 3", "missing", "text 1"])
+    assert found.tolist() == [True, False, True]
+    np.testing.assert_array_equal(mixed[[0, 2]], embeddings[[3, 1]])
+    assert not mixed[1].any() and mixed.flags.writeable
+
+    with pytest.raises(ValueError):
+        store.put(["text"], np.zeros((1, 4)))
+    with pytest.raises(ValueError):
+        EmbeddingStore(tmp_path, 4)
+
+    # Texts are keyed by 128-bit hashes; older 64-bit stores must be rebuilt
+    assert EmbeddingStore.hash_texts(texts).dtype == np.dtype("S16")
+    np.save(tmp_path / "keys.npy", np.zeros(100, dtype=np.uint64))
+    with pytest.raises(ValueError):
+        EmbeddingStore(tmp_path, 8)
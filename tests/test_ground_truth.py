@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from pgvector_perf.ground_truth import compute_ground_truth, save_corpus
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_compute_ground_truth(tmp_path, processes: int):
+    rng = np.random.default_rng(0)
+    corpus = rng.random((1000, 16), dtype=np.float32)
+    queries = rng.random((30, 16), dtype=np.float32)
+    corpus_path = save_corpus(str(tmp_path / "corpus.npy"), corpus)
+
+    ground_truth = compute_ground_truth(
+        corpus_path,
+        queries,
+        5,
+        corpus_block_size=128,
+        query_block_size=7,
+        processes=processes,
+        cache_dir=str(tmp_path / "cache"),
+    )
+    distances = np.linalg.norm(queries[:, None, :] - corpus[None, :, :], axis=2)
+    np.testing.assert_array_equal(
+        ground_truth.neighbors, distances.argsort(axis=1)[:, :5]
+    )
+    np.testing.assert_allclose(
+        ground_truth.distances, np.sort(distances, axis=1)[:, :5], rtol=1e-6
+    )
+    assert len(os.listdir(tmp_path / "cache")) == 2
+
+    cached = compute_ground_truth(
+        corpus_path, queries, 5, cache_dir=str(tmp_path / "cache")
+    )
+    np.testing.assert_array_equal(cached.neighbors, ground_truth.neighbors)
+
+
+def test_compute_ground_truth_ties(tmp_path):
+    corpus = np.full((1000, 4), 10.0, dtype=np.float32)
+    corpus[[472, 511]] = [[0.1, 0, 0, 0], [0.2, 0, 0, 0]]
+    # Equally distant third neighbors, in different blocks
+    ties = [143, 821, 945, 248, 947, 34]
+    corpus[ties] = [0, 0.5, 0, 0]
+    corpus_path = save_corpus(str(tmp_path / "corpus.npy"), corpus)
+
+    ground_truth = compute_ground_truth(
+        corpus_path,
+        np.zeros((2, 4), dtype=np.float32),
+        3,
+        candidates=8,
+        corpus_block_size=128,
+        processes=1,
+        cache_dir=None,
+    )
+    np.testing.assert_array_equal(ground_truth.neighbors, [[472, 511, 34]] * 2)
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from pgvector_perf.load import LatencyHistogram
+
+
+def test_latency_histogram():
+    latencies = np.random.default_rng(0).lognormal(-5, 1, 10000)
+    histogram = LatencyHistogram()
+    for latency in latencies[:5000]:
+        histogram.record(latency)
+    other = LatencyHistogram()
+    for latency in latencies[5000:]:
+        other.record(latency)
+    histogram.merge(other)
+
+    assert len(histogram) == len(latencies)
+    for q in (50, 99, 99.9):
+        expected = np.percentile(latencies, q, method="inverted_cdf")
+        assert histogram.percentile(q) == pytest.approx(expected, rel=0.011)
+    summary = histogram.summary()
+    assert summary.max_ms == pytest.approx(latencies.max() * 1000)
+    assert summary.mean_ms == pytest.approx(latencies.mean() * 1000)
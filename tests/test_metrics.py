@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from pgvector_perf.metrics import (
+    Instrumentation,
+    MetricsCollector,
+    OperationRecord,
+    payload_bytes,
+    result_rows,
+)
+from pgvector_perf.schemas import BulkInsertResult, PointBatch
+
+
+def test_metrics_collector():
+    collector = MetricsCollector(buckets=[0.01, 0.1])
+    for seconds, error in [(0.005, False), (0.05, False), (1.0, True)]:
+        record = OperationRecord("points.query")
+        record.seconds, record.database_seconds = seconds, seconds / 2
+        record.rows, record.error = 10, error
+        collector.record(record)
+
+    (metrics,) = collector.snapshot()
+    assert (metrics.calls, metrics.errors, metrics.rows) == (3, 1, 30)
+    assert metrics.histogram == [1, 1, 1]
+    assert metrics.quantile_ms(0.5) == 100
+    assert metrics.client_seconds == pytest.approx(0.5275)
+
+    text = collector.to_prometheus()
+    assert 'pgvector_perf_operation_calls_total{operation="points.query"} 3' in text
+    assert (
+        'pgvector_perf_operation_duration_seconds_bucket{operation="points.query",'
+        + 'le="0.1"} 2'
+    ) in text
+    assert 'duration_seconds_bucket{operation="points.query",le="+Inf"} 3' in text
+    assert "# TYPE pgvector_perf_operation_duration_seconds histogram" in text
+
+    collector.reset()
+    assert collector.snapshot() == []
+
+
+def test_nested_operations():
+    collector = MetricsCollector()
+    with collector.operation("outer") as outer:
+        with collector.operation("inner") as inner:
+            inner.add_statement(0.5, bytes_sent=100)
+        outer.add_statement(0.25)
+        with pytest.raises(ValueError), collector.operation("failing"):
+            raise ValueError()
+    assert (outer.statements, outer.database_seconds, outer.bytes_sent) == (
+        2,
+        0.75,
+        100,
+    )
+    assert [(m.operation, m.errors) for m in collector.snapshot()] == [
+        ("failing", 1),
+        ("inner", 0),
+        ("outer", 0),
+    ]
+    # The base class measures but keeps nothing
+    with Instrumentation().operation("noop") as record:
+        pass
+    assert record.seconds >= 0
+
+
+def test_result_rows_and_bytes():
+    batch = PointBatch.model_construct(
+        ids=np.arange(3), texts=["a", "bb", "ccc"], embeddings=np.zeros((3, 4))
+    )
+    assert result_rows(batch) == 3
+    assert result_rows([[1, 2], [3]]) == 3
+    assert result_rows((np.zeros((2, 5)), np.zeros((2, 5)))) == 10
+    assert result_rows(BulkInsertResult(ids=np.arange(5), elapsed=1.0)) == 5
+    assert result_rows(None) == 0 and result_rows(1024) == 0
+    assert payload_bytes({"text": "héllo", "ids": np.arange(2, dtype=np.int32)}) == 14
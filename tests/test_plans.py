@@ -0,0 +1,92 @@
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pgvector_perf.plans import PlanSampler, PlanSamplerStats, QueryPlan
+
+
+def test_query_plan_from_explain():
+    document = [
+        {
+            "Plan": {
+                "Node Type": "Limit",
+                "Actual Rows": 5,
+                "Shared Hit Blocks": 30,
+                "Shared Read Blocks": 10,
+                "Plans": [
+                    {
+                        "Node Type": "Append",
+                        "Plans": [
+                            {
+                                "Node Type": "Index Scan",
+                                "Index Name": "index_embedding_model_a_0011aabb",
+                            },
+                            {"Node Type": "Seq Scan", "Relation Name": "points_b"},
+                        ],
+                    }
+                ],
+            },
+            "Planning Time": 0.2,
+            "Execution Time": 1.5,
+        }
+    ]
+    plan = QueryPlan.from_explain(document, vector_index="index_embedding")
+    assert plan.node_types == ["Limit", "Append", "Index Scan", "Seq Scan"]
+    assert plan.index_scan and plan.seq_scans == ["points_b"]
+    assert (plan.rows, plan.execution_ms, plan.hit_ratio) == (5, 1.5, 0.75)
+
+    document[0]["Plan"]["Plans"][0]["Plans"][0]["Index Name"] = "ix_model"
+    plan = QueryPlan.from_explain(document, vector_index="index_embedding")
+    assert not plan.index_scan and plan.indexes == ["ix_model"]
+    assert str(plan).startswith("no vector index scan")
+
+
+def test_plan_sampler():
+    flagged = []
+    sampler = PlanSampler(every=3, max_flagged=1, on_flagged=flagged.append)
+    assert [sampler.sample() for _ in range(3)] == [False, False, True]
+    # Not again until the sampled query has been explained
+    assert [sampler.sample() for _ in range(3)] == [False, False, False]
+
+    seq_scan = QueryPlan(node_types=["Seq Scan"], plan={})
+    sampler.record(QueryPlan(node_types=["Index Scan"], vector_index="i", plan={}))
+    sampler.record(seq_scan)
+    sampler.record(seq_scan)
+    assert sampler.stats().flagged == 2 and len(sampler.flagged) == 1
+    assert flagged == [seq_scan, seq_scan]
+    copy = pickle.loads(pickle.dumps(sampler))
+    assert copy.every == 3 and copy.stats().queries == 0
+    copy.merge(sampler.stats(), sampler.flagged)
+    assert copy.stats() == sampler.stats() and len(copy.flagged) == 1
+    with pytest.raises(ValueError):
+        PlanSampler(every=0)
+
+
+def test_plan_sampler_submit():
+    sampler = PlanSampler(every=1)
+    started, release = threading.Event(), threading.Event()
+
+    def explain():
+        started.set()
+        release.wait()
+        return QueryPlan(node_types=["Seq Scan"], plan={})
+
+    assert sampler.sample()
+    sampler.submit(explain)
+    started.wait()
+    # No other query is sampled while one is being explained
+    assert not sampler.sample()
+    release.set()
+    sampler.wait()
+    assert sampler.stats() == PlanSamplerStats(queries=2, sampled=1, flagged=1)
+    assert sampler.sample()
+    sampler.submit(lambda: 1 / 0)
+    sampler.wait()
+    assert sampler.sample()
+
+    # Concurrent queries are sampled one at a time
+    sampler = PlanSampler(every=1)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert sum(pool.map(lambda _: sampler.sample(), range(100))) == 1